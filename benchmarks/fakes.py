@@ -0,0 +1,540 @@
+# Local stand-ins for Bedrock, Redis (with FT.SEARCH), Neo4j and Jira used by
+# the offline benchmarks. They only implement what this repo calls.
+import hashlib
+import io
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import numpy as np
+
+from mcp_registry import get_manifest_registry
+from utils.similarity_engine import SimilarityIndex
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+FIELD_RE = re.compile(r"(\w+)\s*[:=]\s*([^;\n]+)")
+STEP_KEYWORDS = {
+    "create_defect": ("create", "raise", "log"),
+    "assign_defect": ("assign",),
+    "add_comment": ("comment",),
+    "review_defect": ("review",),
+    "close_defect": ("close",),
+    "update_status": ("status",),
+}
+
+
+# --- Bedrock ---------------------------------------------------------------
+
+class FakeBedrock:
+    """
+    Deterministic bedrock-runtime stub. Embeddings are a hashing-trick bag of
+    words, so texts that share words are similar; Claude picks steps by keyword
+    and copies ``field: value`` pairs out of the comment.
+    """
+
+    def __init__(self, embed_latency_ms: float = 5, llm_latency_ms: float = 50, default_dim: int = 1024):
+        self.embed_latency = embed_latency_ms / 1000
+        self.llm_latency = llm_latency_ms / 1000
+        self.default_dim = default_dim
+        self.calls = {"embed": 0, "llm": 0}
+        self._token_vectors = {}
+        self._lock = threading.Lock()
+
+    def _count(self, kind):
+        with self._lock:
+            self.calls[kind] += 1
+
+    def _token_vector(self, token: str, dim: int) -> np.ndarray:
+        key = (token, dim)
+        vector = self._token_vectors.get(key)
+        if vector is None:
+            seed = int(hashlib.sha1(token.encode("utf-8")).hexdigest()[:8], 16)
+            vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+            self._token_vectors[key] = vector
+        return vector
+
+    def embed(self, text: str, dim: int) -> list[float]:
+        vector = np.zeros(dim, dtype=np.float32)
+        for token in TOKEN_RE.findall(text.lower()):
+            vector += self._token_vector(token, dim)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def _claude_message(self, body: dict) -> dict:
+        prompt = body["messages"][0]["content"]
+        comment = prompt.split("User Comment:\n", 1)[-1].split("\n\nWorkflow Steps Manifest:", 1)[0]
+        candidates = re.findall(r"Step: (\w+)", prompt.split("Workflow Steps Manifest:", 1)[-1])
+        manifests = get_manifest_registry().manifests
+        provided = {key: value.strip() for key, value in FIELD_RE.findall(comment)}
+
+        lowered = comment.lower()
+        found = []
+        for step in candidates:
+            positions = [lowered.find(word) for word in STEP_KEYWORDS.get(step, ()) if word in lowered]
+            if positions:
+                found.append((min(positions), step))
+
+        states = []
+        for _, step in sorted(found):
+            required = manifests.get(step, {}).get("input_required", [])
+            states.append({
+                "step_name": step,
+                "required_fields": {field: provided.get(field, "Not Provided") for field in required},
+                "allowed_next_steps": manifests.get(step, {}).get("allowed_next_steps", []),
+            })
+
+        if body.get("tools"):
+            tool_input = {"states": states, "similar_defect_search": "similar" in lowered}
+            content = [{"type": "tool_use", "id": "toolu_bench", "name": body["tools"][0]["name"], "input": tool_input}]
+            stop_reason = "tool_use"
+        else:
+            lines = ["States:"]
+            for i, state in enumerate(states, start=1):
+                lines += [f"{i}.", f"  Step Name: {state['step_name']}", "  Required Fields:"]
+                lines += [f"  - {k}: {v}" for k, v in state["required_fields"].items()]
+                lines.append(f"  allowed_next_steps: {','.join(state['allowed_next_steps'])}")
+            lines.append("Confirmation: Do you want to proceed with these actions?")
+            content = [{"type": "text", "text": "\n".join(lines)}]
+            stop_reason = "end_turn"
+        return {"id": "msg_bench", "role": "assistant", "content": content, "stop_reason": stop_reason}
+
+    def invoke_model(self, modelId: str, body, accept=None, contentType=None):
+        payload = json.loads(body)
+        if "titan" in modelId:
+            self._count("embed")
+            time.sleep(self.embed_latency)
+            dim = payload.get("dimensions") or (1536 if modelId.endswith("v1") else self.default_dim)
+            result = {"embedding": self.embed(payload.get("inputText", ""), dim)}
+        else:
+            self._count("llm")
+            time.sleep(self.llm_latency)
+            result = self._claude_message(payload)
+        return {"body": io.BytesIO(json.dumps(result).encode("utf-8"))}
+
+    def invoke_model_with_response_stream(self, modelId: str, body, accept=None, contentType=None):
+        self._count("llm")
+        message = self._claude_message(json.loads(body))
+        return {"body": self._stream_events(message)}
+
+    def _stream_events(self, message: dict, piece: int = 24):
+        # Spread the latency over the chunks like a real token stream
+        pieces = []
+        for index, block in enumerate(message["content"]):
+            raw = block["text"] if block["type"] == "text" else json.dumps(block["input"])
+            pieces.append((index, block, [raw[i:i + piece] for i in range(0, len(raw), piece)] or [""]))
+        delay = self.llm_latency / max(sum(len(p[2]) for p in pieces), 1)
+
+        def chunk(event):
+            return {"chunk": {"bytes": json.dumps(event).encode("utf-8")}}
+
+        yield chunk({"type": "message_start", "message": {"id": message["id"], "role": "assistant", "content": []}})
+        for index, block, fragments in pieces:
+            start = {"type": block["type"], "text": ""} if block["type"] == "text" else {
+                "type": "tool_use", "id": block["id"], "name": block["name"], "input": {}}
+            yield chunk({"type": "content_block_start", "index": index, "content_block": start})
+            for fragment in fragments:
+                time.sleep(delay)
+                delta = {"type": "text_delta", "text": fragment} if block["type"] == "text" else {
+                    "type": "input_json_delta", "partial_json": fragment}
+                yield chunk({"type": "content_block_delta", "index": index, "delta": delta})
+            yield chunk({"type": "content_block_stop", "index": index})
+        yield chunk({"type": "message_delta", "delta": {"stop_reason": message["stop_reason"]}})
+        yield chunk({"type": "message_stop"})
+
+
+# --- Redis -----------------------------------------------------------------
+
+def _b(value) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode("utf-8")
+
+
+def _k(key) -> str:
+    return key.decode("utf-8") if isinstance(key, bytes) else key
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self._redis = redis
+        self._ops = []
+
+    def __getattr__(self, name):
+        method = getattr(self._redis, name)
+
+        def queued(*args, **kwargs):
+            self._ops.append((method, args, kwargs))
+            return self
+        return queued
+
+    def execute(self):
+        ops, self._ops = self._ops, []
+        return [method(*args, **kwargs) for method, args, kwargs in ops]
+
+
+class FakeSearchIndex:
+    """FT.SEARCH emulation for the KNN and VECTOR_RANGE queries this repo issues."""
+
+    KNN_RE = re.compile(r"KNN (\$?\w+) @(\w+) \$(\w+)")
+    RANGE_RE = re.compile(r"@(\w+):\[VECTOR_RANGE \$(\w+) \$(\w+)\]")
+
+    def __init__(self, redis, prefix: str):
+        self._redis = redis
+        self.prefix = prefix
+        self._built_version = None
+        self._index = SimilarityIndex()
+        self._docs = {}
+
+    def _refresh(self, field: str):
+        if self._built_version == self._redis.version:
+            return
+        ids, vectors, docs = [], [], {}
+        for key, fields in self._redis.hash_items(self.prefix):
+            embedding = fields.get(_b(field))
+            if not embedding:
+                continue
+            ids.append(key)
+            vectors.append(np.frombuffer(embedding, dtype=np.float32))
+            docs[key] = {k.decode("utf-8"): v.decode("utf-8", errors="ignore") for k, v in fields.items() if k != _b(field)}
+        self._index = SimilarityIndex(ids, np.vstack(vectors)) if vectors else SimilarityIndex()
+        self._docs = docs
+        self._built_version = self._redis.version
+
+    def search(self, query, query_params=None):
+        params = query_params or {}
+        text = query.query_string()
+        limit = query._num
+
+        knn = self.KNN_RE.search(text)
+        if knn:
+            k, field, vec = knn.groups()
+            top_k = int(params[k[1:]]) if k.startswith("$") else int(k)
+            threshold = None
+        else:
+            field, radius, vec = self.RANGE_RE.search(text).groups()
+            top_k = limit
+            threshold = 1.0 - float(params[radius])
+
+        with self._redis.lock:
+            self._refresh(field)
+            index, docs = self._index, self._docs
+        hits = index.search(np.frombuffer(params[vec], dtype=np.float32), top_k=min(top_k, limit), threshold=threshold)
+        result_docs = [
+            SimpleNamespace(id=hit["defect_id"], score=str(1.0 - hit["score"]), **docs[hit["defect_id"]])
+            for hit in hits
+        ]
+        return SimpleNamespace(total=len(result_docs), docs=result_docs)
+
+
+class FakeSearch:
+    def __init__(self, redis, index_name: str):
+        self._redis = redis
+        self._name = index_name
+
+    def info(self):
+        if self._name not in self._redis.indexes:
+            raise Exception("Unknown index name")
+        return {"index_name": self._name}
+
+    def create_index(self, fields, definition):
+        args = definition.args
+        prefix = args[args.index("PREFIX") + 2]
+        self._redis.indexes[self._name] = FakeSearchIndex(self._redis, prefix)
+
+    def dropindex(self, delete_documents=False):
+        self._redis.indexes.pop(self._name, None)
+
+    def search(self, query, query_params=None):
+        if self._name not in self._redis.indexes:
+            raise Exception("Unknown index name")
+        return self._redis.indexes[self._name].search(query, query_params)
+
+
+class FakeRedis:
+    """In-memory Redis with strings, hashes, SCAN, pipelines and a vector FT.SEARCH."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.strings = {}
+        self.hashes = {}
+        self.indexes = {}
+        self.version = 0
+
+    def _touch(self):
+        self.version += 1
+
+    def get(self, key):
+        key = _k(key)
+        with self.lock:
+            entry = self.strings.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self.strings[key]
+                return None
+            return value
+
+    def set(self, key, value, ex=None, px=None, nx=False):
+        key = _k(key)
+        with self.lock:
+            if nx and self.get(key) is not None:
+                return None
+            ttl = ex if ex is not None else (px / 1000 if px is not None else None)
+            self.strings[key] = (_b(value), time.monotonic() + ttl if ttl else None)
+            return True
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        key = _k(key)
+        with self.lock:
+            fields = self.hashes.setdefault(key, {})
+            items = dict(mapping or {})
+            if field is not None:
+                items[field] = value
+            for k, v in items.items():
+                fields[_b(k)] = _b(v)
+            self._touch()
+            return len(items)
+
+    def execute_command(self, command, *args):
+        if command.upper() != "HSET":
+            raise NotImplementedError(command)
+        key, rest = args[0], args[1:]
+        return self.hset(key, mapping=dict(zip(rest[0::2], rest[1::2])))
+
+    def hmget(self, key, *fields):
+        with self.lock:
+            stored = self.hashes.get(_k(key), {})
+            return [stored.get(_b(f)) for f in fields]
+
+    def hgetall(self, key):
+        with self.lock:
+            return dict(self.hashes.get(_k(key), {}))
+
+    def delete(self, *keys):
+        with self.lock:
+            removed = 0
+            for key in map(_k, keys):
+                removed += (self.hashes.pop(key, None) is not None) + (self.strings.pop(key, None) is not None)
+            self._touch()
+            return removed
+
+    def flushall(self):
+        with self.lock:
+            self.strings.clear()
+            self.hashes.clear()
+            self._touch()
+            return True
+
+    def scan_iter(self, match="*", count=None):
+        prefix = match.rstrip("*")
+        with self.lock:
+            keys = [k for k in list(self.hashes) + list(self.strings) if k.startswith(prefix)]
+        return iter([_b(k) for k in keys])
+
+    def hash_items(self, prefix: str):
+        return [(k, v) for k, v in self.hashes.items() if k.startswith(prefix)]
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+    def ft(self, index_name: str):
+        return FakeSearch(self, index_name)
+
+
+# --- Neo4j -----------------------------------------------------------------
+
+class FakeResult:
+    def __init__(self, rows=None):
+        self._rows = rows or []
+
+    def __iter__(self):
+        return iter([FakeRecord(row) for row in self._rows])
+
+    def data(self):
+        return [dict(row) for row in self._rows]
+
+    def single(self):
+        return FakeRecord(self._rows[0]) if self._rows else None
+
+    def consume(self):
+        return None
+
+
+class FakeRecord(dict):
+    def data(self):
+        return dict(self)
+
+
+class FakeGraph:
+    """Neo4j stub dispatching on the Cypher text of the queries in utils/neo4j_utils.py."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.defects = {}
+        self.tags = {}
+        self.comments = {}
+        self.links = {}
+
+    def _record(self, defect_id: str) -> dict:
+        defect = self.defects[defect_id]
+        return {
+            **defect,
+            "tags": list(self.tags.get(defect_id, [])),
+            "comments": [
+                {"commenter": c.get("author"), "comment_text": c.get("text"), "comment_date": c.get("commented_on")}
+                for c in self.comments.get(defect_id, {}).values()
+            ],
+            "linked_defects": list(self.links.get(defect_id, [])),
+        }
+
+    def _after(self, after):
+        return sorted(i for i in self.defects if after is None or i > after)
+
+    def run(self, query: str, **params) -> FakeResult:
+        with self.lock:
+            return FakeResult(self._dispatch(query, params))
+
+    def _dispatch(self, query: str, params: dict):
+        if "CONSTRAINT" in query or "c.comment_id IS NULL" in query:
+            return []
+        if "UNWIND $defects AS defect" in query:
+            for row in params["defects"]:
+                self.defects.setdefault(row["defect_id"], {}).update(row)
+            return []
+        if "MERGE (t:Tag" in query:
+            for row in params["rows"]:
+                tags = self.tags.setdefault(row["defect_id"], [])
+                if row["tag"] not in tags:
+                    tags.append(row["tag"])
+            return []
+        if "MERGE (c:Comment" in query:
+            for row in params["rows"]:
+                self.comments.setdefault(row["defect_id"], {})[row["comment_id"]] = row
+            return []
+        if "UNWIND $links" in query:
+            for row in params["links"]:
+                if row["defect_id"] in self.defects and row["linked_id"] in self.defects:
+                    self.links.setdefault(row["defect_id"], set()).add(row["linked_id"])
+            return []
+        if "DETACH DELETE d RETURN count" in query:
+            doomed = list(self.defects)[:params["limit"]]
+            for defect_id in doomed:
+                for store in (self.defects, self.tags, self.comments, self.links):
+                    store.pop(defect_id, None)
+            return [{"deleted": len(doomed)}]
+        if "count(d) AS total" in query:
+            return [{"total": len(self._after(params.get("after")))}]
+        if "UNWIND range(0, size($ids)" in query:
+            return [
+                {"idx": i, **{k: v for k, v in self._record(defect_id).items() if k not in ("linked_defects",)}}
+                for i, defect_id in enumerate(params["ids"]) if defect_id in self.defects
+            ]
+        if "RETURN d.defect_id AS defect_id, d.updated_date AS updated_date" in query:
+            ids = self._after(params.get("after"))[:params["limit"]]
+            return [{"defect_id": i, "updated_date": self.defects[i].get("updated_date")} for i in ids]
+        if "ORDER BY d.defect_id" in query and "LIMIT $limit" in query:
+            return [self._record(i) for i in self._after(params.get("after"))[:params["limit"]]]
+        if query.strip().startswith("MATCH (d:Defect)") and "RETURN" in query:
+            return [self._record(i) for i in sorted(self.defects)]
+        raise NotImplementedError(f"FakeGraph does not understand query:\n{query}")
+
+
+class FakeSession:
+    def __init__(self, graph: FakeGraph, driver=None):
+        self._graph = graph
+        self._driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, **params):
+        return self._graph.run(query, **params)
+
+    def execute_read(self, fn, *args, **kwargs):
+        if self._driver is not None:
+            self._driver.count_read()
+        return fn(self, *args, **kwargs)
+
+    def execute_write(self, fn, *args, **kwargs):
+        return fn(self, *args, **kwargs)
+
+    def close(self):
+        pass
+
+
+class FakeNeo4jDriver:
+    def __init__(self, graph: FakeGraph = None, latency_ms: float = 0):
+        self.graph = graph or FakeGraph()
+        self.latency = latency_ms / 1000
+        self.reads = 0
+        self._lock = threading.Lock()
+
+    def count_read(self):
+        with self._lock:
+            self.reads += 1
+
+    def session(self, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        return FakeSession(self.graph, self)
+
+    def close(self):
+        pass
+
+
+# --- Jira ------------------------------------------------------------------
+
+class MockJiraServer:
+    """Threaded HTTP server answering POST /rest/api/3/issue with 201 and an issue key."""
+
+    def __init__(self, latency_ms: float = 10):
+        latency = latency_ms / 1000
+        counter = {"issues": 0}
+        lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                time.sleep(latency)
+                with lock:
+                    counter["issues"] += 1
+                    key = f"BENCH-{counter['issues']}"
+                body = json.dumps({"key": key}).encode("utf-8")
+                self.send_response(201)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.counter = counter
+        class Server(ThreadingHTTPServer):
+            # The default backlog of 5 drops connections under bursts, adding 1s SYN retries
+            request_queue_size = 128
+
+        self._server = Server(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-jira", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
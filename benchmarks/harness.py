@@ -0,0 +1,254 @@
+# Wires the fakes into the real modules and measures latency/throughput.
+import contextlib
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.fakes import FakeBedrock, FakeGraph, FakeNeo4jDriver, FakeRedis, MockJiraServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFECTS_FILE = os.path.join(REPO_ROOT, "data", "insurance_defects_detailed.json")
+
+# Everything the request path and the loaders import, so their
+# ``from x import y`` bindings exist before they are patched
+BENCHMARKED_MODULES = [
+    "config.settings",
+    "config.bedrock_client",
+    "config.redis_conn",
+    "config.neo4j_conn",
+    "config.jira_conn",
+    "utils.embedding_service",
+    "utils.bedrock_utils",
+    "utils.semantic_utils",
+    "utils.redis_index_util",
+    "utils.jira_utils",
+    "mcp_workflow.load_defect_embeddings",
+    "mcp_llm_handler",
+    "mcp_llm_api",
+]
+
+
+def load_neo4j_loader():
+    # The repo's neo4j/ folder is shadowed by the neo4j driver package, so load it by path
+    module = sys.modules.get("load_defects")
+    if module is None:
+        spec = importlib.util.spec_from_file_location("load_defects", os.path.join(REPO_ROOT, "neo4j", "load_defects.py"))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["load_defects"] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+def patch_everywhere(original, replacement) -> list:
+    """
+    Rebind every module-level reference to ``original`` in the repo's loaded
+    modules. Returns the patches so they can be undone.
+    """
+    patched = []
+    for module in list(sys.modules.values()):
+        path = getattr(module, "__file__", None) or ""
+        if not path.startswith(REPO_ROOT) or "benchmarks" in path:
+            continue
+        for name, value in list(vars(module).items()):
+            if value is original:
+                setattr(module, name, replacement)
+                patched.append((module, name, original))
+    return patched
+
+
+class OfflineEnvironment:
+    """
+    Context manager that points Bedrock, Redis, Neo4j and Jira at local fakes
+    for the duration of a benchmark and restores everything afterwards.
+    """
+
+    def __init__(self, embed_latency_ms=5, llm_latency_ms=50, jira_latency_ms=10, neo4j_latency_ms=1):
+        self.bedrock = FakeBedrock(embed_latency_ms, llm_latency_ms)
+        self.redis = FakeRedis()
+        self.graph = FakeGraph()
+        self.driver = FakeNeo4jDriver(self.graph, neo4j_latency_ms)
+        self.jira = MockJiraServer(jira_latency_ms)
+        self._patches = []
+
+    def __enter__(self):
+        for name in BENCHMARKED_MODULES:
+            importlib.import_module(name)
+        load_neo4j_loader()
+
+        import config.bedrock_client as bedrock_client
+        import config.jira_conn as jira_conn
+        import config.neo4j_conn as neo4j_conn
+        import config.redis_conn as redis_conn
+        import config.settings as settings
+
+        self.jira.start()
+        secret = {
+            "JIRA_BASE_URL": self.jira.base_url,
+            "JIRA_EMAIL": "bench@example.com",
+            "JIRA_API_TOKEN": "bench",
+            "JIRA_PROJECT_KEY": "BENCH",
+        }
+        jira_conn.close_jira_session()
+
+        replacements = [
+            (settings.get_shared_secret, lambda: secret),
+            (bedrock_client.get_bedrock_client, lambda region=None: self.bedrock),
+            (redis_conn.get_redis_client, lambda: self.redis),
+            (neo4j_conn.get_neo4j_driver, lambda: self.driver),
+            (neo4j_conn.close_neo4j_driver, lambda: None),
+        ]
+        for original, replacement in replacements:
+            self._patches += patch_everywhere(original, replacement)
+        reset_caches()
+        return self
+
+    def __exit__(self, *exc):
+        for module, name, original in reversed(self._patches):
+            setattr(module, name, original)
+        self._patches = []
+        import config.jira_conn as jira_conn
+        jira_conn.close_jira_session()
+        self.jira.stop()
+        reset_caches()
+        return False
+
+    @contextlib.contextmanager
+    def no_latency(self):
+        """Seed data without paying the simulated Bedrock latency."""
+        saved = (self.bedrock.embed_latency, self.bedrock.llm_latency)
+        self.bedrock.embed_latency = self.bedrock.llm_latency = 0
+        try:
+            yield
+        finally:
+            self.bedrock.embed_latency, self.bedrock.llm_latency = saved
+
+    def seed_manifests(self):
+        from mcp_registry import get_manifest_registry
+        from mcp_workflow.load_defect_embeddings import get_embeddings, manifest_to_text
+        from utils.redis_index_util import INDEX_CONFIGS, create_vector_index
+        from utils.redis_utils import upsert_embeddings_batch
+
+        with self.no_latency():
+            items = [
+                (step, get_embeddings(manifest_to_text(manifest)), {"manifest_id": step, "description": manifest.get("intent", "")})
+                for step, manifest in get_manifest_registry().manifests.items()
+            ]
+        upsert_embeddings_batch(self.redis, items, INDEX_CONFIGS["manifest_embeddings_index"]["prefix"])
+        create_vector_index("manifest_embeddings_index", expected_size=len(items))
+
+    def seed_defects(self, defects: list[dict]):
+        from mcp_workflow.load_defect_embeddings import load_embeddings_to_redis_defect
+        from utils.neo4j_utils import insert_defects_batch
+
+        with self.driver.session() as session:
+            for start in range(0, len(defects), 1000):
+                session.execute_write(insert_defects_batch, defects[start:start + 1000])
+        with self.no_latency():
+            load_embeddings_to_redis_defect("defect_embeddings_index", workers=8, rate_per_sec=0, batch_size=500, resume=False)
+
+
+def reset_caches():
+    from utils import semantic_utils
+    from utils.embedding_service import clear_embedding_lru
+
+    clear_embedding_lru()
+    semantic_utils._defect_records.invalidate()
+    semantic_utils._fallback_indexes.invalidate()
+
+
+def synthetic_defects(count: int) -> list[dict]:
+    """``count`` loader-format defects built by cycling the bundled dataset."""
+    loader = load_neo4j_loader()
+    base = list(loader.iter_defects(DEFECTS_FILE))
+    defects = []
+    for n in range(count):
+        defect = dict(base[n % len(base)])
+        defect["defect_id"] = f"{defect['defect_id']}-{n:06d}"
+        # Distinct text per copy, or the embedding caches would absorb most of the load
+        defect["title"] = f"{defect['title']} (batch {n // len(base)})"
+        defect["linked_defects"] = []
+        defects.append(defect)
+    return defects
+
+
+def write_defects_file(count: int) -> str:
+    """Write ``count`` synthetic defects in the raw JSON layout the Neo4j loader reads."""
+    with open(DEFECTS_FILE, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    handle = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8")
+    with handle:
+        handle.write("[")
+        for n in range(count):
+            raw = dict(base[n % len(base)])
+            raw["id"] = f"{raw['id']}-{n:06d}"
+            handle.write(("," if n else "") + json.dumps(raw))
+        handle.write("]")
+    return handle.name
+
+
+@contextlib.contextmanager
+def quiet(enabled: bool = True):
+    # The pipeline prints progress for every call; keep it out of the timings output
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def percentiles(latencies: list[float]) -> dict:
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    values = np.asarray(latencies) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+    }
+
+
+def run_concurrent(fn, inputs: list, concurrency: int) -> dict:
+    """Call ``fn(item)`` for every input on ``concurrency`` threads and time each call."""
+    def timed(item):
+        started = time.perf_counter()
+        fn(item)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, inputs))
+    wall = time.perf_counter() - started
+    return {
+        "requests": len(inputs),
+        "throughput_per_sec": round(len(inputs) / wall, 2) if wall else None,
+        "wall_ms": round(wall * 1000, 2),
+        **percentiles(latencies),
+    }
+
+
+def run_once(fn, items: int, repeat: int = 3, setup=None) -> dict:
+    """
+    Time a bulk operation that processes ``items`` records, keeping the best of
+    ``repeat`` runs. ``setup`` runs untimed before each one.
+    """
+    wall = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        wall = elapsed if wall is None else min(wall, elapsed)
+    return {
+        "requests": items,
+        "throughput_per_sec": round(items / wall, 2) if wall else None,
+        "wall_ms": round(wall * 1000, 2),
+        **percentiles([]),
+    }
@@ -0,0 +1,234 @@
+"""
+Offline end-to-end benchmarks for the MCP pipeline, defect search and the
+two loaders. Every external service is replaced by a local fake (see
+benchmarks/fakes.py), so this runs on a laptop without AWS, Redis, Neo4j
+or Jira.
+
+    python -m benchmarks.run_benchmarks                  # compare with baselines
+    python -m benchmarks.run_benchmarks --quick          # smaller datasets
+    python -m benchmarks.run_benchmarks --save-baselines # record new baselines
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+
+from benchmarks.harness import (
+    OfflineEnvironment,
+    load_neo4j_loader,
+    quiet,
+    reset_caches,
+    run_concurrent,
+    run_once,
+    synthetic_defects,
+    write_defects_file,
+)
+
+BASELINES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+COMMENT_TEMPLATES = [
+    "Create defect with title: Premium mismatch {n}; description: Renewal premium differs from quote {n}; created_by: alice",
+    "Please assign defect_id: DEF-{n}; engineer_name: bob",
+    "Add comment on defect_id: DEF-{n}; comment_text: Reproduced on build {n}; commenter_name: carol",
+    "Create defect with title: Claim stuck {n}; description: Claim {n} stays in pending; created_by: dave; then assign defect_id: DEF-{n}; engineer_name: erin",
+]
+
+# name -> (default dataset sizes, default concurrency levels)
+SCENARIOS = {
+    "pipeline": ([100], [1, 4, 16]),
+    "pipeline_warm": ([100], [1, 4, 16]),
+    "pipeline_storm": ([100], [16]),
+    "search": ([1000, 10000], [1, 8]),
+    "embedding_loader": ([500, 2000], [4, 16]),
+    "neo4j_loader": ([1000, 10000], [1]),
+}
+
+
+def _comments(size: int, unique: bool) -> list[str]:
+    return [
+        COMMENT_TEMPLATES[n % len(COMMENT_TEMPLATES)].format(n=n if unique else n % len(COMMENT_TEMPLATES))
+        for n in range(size)
+    ]
+
+
+def bench_pipeline(env, size, concurrency, warm=False, storm=False):
+    from mcp_llm_api import process_user_comment
+
+    env.seed_manifests()
+    errors = []
+
+    def call(comment):
+        result = process_user_comment(comment, confirmation="YES")
+        if result.get("status") != "success":
+            errors.append(result)
+
+    # A storm is many users pasting the same text at once, on cold caches
+    comments = _comments(1, unique=True) * size if storm else _comments(size, unique=not warm)
+    if warm:
+        # Prime the caches so the run measures the cached path
+        for comment in set(comments):
+            process_user_comment(comment, confirmation="YES")
+    result = run_concurrent(call, comments, concurrency)
+    result["errors"] = len(errors)
+    result["bedrock_calls"] = sum(env.bedrock.calls.values())
+    return result
+
+
+def bench_search(env, size, concurrency):
+    from utils.semantic_utils import search_similar_defects
+
+    defects = synthetic_defects(size)
+    env.seed_defects(defects)
+    queries = [defect["title"] for defect in defects[:200]]
+    # The first query builds the index; keep that one-off cost out of the percentiles
+    search_similar_defects(queries[0], top_k=3, threshold=0.5)
+    return run_concurrent(lambda q: search_similar_defects(q, top_k=3, threshold=0.5), queries, concurrency)
+
+
+def bench_embedding_loader(env, size, concurrency):
+    from mcp_workflow.load_defect_embeddings import load_embeddings_to_redis_defect
+    from utils.neo4j_utils import insert_defects_batch
+
+    defects = synthetic_defects(size)
+    with env.driver.session() as session:
+        for start in range(0, size, 1000):
+            session.execute_write(insert_defects_batch, defects[start:start + 1000])
+
+    def fresh_start():
+        # Otherwise later repeats are served from the embedding caches
+        env.redis.flushall()
+        reset_caches()
+
+    return run_once(
+        lambda: load_embeddings_to_redis_defect("defect_embeddings_index", workers=concurrency, rate_per_sec=0, resume=False),
+        size,
+        setup=fresh_start
+    )
+
+
+def bench_neo4j_loader(env, size, concurrency):
+    loader = load_neo4j_loader()
+    path = write_defects_file(size)
+    try:
+        return run_once(lambda: loader.load_all_defects(path, batch_size=1000), size)
+    finally:
+        os.remove(path)
+
+
+BENCHMARKS = {
+    "pipeline": bench_pipeline,
+    "pipeline_warm": lambda env, size, concurrency: bench_pipeline(env, size, concurrency, warm=True),
+    "pipeline_storm": lambda env, size, concurrency: bench_pipeline(env, size, concurrency, storm=True),
+    "search": bench_search,
+    "embedding_loader": bench_embedding_loader,
+    "neo4j_loader": bench_neo4j_loader,
+}
+
+
+def run_all(args) -> dict:
+    results = {}
+    for name in args.scenarios:
+        sizes, levels = SCENARIOS[name]
+        for size in sizes:
+            size = max(size // 10, 10) if args.quick else size
+            for concurrency in levels:
+                env = OfflineEnvironment(args.embed_latency_ms, args.llm_latency_ms, args.jira_latency_ms, args.neo4j_latency_ms)
+                with env, quiet(not args.verbose):
+                    result = BENCHMARKS[name](env, size, concurrency)
+                    reset_caches()
+                key = f"{name}|size={size}|c={concurrency}"
+                results[key] = result
+                print(f"⏱️  {key}: {result['throughput_per_sec']}/s p95={result['p95_ms']}ms")
+    return results
+
+
+def _settings(args) -> dict:
+    return {
+        "embed_latency_ms": args.embed_latency_ms,
+        "llm_latency_ms": args.llm_latency_ms,
+        "jira_latency_ms": args.jira_latency_ms,
+        "neo4j_latency_ms": args.neo4j_latency_ms,
+    }
+
+
+def compare(results: dict, baselines: dict, tolerance: float, p95_slack_ms: float = 5.0) -> list[str]:
+    """
+    Return a description of every result that regressed beyond ``tolerance``.
+    A p95 may also grow by ``p95_slack_ms`` so scheduler jitter on
+    few-millisecond scenarios does not fail the gate.
+    """
+    regressions = []
+    for key, result in results.items():
+        baseline = baselines.get(key)
+        if not baseline:
+            continue
+        if result.get("errors"):
+            regressions.append(f"{key}: {result['errors']} failed requests")
+        base_p95 = baseline.get("p95_ms")
+        if base_p95 and result.get("p95_ms") and result["p95_ms"] > max(base_p95 * (1 + tolerance), base_p95 + p95_slack_ms):
+            regressions.append(f"{key}: p95 {result['p95_ms']}ms vs baseline {base_p95}ms")
+        if baseline.get("throughput_per_sec") and result["throughput_per_sec"] < baseline["throughput_per_sec"] * (1 - tolerance):
+            regressions.append(f"{key}: throughput {result['throughput_per_sec']}/s vs baseline {baseline['throughput_per_sec']}/s")
+    return regressions
+
+
+def print_table(results: dict, baselines: dict):
+    header = f"{'benchmark':<40} {'req':>6} {'thr/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'base p95':>9} {'base thr':>9}"
+    print("\n" + header)
+    print("-" * len(header))
+    fmt = lambda v: "-" if v is None else f"{v:.1f}"
+    for key, r in results.items():
+        base = baselines.get(key, {})
+        print(
+            f"{key:<40} {r['requests']:>6} {fmt(r['throughput_per_sec']):>9} {fmt(r['p50_ms']):>9} "
+            f"{fmt(r['p95_ms']):>9} {fmt(r['p99_ms']):>9} {fmt(base.get('p95_ms')):>9} {fmt(base.get('throughput_per_sec')):>9}"
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline MCP benchmarks against local fakes")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--quick", action="store_true", help="Run with a tenth of the dataset sizes")
+    parser.add_argument("--embed-latency-ms", type=float, default=5)
+    parser.add_argument("--llm-latency-ms", type=float, default=50)
+    parser.add_argument("--jira-latency-ms", type=float, default=10)
+    parser.add_argument("--neo4j-latency-ms", type=float, default=1)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative regression before failing")
+    parser.add_argument("--p95-slack-ms", type=float, default=5, help="Allowed absolute p95 growth before failing")
+    parser.add_argument("--save-baselines", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="Keep the pipeline's own output")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    stored = {}
+    if os.path.exists(BASELINES_FILE):
+        with open(BASELINES_FILE, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+
+    results = run_all(args)
+    baselines = stored.get("results", {}) if stored.get("settings") == _settings(args) else {}
+    if stored and not baselines:
+        print("⚠️ Baselines were recorded with different fake latencies; skipping comparison")
+    print_table(results, baselines)
+
+    if args.save_baselines:
+        merged = {**baselines, **results}
+        with open(BASELINES_FILE, "w", encoding="utf-8") as f:
+            json.dump({"settings": _settings(args), "results": merged}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\n💾 Saved {len(results)} baselines to {BASELINES_FILE}")
+        return 0
+
+    regressions = compare(results, baselines, args.tolerance, args.p95_slack_ms)
+    if regressions:
+        print("\n❌ Regressions:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,45 @@
+import threading
 import boto3
-import yaml
+from botocore.config import Config
+from config.settings import load_app_config
+from utils.metrics import instrument_bedrock_client
+from utils.tracing import span
 
-def load_app_config(path="config/config.yml"):
-    with open(path, "r") as f:
-        return yaml.safe_load(f)
+_clients = {}
+_clients_lock = threading.Lock()
 
-def get_bedrock_client():
-    config = load_app_config()
-    region = config["defaults"]["region"]
-
-    return boto3.client(
-        service_name="bedrock-runtime",
-        region_name=region
+def _build_client(region: str, defaults: dict):
+    timeout = defaults.get("bedrock_timeout_sec", 10)
+    client_config = Config(
+        region_name=region,
+        max_pool_connections=defaults.get("bedrock_max_pool_connections", 50),
+        connect_timeout=defaults.get("bedrock_connect_timeout_sec", min(timeout, 5)),
+        read_timeout=timeout,
+        retries={
+            "mode": "adaptive",
+            "max_attempts": defaults.get("bedrock_retry", 3)
+        }
     )
+    client = boto3.client(service_name="bedrock-runtime", config=client_config)
+    return instrument_bedrock_client(client)
+
+def get_bedrock_client(region: str = None):
+    """
+    Return the shared bedrock-runtime client for ``region`` (config default if None).
+    boto3 clients are thread-safe, so one instance serves every request.
+    """
+    defaults = load_app_config()["defaults"]
+    region = region or defaults["region"]
+
+    client = _clients.get(region)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(region)
+            if client is None:
+                with span("bedrock_client_build", region=region):
+                    client = _build_client(region, defaults)
+                _clients[region] = client
+    return client
 
 def get_bedrock_models():
     config = load_app_config()
@@ -1,18 +1,18 @@
-import yaml
-from utils.aws_secrets import get_aws_secret
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config.settings import get_defaults, get_shared_secret
+from utils.tracing import span
 from requests.auth import HTTPBasicAuth
 
-def load_app_config(path="config/config.yml"):
-    with open(path, "r") as f:
-        return yaml.safe_load(f)
+_session = None
+_session_creds = None
+_session_lock = threading.Lock()
 
 def connect_jira():
 
-    config = load_app_config()
-    secret_name = config["defaults"]["shared_secret"]
-    region = config["defaults"]["region"]
-
-    creds = get_aws_secret(secret_name, region)
+    creds = get_shared_secret()
 
     base_url = creds["JIRA_BASE_URL"]
     auth = HTTPBasicAuth(creds["JIRA_EMAIL"], creds["JIRA_API_TOKEN"])
@@ -30,3 +30,78 @@ def connect_jira():
         "email": creds["JIRA_EMAIL"],
         "api_token": creds["JIRA_API_TOKEN"]
     }
+
+def get_jira_timeout() -> tuple:
+    jira_config = get_defaults().get("jira", {})
+    return (
+        jira_config.get("connect_timeout_sec", 5),
+        jira_config.get("read_timeout_sec", 15)
+    )
+
+class JiraRetry(Retry):
+    """
+    Retry policy for the Jira session. POST creates issues and is not
+    idempotent, so it is only resent when Jira cannot have acted on it:
+    connection errors, and 429/503 responses that carry Retry-After.
+    """
+
+    POST_RETRY_STATUSES = frozenset({429, 503})
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if method and method.upper() == "POST":
+            return bool(self.total and has_retry_after and status_code in self.POST_RETRY_STATUSES)
+        return super().is_retry(method, status_code, has_retry_after)
+
+def _build_session(jira: dict) -> requests.Session:
+    jira_config = get_defaults().get("jira", {})
+
+    retry = JiraRetry(
+        total=jira_config.get("max_retries", 3),
+        backoff_factor=jira_config.get("backoff_factor", 0.5),
+        # 500 is left out: Jira may already have created the issue.
+        # POST is not listed, so a POST read timeout is never resent
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "PUT"}),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=jira_config.get("pool_maxsize", 10),
+        max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.auth = jira["auth"]
+    session.headers.update(jira["headers"])
+    return session
+
+def get_jira_session():
+    """
+    Return the shared keep-alive Jira session together with its connection details.
+    The session is rebuilt only when the Jira credentials change.
+    """
+    global _session, _session_creds
+
+    jira = connect_jira()
+    creds_key = (jira["base_url"], jira["email"], jira["api_token"])
+
+    if _session is None or _session_creds != creds_key:
+        with _session_lock:
+            if _session is None or _session_creds != creds_key:
+                if _session is not None:
+                    _session.close()
+                with span("jira_session_build"):
+                    _session = _build_session(jira)
+                _session_creds = creds_key
+    return _session, jira
+
+def close_jira_session():
+    global _session, _session_creds
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+            _session_creds = None
@@ -1,18 +1,63 @@
-import yaml
+import threading
 from neo4j import GraphDatabase
-from utils.aws_secrets import get_aws_secret
+from config.settings import get_defaults, get_shared_secret
+from utils.tracing import span
 
-def load_app_config(path="config/config.yml"):
-    with open(path, "r") as f:
-        return yaml.safe_load(f)
+_driver = None
+_driver_lock = threading.Lock()
 
-def get_neo4j_driver():
-    config = load_app_config()
-    secret_name = config["defaults"]["shared_secret"]
-    region = config["defaults"]["region"]
-    creds = get_aws_secret(secret_name, region)
+def _build_driver():
+    creds = get_shared_secret()
+    neo4j_config = get_defaults().get("neo4j", {})
 
     return GraphDatabase.driver(
         creds["NEO4J_URI"],
-        auth=(creds["NEO4J_USER"], creds["NEO4J_PASSWORD"])
+        auth=(creds["NEO4J_USER"], creds["NEO4J_PASSWORD"]),
+        max_connection_pool_size=neo4j_config.get("max_connection_pool_size", 50),
+        connection_acquisition_timeout=neo4j_config.get("connection_acquisition_timeout_sec", 30),
+        max_connection_lifetime=neo4j_config.get("max_connection_lifetime_sec", 3600),
+        connection_timeout=neo4j_config.get("connection_timeout_sec", 15)
     )
+
+def get_neo4j_driver():
+    """
+    Return the process-wide Neo4j driver. The driver owns the connection pool,
+    so callers open sessions on it but must not close it themselves.
+    """
+    global _driver
+    if _driver is None:
+        with _driver_lock:
+            if _driver is None:
+                with span("neo4j_driver_build"):
+                    _driver = _build_driver()
+                print("✅ Neo4j driver created")
+    return _driver
+
+def close_neo4j_driver():
+    global _driver
+    with _driver_lock:
+        if _driver is not None:
+            _driver.close()
+            _driver = None
+            print("🔌 Neo4j driver closed")
+
+def get_neo4j_pool_stats() -> dict:
+    """
+    Report connection pool utilisation per server address.
+    """
+    if _driver is None:
+        return {"driver": "not_created", "addresses": {}}
+
+    pool = _driver._pool
+    max_size = pool.pool_config.max_connection_pool_size
+    addresses = {}
+    with pool.lock:
+        for address, connections in pool.connections.items():
+            in_use = sum(1 for c in connections if c.in_use)
+            addresses[str(address)] = {
+                "in_use": in_use,
+                "idle": len(connections) - in_use,
+                "max_size": max_size,
+                "utilisation": round(in_use / max_size, 4) if max_size else 0.0,
+            }
+    return {"driver": "open", "addresses": addresses}
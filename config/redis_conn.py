@@ -1,22 +1,50 @@
-import yaml
+import threading
 import redis
-from utils.aws_secrets import get_aws_secret
+from config.settings import get_defaults, get_shared_secret
+from utils.tracing import span
 
-def load_app_config(path="config/config.yml"):
-    with open(path, "r") as f:
-        return yaml.safe_load(f)
+_pool = None
+_pool_lock = threading.Lock()
 
-def get_redis_client():
-    config = load_app_config()
-    secret_name = config["defaults"]["shared_secret"]
-    region = config["defaults"]["region"]
-    secret = get_aws_secret(secret_name, region)
-    
+def _build_pool():
+    secret = get_shared_secret()
+    redis_config = get_defaults().get("redis", {})
 
-    return redis.Redis(
+    return redis.ConnectionPool(
         host=secret["REDIS_HOST"],
         port=int(secret.get("REDIS_PORT", 6379)),
         username=secret.get("REDIS_USER", "default"),
         password=secret["REDIS_PASS"],
-        decode_responses=False
+        decode_responses=False,
+        max_connections=redis_config.get("max_connections", 50),
+        socket_timeout=redis_config.get("socket_timeout_sec", 5),
+        socket_connect_timeout=redis_config.get("socket_connect_timeout_sec", 5),
+        socket_keepalive=True,
+        health_check_interval=redis_config.get("health_check_interval_sec", 30),
+        retry_on_timeout=True
     )
+
+def get_redis_pool():
+    """
+    Return the process-wide Redis connection pool, creating it on first use.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                with span("redis_pool_build"):
+                    _pool = _build_pool()
+                print("✅ Redis connection pool created")
+    return _pool
+
+def get_redis_client():
+    # Cheap wrapper: connections are borrowed from the shared pool per command
+    return redis.Redis(connection_pool=get_redis_pool())
+
+def close_redis_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.disconnect()
+            _pool = None
+            print("🔌 Redis connection pool closed")
@@ -0,0 +1,108 @@
+import threading
+import yaml
+
+from utils.aws_secrets import get_aws_secret
+from utils.cache_utils import TTLCache
+from utils.tracing import span
+
+CONFIG_PATH = "config/config.yml"
+DEFAULT_CACHE_TTL_SEC = 300
+
+# One cache for the whole process: parsed YAML and Secrets Manager payloads
+_settings_cache = TTLCache(ttl_sec=DEFAULT_CACHE_TTL_SEC)
+
+_refresh_thread = None
+_refresh_stop = threading.Event()
+
+
+def _read_config_file(path: str) -> dict:
+    with span("config_load", path=path), open(path, "r") as f:
+        config = yaml.safe_load(f)
+
+    ttl = config.get("defaults", {}).get("config_cache_ttl_sec")
+    if ttl:
+        _settings_cache.ttl_sec = float(ttl)
+    return config
+
+
+def load_app_config(path: str = CONFIG_PATH) -> dict:
+    """
+    Return the parsed app config. The file is read once and then served from
+    memory until ``config_cache_ttl_sec`` expires or the background refresh reloads it.
+    """
+    return _settings_cache.get_or_load(("config", path), lambda: _read_config_file(path))
+
+
+def get_defaults() -> dict:
+    return load_app_config()["defaults"]
+
+
+def _load_secret(secret_name: str, region: str) -> dict:
+    with span("secret_load", secret=secret_name):
+        return get_aws_secret(secret_name, region)
+
+
+def get_secret(secret_name: str, region: str) -> dict:
+    """
+    Return a Secrets Manager JSON secret from the in-process cache.
+    """
+    return _settings_cache.get_or_load(
+        ("secret", secret_name, region),
+        lambda: _load_secret(secret_name, region)
+    )
+
+
+def get_shared_secret() -> dict:
+    """
+    Return the shared application secret (Redis, Neo4j and Jira credentials).
+    """
+    defaults = get_defaults()
+    return get_secret(defaults["shared_secret"], defaults["region"])
+
+
+def get_settings_cache_stats() -> dict:
+    return _settings_cache.stats()
+
+
+def clear_settings_cache():
+    _settings_cache.invalidate()
+
+
+def _refresh_loop(interval_sec: float):
+    while not _refresh_stop.wait(interval_sec):
+        _settings_cache.refresh_all()
+
+
+def start_background_refresh(interval_sec: float = None):
+    """
+    Warm the config and shared secret, then keep them fresh from a daemon
+    thread so requests never pay for a reload when an entry expires.
+    """
+    global _refresh_thread
+
+    get_shared_secret()
+    if _refresh_thread and _refresh_thread.is_alive():
+        return
+
+    if interval_sec is None:
+        # Refresh comfortably before the TTL runs out
+        interval_sec = max(_settings_cache.ttl_sec * 0.8, 1.0)
+
+    _refresh_stop.clear()
+    _refresh_thread = threading.Thread(
+        target=_refresh_loop,
+        args=(interval_sec,),
+        name="settings-refresh",
+        daemon=True
+    )
+    _refresh_thread.start()
+    print(f"🔄 Settings refresh started (every {interval_sec:.0f}s)")
+
+
+def stop_background_refresh():
+    global _refresh_thread
+
+    _refresh_stop.set()
+    if _refresh_thread:
+        _refresh_thread.join(timeout=5)
+        _refresh_thread = None
@@ -1,6 +1,4 @@
-import json
-import requests
-from config.jira_conn import connect_jira
+from utils.jira_utils import create_jira_issue
 
 def raise_defect_api(context):
 
@@ -33,45 +31,3 @@ def update_status_api(context):
     print(f"[UPDATE STATUS] Commenting defect : {context}")
     return {"status": "success", "new_status": context['new_status']}
 
-
-
-
-
-
-def create_jira_issue(summary: str, description: str):
-    jira = connect_jira()
-
-    url = f"{jira['base_url']}/rest/api/3/issue"
-    payload = {
-        "fields": {
-            "project": {"key": jira["project_key"]},
-            "summary": summary,
-            "description": {
-                "type": "doc",
-                "version": 1,
-                "content": [
-                    {
-                        "type": "paragraph",
-                        "content": [{"type": "text", "text": description}]
-                    }
-                ]
-            },
-            "issuetype": {"name": "Bug"}
-        }
-    }
-
-    response = requests.post(
-        url,
-        headers=jira["headers"],
-        auth=jira["auth"],
-        data=json.dumps(payload)
-    )
-
-    if response.status_code == 201:
-        issue_key = response.json()["key"]
-        print("✅ Jira issue created:", issue_key)
-        return issue_key
-    else:
-        print("❌ Failed to create issue:", response.status_code)
-        print(response.text)
-        return None
\ No newline at end of file
@@ -1,24 +1,21 @@
-import os
-import yaml
-from jinja2 import Template
 import json
+from mcp_registry import get_manifest_registry
 from utils.bedrock_utils import call_llm
 
 class MCPWorkflow:
     def __init__(self, manifests_dir="mcp_manifests"):
         self.manifests_dir = manifests_dir
-        self.manifests = {}
-        self.load_manifests()
+        # Manifests and compiled templates are shared by every workflow instance
+        self.registry = get_manifest_registry(manifests_dir)
         self.context = {}
         self.current_step = None
 
+    @property
+    def manifests(self):
+        return self.registry.manifests
+
     def load_manifests(self):
-        for file in os.listdir(self.manifests_dir):
-            if file.endswith(".mcp.yml"):
-                path = os.path.join(self.manifests_dir, file)
-                with open(path, "r", encoding="utf-8") as f:
-                    manifest = yaml.safe_load(f)
-                    self.manifests[manifest["step"]] = manifest
+        self.registry.refresh(force=True)
 
     def start(self, step_name="create_defect", initial_context=None):
         self.current_step = step_name
@@ -33,8 +30,7 @@ class MCPWorkflow:
         if not manifest:
             raise ValueError(f"Step {self.current_step} not found in manifests")
 
-        template_str = manifest["llm_prompt_template"]
-        template = Template(template_str)
+        template = self.registry.get_template(self.current_step)
         prompt = template.render(context=self.context, allowed_next_steps=manifest.get("allowed_next_steps", []))
         return prompt
 
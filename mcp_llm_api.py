@@ -1,26 +1,77 @@
 # mcp_llm_api.py
 import json
-from mcp_workflow.load_defect_embeddings import test_llm_manifest_mapping
+import queue
+
+from mcp_workflow.load_defect_embeddings import map_comment_to_states
 from mcp_llm_handler import process_llm_states
+from utils.request_context import request_cache_report
+from utils.metrics import observe_stage
+from utils.tracing import start_trace
+
+# Marks the end of a streamed pipeline run on its event queue
+STREAM_END = object()
+
+def process_user_comment(user_comment: str, confirmation="YES", bypass_cache=False, on_event=None, trace=False) -> dict:
+    """
+    Map the comment to workflow States and execute them. ``on_event(kind, payload)``
+    receives "candidates", "token", "states" and "step_result" events as they happen.
+    With ``trace`` the response carries the request's span tree under "trace".
+    """
+    if trace:
+        with start_trace("process_user_comment") as request_trace:
+            response = _process_user_comment(user_comment, confirmation, bypass_cache, on_event)
+        response["trace"] = request_trace.to_dict()
+        return response
+    return _process_user_comment(user_comment, confirmation, bypass_cache, on_event)
+
+def _process_user_comment(user_comment: str, confirmation, bypass_cache, on_event) -> dict:
+    with observe_stage("pipeline"), request_cache_report() as cache_report:
+        try:
+            # Step 1: Get LLM interpretation of the comment
+            with observe_stage("map_comment"):
+                llm_response = map_comment_to_states(user_comment, use_cache=not bypass_cache, on_event=on_event)
+
+            on_step_result = None
+            if on_event:
+                on_event("states", {"llm_output": llm_response})
+                on_step_result = lambda index, step, result, message: on_event(
+                    "step_result", {"index": index, "step": step, "result": result, "message": message}
+                )
+
+            # Step 2: Process through MCP engine
+            with observe_stage("execute_steps"):
+                result = process_llm_states(llm_response, confirmation, on_step_result=on_step_result)
+            return {
+                "status": "success",
+                "llm_output": llm_response,
+                "result": result,
+                "cache": dict(cache_report)
+            }
+
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": str(e),
+                "cache": dict(cache_report)
+            }
+
+def stream_user_comment(user_comment: str, confirmation: str, events: queue.Queue, bypass_cache=False, trace=False):
+    """
+    Run process_user_comment, putting each event on ``events`` followed by a final
+    "done" event carrying the usual response and then STREAM_END.
+    """
+    def emit(kind, payload):
+        events.put({"event": kind, **payload})
 
-def process_user_comment(user_comment: str, confirmation="YES") -> dict:
     try:
-        # Step 1: Get LLM interpretation of the comment
-        llm_response = test_llm_manifest_mapping(user_comment)
-
-        if isinstance(llm_response, str):
-            llm_response = json.loads(llm_response)
-
-        # Step 2: Process through MCP engine
-        result = process_llm_states(llm_response, confirmation)
-        return {
-            "status": "success",
-            "llm_output": llm_response,
-            "result": result
-        }
-
-    except Exception as e:
-        return {
-            "status": "error",
-            "message": str(e)
-        }
+        emit("done", process_user_comment(user_comment, confirmation, bypass_cache, on_event=emit, trace=trace))
+    finally:
+        events.put(STREAM_END)
+
+def iter_ndjson_events(events: queue.Queue):
+    """Yield queued events as newline-delimited JSON until STREAM_END."""
+    while True:
+        event = events.get()
+        if event is STREAM_END:
+            return
+        yield json.dumps(event, default=str) + "\n"
@@ -1,4 +1,10 @@
-from mcp_engine import MCPWorkflow  # your MCP engine
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config.settings import get_defaults
+from mcp_registry import get_manifest_registry
+from utils.metrics import observe_stage
 from interface.api_handlers import raise_defect_api, assign_defect_api,add_comment_api,review_defect_api,close_defect_api,update_status_api  # Simulated or real APIs
 
 # Register step functions
@@ -11,69 +17,181 @@ STEP_FUNCTIONS = {
     "update_status": update_status_api # Assuming you have this function defined
 }
 
-def process_llm_states(llm_output, user_confirmation):
-    mcp = MCPWorkflow()
-    messages_to_user = []
+# Context fields each step handler returns; later steps that need one of these
+# (and were not given it explicitly) wait for the step that produces it
+STEP_OUTPUTS = {
+    "create_defect": ["defect_id"],
+    "assign_defect": ["engineer_name"],
+    "add_comment": ["comment_text"],
+    "review_defect": ["review_comments"],
+    "close_defect": ["comment_text"],
+    "update_status": ["new_status"],
+}
+
+class StepExecutionError(Exception):
+    """
+    A step handler raised. The message also reports the steps that did run,
+    because their side effects (Jira issues, assignments, comments) stand.
+    """
+
+_step_executor = None
+_step_executor_lock = threading.Lock()
+
+def _get_step_executor():
+    global _step_executor
+    if _step_executor is None:
+        with _step_executor_lock:
+            if _step_executor is None:
+                workers = get_defaults().get("step_executor_workers", 4)
+                _step_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mcp-step")
+    return _step_executor
+
+def _provided_fields(step_data) -> dict:
+    # Safe update: skip keys with 'Not Provided' or empty values
+    fields = step_data.get("Required Fields", {}) or {}
+    return {key: value for key, value in fields.items() if value and value != "Not Provided"}
+
+def plan_step_dependencies(states: list[dict], manifests: dict) -> list[set]:
+    """
+    For each state, the indexes of earlier states whose handler output it may read.
+
+    Sequentially, step j sees fields(0), result(0), fields(1), ... fields(j).
+    Walking back from j, an earlier handler result matters for a required field
+    until some step explicitly provides that field.
+    """
+    provided = [_provided_fields(state) for state in states]
+    dependencies = []
 
-    # ✅ Keep context outside the loop to persist across steps
-    global_context = {}
+    for j, state in enumerate(states):
+        deps = set()
+        required = manifests.get(state.get("Step Name"), {}).get("input_required", [])
+        for field in required:
+            if field in provided[j]:
+                continue
+            for i in range(j - 1, -1, -1):
+                if field in STEP_OUTPUTS.get(states[i].get("Step Name"), []):
+                    deps.add(i)
+                if field in provided[i]:
+                    break
+        dependencies.append(deps)
+    return dependencies
+
+def _ancestors(index: int, dependencies: list[set]) -> set:
+    seen = set()
+    stack = list(dependencies[index])
+    while stack:
+        i = stack.pop()
+        if i not in seen:
+            seen.add(i)
+            stack.extend(dependencies[i])
+    return seen
+
+def _execution_levels(dependencies: list[set]) -> list[list[int]]:
+    levels = []
+    level_of = {}
+    for j, deps in enumerate(dependencies):
+        level = 1 + max((level_of[d] for d in deps), default=-1)
+        level_of[j] = level
+        if level == len(levels):
+            levels.append([])
+        levels[level].append(j)
+    return levels
+
+def process_llm_states(llm_output, user_confirmation, on_step_result=None):
+    """
+    Validate and execute the parsed States. ``on_step_result(index, step_name,
+    result, message)`` is called as each step finishes, for streaming clients.
+
+    If a handler raises, the other steps of its level still finish (they run
+    concurrently), later levels are not started, and StepExecutionError is
+    raised with the messages of every step that did run.
+    """
+    manifests = get_manifest_registry().manifests
+    messages_to_user = []
 
     States = llm_output.get("States", [])
     if not States or len(States) == 0:
         messages_to_user.append(f"⚠️Sorry!! Unable to understand the ask, kindly ask about defects in general, No define action I have.")
-       
-    
-    for step_data in llm_output.get("States", []):
+        return convert_missing_field_messages(messages_to_user)
+
+    dependencies = plan_step_dependencies(States, manifests)
+    provided = [_provided_fields(state) for state in States]
+    execute = user_confirmation.strip().upper() == "YES"
+
+    results = {}
+    step_messages = {}
+
+    def run_step(j):
+        step_data = States[j]
         step_name = step_data.get("Step Name")
-        fields = step_data.get("Required Fields", {})
-        
-        # ✅ Merge new fields into global context
-        # Safe update: skip keys with 'Not Provided' or empty values
-        for key, value in fields.items():
-            if value and value != "Not Provided":
-                global_context[key] = value
 
-        # ✅ Start engine with full global context so far
-        mcp.start(step_name=step_name, initial_context=global_context)
+        # ✅ Rebuild the context this step would have seen sequentially, using
+        # only the handler results it depends on
+        ancestors = _ancestors(j, dependencies)
+        context = {}
+        for m in range(j + 1):
+            context.update(provided[m])
+            if m in ancestors and isinstance(results.get(m), dict):
+                context.update(results[m])
 
         # Validate required inputs
         missing_fields = []
-        for req_field in mcp.get_input_requirements():
-            if req_field not in global_context or not global_context[req_field] or global_context[req_field] == "Not Provided":
+        for req_field in manifests.get(step_name, {}).get("input_required", []):
+            if req_field not in context or not context[req_field] or context[req_field] == "Not Provided":
                 missing_fields.append(req_field)
 
         if missing_fields:
-            messages_to_user.append(f"Step `{step_name}` is missing fields: {missing_fields}")
-            continue
+            return None, f"Step `{step_name}` is missing fields: {missing_fields}"
 
         # Execute the step
-        if user_confirmation.strip().upper() == "YES":
-            action_fn = STEP_FUNCTIONS.get(step_name)
-            if action_fn:
-                print(f"▶️ Executing API for step: {step_name}")
-                result = action_fn(global_context)
+        if not execute:
+            return None, None
+
+        action_fn = STEP_FUNCTIONS.get(step_name)
+        if not action_fn:
+            return None, f"⚠️ No action function found for `{step_name}`"
 
-                # ✅ Merge returned API values into global context
-                if isinstance(result, dict):
-                    global_context.update(result)
+        print(f"▶️ Executing API for step: {step_name}")
+        with observe_stage("step", step=step_name):
+            result = action_fn(context)
+        return result, f"✅ Executed `{step_name}`: {result}"
 
-                messages_to_user.append(f"✅ Executed `{step_name}`: {result}")
-            else:
-                messages_to_user.append(f"⚠️ No action function found for `{step_name}`")
+    def ordered_messages():
+        # Keep the user-facing messages in the order the LLM listed the steps
+        return [step_messages[j] for j in range(len(States)) if step_messages.get(j)]
 
-        # Update context for next step
-        mcp.update_context(global_context)
+    # Steps in the same level do not read each other's output, so they run concurrently
+    levels = _execution_levels(dependencies)
+    for n, level in enumerate(levels):
+        if len(level) == 1:
+            futures = None
+        else:
+            # Each task runs in a copy of this context so request tracing follows it
+            executor = _get_step_executor()
+            futures = [executor.submit(contextvars.copy_context().run, run_step, j) for j in level]
 
-        # Transition to next step
-        next_steps_str = step_data.get("Allowed Next Steps")
-        if next_steps_str:
-            # Split comma-separated string to list
-            next_steps = [step.strip() for step in next_steps_str.split(",")]
-            # Pick the first allowed next step (or add your own logic)
-            chosen_next_step = next_steps[0]
-            mcp.proceed_to_next(chosen_next_step)
+        # Wait for every step in the level, even after one fails, so the
+        # report covers all side effects that happened
+        failures = []
+        for k, j in enumerate(level):
+            try:
+                result, message = futures[k].result() if futures else run_step(j)
+            except Exception as e:
+                failures.append(e)
+                result, message = None, f"❌ Step `{States[j].get('Step Name')}` failed: {e}"
+            results[j] = result
+            step_messages[j] = message
+            if on_step_result:
+                on_step_result(j, States[j].get("Step Name"), result, message)
 
+        if failures:
+            messages = ordered_messages()
+            not_run = [States[j].get("Step Name") for later in levels[n + 1:] for j in later]
+            if not_run:
+                messages.append(f"⏹️ Not run after the failure: {', '.join(not_run)}")
+            raise StepExecutionError(convert_missing_field_messages(messages)) from failures[0]
 
+    messages_to_user.extend(ordered_messages())
     return convert_missing_field_messages(messages_to_user)
 
 import re
@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+import yaml
+from jinja2 import Template
+
+REQUIRED_MANIFEST_KEYS = ("step", "input_required", "allowed_next_steps", "llm_prompt_template")
+
+
+def validate_manifest(manifest: dict, path: str):
+    if not isinstance(manifest, dict):
+        raise ValueError(f"❌ Manifest {path} is not a mapping")
+    missing = [key for key in REQUIRED_MANIFEST_KEYS if key not in manifest]
+    if missing:
+        raise ValueError(f"❌ Manifest {path} is missing keys: {missing}")
+    for key in ("input_required", "allowed_next_steps"):
+        if not isinstance(manifest[key], list):
+            raise ValueError(f"❌ Manifest {path}: '{key}' must be a list")
+
+
+class ManifestRegistry:
+    """
+    Process-wide view of the *.mcp.yml manifests in one directory.
+
+    Manifests are parsed and validated once and their llm_prompt_template is
+    compiled once. Files are re-stat'ed at most every ``check_interval_sec`` and
+    only those whose mtime changed are reloaded. Readers always get a complete
+    snapshot because reloads swap whole dicts instead of mutating them.
+    """
+
+    def __init__(self, manifests_dir: str = "mcp_manifests", check_interval_sec: float = 2.0):
+        self.manifests_dir = manifests_dir
+        self.check_interval_sec = check_interval_sec
+        self._manifests = {}
+        self._templates = {}
+        self._files = {}  # path -> (mtime, step)
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+        self.refresh(force=True, strict=True)
+
+    def _load_file(self, path: str):
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = yaml.safe_load(f)
+        validate_manifest(manifest, path)
+        return manifest, Template(manifest["llm_prompt_template"])
+
+    def refresh(self, force: bool = False, strict: bool = False):
+        """
+        Reload manifests whose file changed. With ``strict`` an invalid manifest
+        raises; otherwise the previous version is kept and a warning printed.
+        """
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval_sec:
+            return
+
+        with self._lock:
+            if not force and now - self._checked_at < self.check_interval_sec:
+                return
+            self._checked_at = now
+
+            current = {}
+            for file in os.listdir(self.manifests_dir):
+                if file.endswith(".mcp.yml"):
+                    path = os.path.join(self.manifests_dir, file)
+                    current[path] = os.stat(path).st_mtime_ns
+
+            if not force and {p: m for p, (m, _) in self._files.items()} == current:
+                return
+
+            manifests = dict(self._manifests)
+            templates = dict(self._templates)
+            files = {}
+
+            for path, (_, step) in self._files.items():
+                if path not in current:
+                    manifests.pop(step, None)
+                    templates.pop(step, None)
+
+            for path, mtime in current.items():
+                previous = self._files.get(path)
+                if previous and previous[0] == mtime and not force:
+                    files[path] = previous
+                    continue
+                try:
+                    manifest, template = self._load_file(path)
+                except Exception as e:
+                    if strict:
+                        raise
+                    print(f"⚠️ Keeping previous version of {path}: {e}")
+                    if previous:
+                        files[path] = previous
+                    continue
+
+                if previous and previous[1] != manifest["step"]:
+                    manifests.pop(previous[1], None)
+                    templates.pop(previous[1], None)
+                manifests[manifest["step"]] = manifest
+                templates[manifest["step"]] = template
+                files[path] = (mtime, manifest["step"])
+
+            self._manifests = manifests
+            self._templates = templates
+            self._files = files
+            self.reloads += 1
+
+    @property
+    def manifests(self) -> dict:
+        self.refresh()
+        return self._manifests
+
+    def get(self, step: str):
+        return self.manifests.get(step)
+
+    def get_template(self, step: str):
+        self.refresh()
+        return self._templates.get(step)
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_manifest_registry(manifests_dir: str = "mcp_manifests") -> ManifestRegistry:
+    registry = _registries.get(manifests_dir)
+    if registry is None:
+        with _registries_lock:
+            registry = _registries.get(manifests_dir)
+            if registry is None:
+                registry = ManifestRegistry(manifests_dir)
+                _registries[manifests_dir] = registry
+    return registry
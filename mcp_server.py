@@ -1,23 +1,124 @@
-from fastapi import FastAPI
+import queue
+from fastapi import FastAPI, Header
 from pydantic import BaseModel
 from typing import Optional
-from fastapi.responses import JSONResponse
-
-from mcp_llm_api import process_user_comment
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+
+from mcp_llm_api import process_user_comment, stream_user_comment, iter_ndjson_events
+from config.settings import get_defaults, start_background_refresh, stop_background_refresh, get_settings_cache_stats
+from config.redis_conn import get_redis_pool, close_redis_pool
+from config.neo4j_conn import get_neo4j_driver, close_neo4j_driver, get_neo4j_pool_stats
+from config.jira_conn import close_jira_session
+from utils.async_utils import BoundedExecutor, ServerBusyError
+from utils.neo4j_utils import ensure_schema
+from utils.embedding_service import get_embedding_cache_stats
+from utils.semantic_utils import get_defect_record_cache_stats
+from utils.metrics import cache_collector, metrics_response
+from prometheus_client import Gauge
 
 app = FastAPI(title="MCP Defect Assistant API", version="1.0")
 
+# Runs the blocking pipeline (boto3, Redis, Neo4j, Jira) off the event loop
+pipeline_executor = None
+
+PIPELINE_REQUESTS = Gauge("mcp_pipeline_requests", "Requests admitted to the pipeline executor.", ["state"])
+PIPELINE_REQUESTS.labels("in_flight").set_function(lambda: pipeline_executor.stats()["in_flight"] if pipeline_executor else 0)
+PIPELINE_REQUESTS.labels("queued").set_function(lambda: pipeline_executor.stats()["queued"] if pipeline_executor else 0)
+
+cache_collector.add_source("settings", get_settings_cache_stats)
+cache_collector.add_source("embedding", get_embedding_cache_stats)
+cache_collector.add_source("defect_records", get_defect_record_cache_stats)
+
+@app.on_event("startup")
+def on_startup():
+    global pipeline_executor
+    # Load config and secrets once, then keep them warm off the request path
+    start_background_refresh()
+    try:
+        get_redis_pool()
+    except Exception as e:
+        # The pool is created lazily on first use if Redis is not reachable yet
+        print(f"⚠️ Redis pool not created at startup: {e}")
+    try:
+        ensure_schema(get_neo4j_driver())
+    except Exception as e:
+        # Lookups still work without the constraints, only slower
+        print(f"⚠️ Neo4j schema not ensured at startup: {e}")
+
+    api_config = get_defaults().get("api", {})
+    pipeline_executor = BoundedExecutor(
+        max_concurrency=api_config.get("max_concurrency", 8),
+        max_queue=api_config.get("max_queue", 32)
+    )
+
+@app.on_event("shutdown")
+def on_shutdown():
+    if pipeline_executor:
+        pipeline_executor.shutdown()
+    close_redis_pool()
+    close_neo4j_driver()
+    close_jira_session()
+    stop_background_refresh()
+
 class CommentInput(BaseModel):
     comment: str
     confirm: Optional[str] = "YES"
+    bypass_cache: Optional[bool] = False
+    trace: Optional[bool] = False
+
+def _trace_requested(data: CommentInput, header_value: Optional[str]) -> bool:
+    # Either the body flag or an "X-MCP-Trace: 1" header turns tracing on
+    return bool(data.trace) or (header_value or "").strip().lower() in ("1", "true", "yes")
 
 @app.post("/api/mcp")
-async def handle_mcp_request(data: CommentInput):
-    return process_user_comment(data.comment, data.confirm)
+async def handle_mcp_request(data: CommentInput, x_mcp_trace: Optional[str] = Header(None)):
+    try:
+        return await pipeline_executor.run(
+            process_user_comment, data.comment, data.confirm,
+            bypass_cache=data.bypass_cache, trace=_trace_requested(data, x_mcp_trace)
+        )
+    except ServerBusyError:
+        return JSONResponse(
+            content={"status": "error", "message": "Server is busy, please retry shortly."},
+            status_code=503,
+            headers={"Retry-After": "1"}
+        )
+
+@app.post("/api/mcp/stream")
+async def handle_mcp_stream(data: CommentInput, x_mcp_trace: Optional[str] = Header(None)):
+    """
+    Same pipeline as /api/mcp, answered as NDJSON events: candidates, token,
+    states, step_result and a final done event with the full response.
+    """
+    events = queue.Queue()
+    try:
+        pipeline_executor.submit(
+            stream_user_comment, data.comment, data.confirm, events,
+            bypass_cache=data.bypass_cache, trace=_trace_requested(data, x_mcp_trace)
+        )
+    except ServerBusyError:
+        return JSONResponse(
+            content={"status": "error", "message": "Server is busy, please retry shortly."},
+            status_code=503,
+            headers={"Retry-After": "1"}
+        )
+    return StreamingResponse(iter_ndjson_events(events), media_type="application/x-ndjson")
+
+@app.get("/metrics")
+def metrics():
+    content, content_type = metrics_response()
+    return Response(content=content, headers={"Content-Type": content_type})
 
 @app.get("/health")
 def health_check():
     return JSONResponse(content={"status": "ok"}, status_code=200)
+
+@app.get("/health/pools")
+def pool_stats():
+    return JSONResponse(content={
+        "neo4j": get_neo4j_pool_stats(),
+        "pipeline": pipeline_executor.stats() if pipeline_executor else None
+    }, status_code=200)
 # mcp_server_memory.py
 # from fastapi import FastAPI, Request
 # from pydantic import BaseModel
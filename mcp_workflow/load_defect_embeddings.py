@@ -1,63 +1,246 @@
 import json
 import base64
+import hashlib
 import numpy as np
 import os
 import yaml
 import datetime
 import re
+import time
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 
+from config.settings import get_defaults
 from config.bedrock_client import get_bedrock_client, get_bedrock_models
 from config.redis_conn import get_redis_client
 from config.neo4j_conn import get_neo4j_driver
 
-from utils.redis_utils import upsert_embedding, clear_cache_from_redis, load_cache_from_redis
+from utils.redis_utils import upsert_embedding, upsert_embeddings_batch, clear_cache_from_redis, load_cache_from_redis
+from utils.redis_utils import scan_hash_fields, delete_keys_batch
+from utils.rate_limit_utils import RateLimiter
 from utils.semantic_utils import polish_answer
-from utils.neo4j_utils import fetch_all_defects
+from utils.embedding_service import get_embedding, normalise_text
+from utils.request_context import record_cache_event
+from utils.bedrock_utils import query_bedrock_chat_stream
+from utils.metrics import observe_stage
+from utils.singleflight import coalesce
+from utils.tracing import span
+from mcp_registry import get_manifest_registry
+from utils.neo4j_utils import count_defects, iter_all_defects, fetch_defect_versions_page, fetch_defects_by_ids
 from utils.redis_index_util import create_vector_index, drop_index
-from utils.redis_index_util import INDEX_CONFIGS
+from utils.redis_index_util import INDEX_CONFIGS, get_index_settings, knn_ef_runtime_clause
 from redis.commands.search.field import TextField
 from redis.commands.search.query import Query
 
 manifest_cache = {}
 
+LOADER_CHECKPOINT_PREFIX = "embedding_loader:checkpoint:"
+STEP_SELECTION_CACHE_PREFIX = "stepcache:"
+
 def get_embeddings(text: str) -> list[float]:
-    bedrock = get_bedrock_client()
     models = get_bedrock_models()
     model_id = models["titan_v2"]
 
-    payload = {"inputText": polish_answer(text)}
-
-    response = bedrock.invoke_model(
-        body=json.dumps(payload),
-        modelId=model_id,
-        accept="application/json",
-        contentType="application/json"
-    )
-
-    result = json.loads(response['body'].read())
-    embedding = result.get("embedding")
+    embedding = get_embedding(polish_answer(text), model_id=model_id)
     if not embedding or not isinstance(embedding, list):
         raise Exception("Invalid embedding format received")
 
     return embedding
 
-def load_embeddings_to_redis_defect(token: str):
+def defect_embedding_text(defect: dict) -> str:
+    return f"{defect['title']} - {defect['description']}"
+
+def defect_content_hash(defect: dict) -> str:
+    """Hash of the text that gets embedded; a defect whose hash is unchanged keeps its vector."""
+    return hashlib.sha256(normalise_text(defect_embedding_text(defect)).encode("utf-8")).hexdigest()
+
+def _watermark(updated_date) -> str:
+    return "" if updated_date is None else str(updated_date)
+
+def defect_embedding_metadata(defect: dict) -> dict:
+    return {
+        "defect_id": defect["defect_id"],
+        "title": defect.get("title") or "",
+        "description": defect.get("description") or "",
+        "status": defect.get("status") or "",
+        "content_hash": defect_content_hash(defect),
+        "updated_date": _watermark(defect.get("updated_date")),
+    }
+
+def _embed_defect(defect: dict, limiter: RateLimiter):
+    limiter.acquire()
+    try:
+        return defect, get_embeddings(defect_embedding_text(defect)), None
+    except Exception as e:
+        return defect, None, e
+
+def load_embeddings_to_redis_defect(
+    token: str,
+    workers: int = None,
+    rate_per_sec: float = None,
+    batch_size: int = None,
+    resume: bool = True
+):
+    """
+    Embed every Neo4j defect and write the vectors into the token's Redis index.
+    Defects are streamed from Neo4j page by page rather than fetched up front.
+
+    Titan calls run on a bounded thread pool behind a rate limiter and vectors are
+    written in pipelined batches. After each fully written batch the last
+    defect_id is checkpointed in Redis, so a rerun resumes after it.
+    """
+    loader_config = get_defaults().get("embedding_loader", {})
+    workers = workers or loader_config.get("workers", 8)
+    rate_per_sec = rate_per_sec if rate_per_sec is not None else loader_config.get("rate_per_sec", 20)
+    batch_size = batch_size or loader_config.get("batch_size", 100)
+
+    config = INDEX_CONFIGS[token]
+    key_prefix = config["prefix"]
+    checkpoint_key = f"{LOADER_CHECKPOINT_PREFIX}{config['index_name']}"
+
     redis_conn = get_redis_client()
-    create_vector_index(token)
+
+    last_done = None
+    if resume:
+        raw = redis_conn.get(checkpoint_key)
+        last_done = raw.decode("utf-8") if raw else None
+    else:
+        redis_conn.delete(checkpoint_key)
 
     neo4j_driver = get_neo4j_driver()
     with neo4j_driver.session() as session:
-        defects = fetch_all_defects(session)
-        print(f"✅ Fetched {len(defects)} defects from Neo4j")
-
-        for defect in defects:
-            defect_id = defect["defect_id"]
-            text_for_embedding = f"{defect['title']} - {defect['description']}"
-            embedding = get_embeddings(text_for_embedding)
-            print(f"Embedding for defect {defect_id} generated successfully")
-            print(f"Embeddding text: {text_for_embedding}   \nEmbedding: {embedding}")
+        total_defects = session.execute_read(count_defects)
+        total = session.execute_read(count_defects, last_done) if last_done else total_defects
+    print(f"✅ Found {total_defects} defects in Neo4j")
+    create_vector_index(token, expected_size=total_defects)
+
+    if last_done:
+        print(f"⏩ Resuming after checkpoint {last_done}: {total} defects left")
+
+    # Defects stream in defect_id order with the checkpoint as the cursor,
+    # so only one page plus one batch is held in memory
+    page_size = get_defaults().get("neo4j", {}).get("export_page_size", 1000)
+    defects = iter_all_defects(neo4j_driver, page_size=page_size, after=last_done)
+
+    limiter = RateLimiter(rate_per_sec)
+    written = 0
+    started = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            batch = list(islice(defects, batch_size))
+            if not batch:
+                break
+            results = list(pool.map(lambda d: _embed_defect(d, limiter), batch))
+
+            items = []
+            failed = None
+            for defect, embedding, error in results:
+                if error is not None:
+                    failed = (defect, error)
+                    break
+                items.append((defect["defect_id"], embedding, defect_embedding_metadata(defect)))
+
+            written += upsert_embeddings_batch(redis_conn, items, key_prefix)
+            if items:
+                redis_conn.set(checkpoint_key, items[-1][0])
+
+            elapsed = time.monotonic() - started
+            rate = written / elapsed if elapsed else 0.0
+            eta = (total - written) / rate if rate else 0.0
+            print(f"📦 {written}/{total} defects indexed ({rate:.1f}/s, ETA {eta:.0f}s)")
+
+            if failed:
+                defect, error = failed
+                print(f"❌ Embedding failed for {defect['defect_id']}: {error}. Rerun to resume from the checkpoint.")
+                defects.close()
+                return written
+
+    redis_conn.delete(checkpoint_key)
+    elapsed = time.monotonic() - started
+    print(f"✅ Stored embeddings for {written} defects into Redis in {elapsed:.1f}s")
+    return written
+
+def sync_embeddings_to_redis_defect(
+    token: str,
+    workers: int = None,
+    rate_per_sec: float = None,
+    batch_size: int = None
+) -> dict:
+    """
+    Bring the token's Redis index in line with Neo4j without re-embedding everything.
+
+    Defects whose updated_date matches the stored watermark are skipped. Changed
+    ones are re-embedded only if their content hash differs (otherwise just their
+    stored fields are rewritten), and vectors for
+    defects no longer in Neo4j are deleted. Returns the skipped/updated/deleted counts.
+    """
+    loader_config = get_defaults().get("embedding_loader", {})
+    workers = workers or loader_config.get("workers", 8)
+    rate_per_sec = rate_per_sec if rate_per_sec is not None else loader_config.get("rate_per_sec", 20)
+    batch_size = batch_size or loader_config.get("batch_size", 100)
+
+    key_prefix = INDEX_CONFIGS[token]["prefix"]
+    redis_conn = get_redis_client()
+    stored = scan_hash_fields(redis_conn, key_prefix, ["content_hash", "updated_date"])
+    print(f"✅ Found {len(stored)} vectors in Redis")
 
-        print(f"✅ Stored embeddings for {len(defects)} defects into Redis")
+    neo4j_driver = get_neo4j_driver()
+    page_size = get_defaults().get("neo4j", {}).get("export_page_size", 1000)
+    seen = set()
+    candidates = []
+    for row in iter_all_defects(neo4j_driver, page_size=page_size, fetch_page=fetch_defect_versions_page):
+        defect_id = row["defect_id"]
+        seen.add(defect_id)
+        current = stored.get(defect_id)
+        if (
+            current is None
+            or not current.get("content_hash")
+            or current.get("updated_date") != _watermark(row["updated_date"])
+        ):
+            candidates.append(defect_id)
+    print(f"✅ Found {len(seen)} defects in Neo4j, {len(candidates)} new or changed")
+    create_vector_index(token, expected_size=len(seen))
+
+    counts = {"skipped": len(seen) - len(candidates), "updated": 0, "deleted": 0, "failed": 0}
+    limiter = RateLimiter(rate_per_sec)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(candidates), batch_size):
+            with neo4j_driver.session() as session:
+                defects = session.execute_read(fetch_defects_by_ids, candidates[start:start + batch_size])
+
+            to_embed = []
+            pipe = redis_conn.pipeline(transaction=False)
+            for defect in defects:
+                current = stored.get(defect["defect_id"]) or {}
+                if current.get("content_hash") == defect_content_hash(defect):
+                    # Embedded text unchanged, so keep the vector but refresh the
+                    # other fields (status, watermark) from Neo4j
+                    pipe.hset(f"{key_prefix}{defect['defect_id']}", mapping=defect_embedding_metadata(defect))
+                    counts["skipped"] += 1
+                else:
+                    to_embed.append(defect)
+            pipe.execute()
+
+            items = []
+            for defect, embedding, error in pool.map(lambda d: _embed_defect(d, limiter), to_embed):
+                if error is not None:
+                    # Left untouched, so the next sync picks it up again
+                    print(f"❌ Embedding failed for {defect['defect_id']}: {error}")
+                    counts["failed"] += 1
+                    continue
+                items.append((defect["defect_id"], embedding, defect_embedding_metadata(defect)))
+            counts["updated"] += upsert_embeddings_batch(redis_conn, items, key_prefix)
+
+    vanished = [defect_id for defect_id in stored if defect_id not in seen]
+    counts["deleted"] = delete_keys_batch(redis_conn, vanished, key_prefix)
+
+    print(
+        f"✅ Sync complete: {counts['skipped']} skipped, {counts['updated']} updated, "
+        f"{counts['deleted']} deleted, {counts['failed']} failed"
+    )
+    return counts
 
 def manifest_to_text(manifest: dict) -> str:
     step = manifest.get('step', '')
@@ -110,7 +293,16 @@ def safe_str(obj):
 
 #     return result
 
-import re
+# Precompiled patterns for the text-mode fallback parser
+STEP_HEADER_RE = re.compile(r'^\d+\.$')
+STEP_NAME_RE = re.compile(r'^Step Name:\s*(.+)$', re.IGNORECASE)
+REQUIRED_FIELDS_RE = re.compile(r'^Required Fields:', re.IGNORECASE)
+# The prompt asks for 'allowed_next_steps:' but older outputs use 'Allowed Next Steps:'
+NEXT_STEPS_RE = re.compile(r'^(?:Allowed Next Steps|allowed_next_steps):\s*(.+)$', re.IGNORECASE)
+FIELD_RE = re.compile(r'-\s*(\w+):\s*(.+)')
+CONFIRMATION_RE = re.compile(r'^Confirmation:\s*(.+)$', re.MULTILINE)
+
+STEP_SELECTION_TOOL_NAME = "select_workflow_steps"
 
 def parse_llm_output_multiple_states(text: str) -> dict:
     steps = []
@@ -122,7 +314,7 @@ def parse_llm_output_multiple_states(text: str) -> dict:
         line = line.strip()
 
         # Detect start of a new step block (e.g. '1.' or '2.')
-        if re.match(r'^\d+\.$', line):
+        if STEP_HEADER_RE.match(line):
             if current_step:
                 steps.append(current_step)
             current_step = {
@@ -135,18 +327,18 @@ def parse_llm_output_multiple_states(text: str) -> dict:
 
         if current_step is not None:
             # Step Name line
-            m = re.match(r'^Step Name:\s*(.+)$', line)
+            m = STEP_NAME_RE.match(line)
             if m:
                 current_step["Step Name"] = m.group(1).strip()
                 continue
 
             # Start of Required Fields
-            if line.startswith("Required Fields:"):
+            if REQUIRED_FIELDS_RE.match(line):
                 in_required_fields = True
                 continue
 
             # Allowed Next Steps line
-            m = re.match(r'^Allowed Next Steps:\s*(.+)$', line)
+            m = NEXT_STEPS_RE.match(line)
             if m:
                 current_step["Allowed Next Steps"] = m.group(1).strip()
                 in_required_fields = False
@@ -154,7 +346,7 @@ def parse_llm_output_multiple_states(text: str) -> dict:
 
             # Lines under Required Fields
             if in_required_fields and line.startswith("-"):
-                field_match = re.match(r'-\s*(\w+):\s*(.+)', line)
+                field_match = FIELD_RE.match(line)
                 if field_match:
                     field, value = field_match.groups()
                     current_step["Required Fields"][field.strip()] = value.strip()
@@ -166,7 +358,7 @@ def parse_llm_output_multiple_states(text: str) -> dict:
 
     # Extract Confirmation line (only once)
     confirmation = None
-    m = re.search(r'^Confirmation:\s*(.+)$', text, re.MULTILINE)
+    m = CONFIRMATION_RE.search(text)
     if m:
         confirmation = m.group(1).strip()
 
@@ -176,70 +368,84 @@ def parse_llm_output_multiple_states(text: str) -> dict:
     }
 
 
-def call_claude_for_step_selection(user_comment: str, candidates: list[dict]) -> dict:
-    bedrock = get_bedrock_client()
-    models = get_bedrock_models()
-    model_id = models["claude_haiku"]
-    version = models["anthropic_version"]
+def build_step_selection_tool(manifests: dict = None) -> dict:
+    """
+    Tool definition that makes Claude return the selected steps as JSON.
+    The step enum and field names come from the manifests' input_required.
+    """
+    manifests = manifests if manifests is not None else get_manifest_registry().manifests
 
-    candidate_text = "\n".join(
-        [
-            f"{i+1}. Step: {safe_str(c['manifest_id'])}\nDescription: {safe_str(c['description'])}"
-            for i, c in enumerate(candidates)
-        ]
+    field_names = sorted({field for m in manifests.values() for field in m.get("input_required", [])})
+    requirements = "; ".join(
+        f"{step}: {', '.join(m.get('input_required', []))}" for step, m in sorted(manifests.items())
     )
 
-    # combined_prompt = (
-    # "You are an intelligent assistant for managing defect workflows.\n\n"
-    # "Your task is to analyze a user comment and identify all relevant workflow steps described sequentially.\n"
-    # "Each step in the workflow manifest includes a step name, required fields, and allowed next steps.\n\n"
-    # "Instructions:\n"
-    # "1. Identify **all** relevant steps in the order they appear in the user comment.\n"
-    # "2. For each step, extract the required fields from the comment. If a required field is missing, return 'Not Provided'.\n"
-    # "3. For each step, return its allowed next steps as listed in the manifest.\n"
-    # "4. Format your output exactly as shown in the example below.\n\n"
-    # "Output Format:\n"
-    # "States:\n"
-    # "1.\n"
-    # "  Step Name: <step_name_1>\n"
-    # "  Required Fields:\n"
-    # "  - field1: <value or 'Not Provided'>\n"
-    # "  - field2: <value or 'Not Provided'>\n"
-    # "  Allowed Next Steps: <comma-separated list>\n"
-    # "2.\n"
-    # "  Step Name: <step_name_2>\n"
-    # "  Required Fields:\n"
-    # "  - fieldA: <value or 'Not Provided'>\n"
-    # "  Allowed Next Steps: <comma-separated list>\n"
-    # "...\n"
-    # "Confirmation: Do you want to proceed with these actions?\n\n"
-    # "If no suitable step matches, respond with:\n"
-    # "States: None\n"
-    # "Required Fields: N/A\n"
-    # "Allowed Next Steps: N/A\n"
-    # "Confirmation: Unable to proceed due to insufficient information.\n\n"
-    # "Example:\n"
-    # "User Comment:\n"
-    # "\"Create defect with Title: Login Issue, Description: Cannot login, Raised by: Alice, then assign to SupportTeam\"\n\n"
-    # "Output:\n"
-    # "States:\n"
-    # "1.\n"
-    # "  Step Name: create_defect\n"
-    # "  Required Fields:\n"
-    # "  - title: Login Issue\n"
-    # "  - description: Cannot login\n"
-    # "  - created_by: Alice\n"
-    # "  Allowed Next Steps: review_defect\n"
-    # "2.\n"
-    # "  Step Name: assign_defect\n"
-    # "  Required Fields:\n"
-    # "  - assigned_to: SupportTeam\n"
-    # "  Allowed Next Steps: close_defect\n"
-    # "Confirmation: Do you want to proceed with these actions?\n\n"
-    # f"User Comment:\n{user_comment}\n\n"
-    # f"Workflow Steps Manifest:\n{candidate_text}"
-    # )
-    combined_prompt = (
+    return {
+        "name": STEP_SELECTION_TOOL_NAME,
+        "description": (
+            "Record every workflow step requested in the user comment, in order, "
+            "with the values extracted for its required fields. "
+            f"Required fields per step: {requirements}."
+        ),
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "states": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "step_name": {"type": "string", "enum": sorted(manifests)},
+                            "required_fields": {
+                                "type": "object",
+                                "description": "Only fields required by this step; use 'Not Provided' when the comment does not give a value.",
+                                "properties": {name: {"type": "string"} for name in field_names},
+                            },
+                            "allowed_next_steps": {"type": "array", "items": {"type": "string"}},
+                        },
+                        "required": ["step_name", "required_fields"],
+                    },
+                },
+                "similar_defect_search": {
+                    "type": "boolean",
+                    "description": "True if the user asks to find similar or semantically related defects.",
+                },
+            },
+            "required": ["states"],
+        },
+    }
+
+
+def tool_output_to_states(tool_input: dict, manifests: dict = None) -> dict:
+    """
+    Convert the tool_use input into the same States dict the text parser returns.
+    """
+    manifests = manifests if manifests is not None else get_manifest_registry().manifests
+
+    steps = []
+    for state in tool_input.get("states") or []:
+        step_name = state.get("step_name")
+        fields = {k: str(v) for k, v in (state.get("required_fields") or {}).items()}
+        manifest = manifests.get(step_name, {})
+        for field in manifest.get("input_required", []):
+            fields.setdefault(field, "Not Provided")
+
+        next_steps = state.get("allowed_next_steps") or manifest.get("allowed_next_steps") or []
+        steps.append({
+            "Step Name": step_name,
+            "Required Fields": fields,
+            "Allowed Next Steps": ", ".join(next_steps) if next_steps else None,
+        })
+
+    return {
+        "States": steps,
+        "Confirmation": None,
+        "SimilarDefect": "Yes" if tool_input.get("similar_defect_search") else "No",
+    }
+
+
+def build_text_step_selection_prompt(user_comment: str, candidate_text: str) -> str:
+    return (
     "You are an intelligent assistant for managing defect workflows.\n\n"
     "Your task is to analyze a user comment and identify all relevant workflow steps described sequentially.\n"
     "Each step in the workflow manifest includes a step name, required fields, and allowed next steps.\n\n"
@@ -302,38 +508,217 @@ def call_claude_for_step_selection(user_comment: str, candidates: list[dict]) ->
     )
 
 
+def build_tool_step_selection_prompt(user_comment: str, candidate_text: str) -> str:
+    return (
+    "You are an intelligent assistant for managing defect workflows.\n\n"
+    "Analyze the user comment and identify all relevant workflow steps in the order they appear.\n"
+    "For each step, extract its required fields from the comment. "
+    "**If a required field is missing or cannot be extracted, use 'Not Provided' explicitly for that field.**\n"
+    "Use only step names from the Workflow Steps Manifest, and set similar_defect_search when the user "
+    "asks for similar (semantic) defects.\n"
+    f"Record your answer with the {STEP_SELECTION_TOOL_NAME} tool.\n\n"
+    f"User Comment:\n{user_comment}\n\n"
+    f"Workflow Steps Manifest:\n{candidate_text}"
+    )
+
+
+def parse_step_selection_response(result: dict) -> dict:
+    """
+    Use the tool_use block when Claude returned one; otherwise fall back to the
+    text parser.
+    """
+    content = result.get("content") or []
+    for block in content:
+        if block.get("type") == "tool_use" and block.get("name") == STEP_SELECTION_TOOL_NAME:
+            return tool_output_to_states(block.get("input") or {})
 
-    response = bedrock.invoke_model(
-        modelId=model_id,
-        contentType="application/json",
-        accept="application/json",
-        body=json.dumps({
-            "anthropic_version": version,
-            "messages": [{"role": "user", "content": combined_prompt}],
-            "max_tokens": 1000
-        })
+    text = "".join(block.get("text", "") for block in content if block.get("type", "text") == "text")
+    return parse_llm_output_multiple_states(text.strip())
+
+
+def get_step_selection_mode() -> str:
+    return get_defaults().get("step_selection_mode", "tool_use")
+
+
+def manifest_version(manifest_ids: list[str], manifests: dict = None) -> str:
+    """Fingerprint of the given manifests, so editing one invalidates cached selections."""
+    manifests = manifests if manifests is not None else get_manifest_registry().manifests
+    content = json.dumps([manifests.get(manifest_id) for manifest_id in manifest_ids], sort_keys=True, default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
+def step_selection_cache_key(user_comment: str, candidates: list[dict], model_id: str, mode: str = "text", manifests: dict = None) -> str:
+    manifest_ids = sorted(str(c["manifest_id"]) for c in candidates)
+    version = manifest_version(manifest_ids, manifests)
+    raw = f"{model_id}\x1f{mode}\x1f{','.join(manifest_ids)}\x1f{version}\x1f{normalise_text(user_comment)}"
+    return f"{STEP_SELECTION_CACHE_PREFIX}{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+
+def is_cacheable_selection(parsed_output: dict, manifests: dict = None) -> bool:
+    """
+    Only cache selections that parsed into known steps; an empty or truncated
+    completion would otherwise be served for the whole TTL.
+    """
+    manifests = manifests if manifests is not None else get_manifest_registry().manifests
+    states = (parsed_output or {}).get("States") or []
+    return bool(states) and all(state.get("Step Name") in manifests for state in states)
+
+def get_cached_step_selection(cache_key: str):
+    try:
+        raw = get_redis_client().get(cache_key)
+        return json.loads(raw) if raw else None
+    except Exception as e:
+        print(f"⚠️ Step selection cache read failed: {e}")
+        return None
+
+def store_step_selection(cache_key: str, parsed_output: dict):
+    ttl = get_defaults().get("step_selection_cache_ttl_sec", 3600)
+    try:
+        get_redis_client().set(cache_key, json.dumps(parsed_output), ex=ttl)
+    except Exception as e:
+        print(f"⚠️ Step selection cache write failed: {e}")
+
+def call_claude_for_step_selection(user_comment: str, candidates: list[dict], use_cache: bool = True, mode: str = None, on_token=None) -> dict:
+    """
+    Ask Claude which workflow steps the comment describes. With ``on_token`` the
+    response is streamed and each text or tool-input fragment is passed to it.
+    """
+    models = get_bedrock_models()
+    model_id = models["claude_haiku"]
+    version = models["anthropic_version"]
+    mode = mode or get_step_selection_mode()
+
+    # Identical comments against the same candidate steps resolve to the same
+    # States, so a hit skips both the Bedrock call and the parsing
+    cache_key = step_selection_cache_key(user_comment, candidates, model_id, mode)
+    if use_cache:
+        with span("step_selection_cache_lookup"):
+            cached = get_cached_step_selection(cache_key)
+        if cached is not None:
+            record_cache_event("step_selection", "hit")
+            return cached
+    record_cache_event("step_selection", "miss" if use_cache else "bypass")
+
+    bedrock = get_bedrock_client()
+
+    candidate_text = "\n".join(
+        [
+            f"{i+1}. Step: {safe_str(c['manifest_id'])}\nDescription: {safe_str(c['description'])}"
+            for i, c in enumerate(candidates)
+        ]
     )
 
-    result = json.loads(response["body"].read())
-    print(f"LLM response:\n {result}")
+    # combined_prompt = (
+    # "You are an intelligent assistant for managing defect workflows.\n\n"
+    # "Your task is to analyze a user comment and identify all relevant workflow steps described sequentially.\n"
+    # "Each step in the workflow manifest includes a step name, required fields, and allowed next steps.\n\n"
+    # "Instructions:\n"
+    # "1. Identify **all** relevant steps in the order they appear in the user comment.\n"
+    # "2. For each step, extract the required fields from the comment. If a required field is missing, return 'Not Provided'.\n"
+    # "3. For each step, return its allowed next steps as listed in the manifest.\n"
+    # "4. Format your output exactly as shown in the example below.\n\n"
+    # "Output Format:\n"
+    # "States:\n"
+    # "1.\n"
+    # "  Step Name: <step_name_1>\n"
+    # "  Required Fields:\n"
+    # "  - field1: <value or 'Not Provided'>\n"
+    # "  - field2: <value or 'Not Provided'>\n"
+    # "  Allowed Next Steps: <comma-separated list>\n"
+    # "2.\n"
+    # "  Step Name: <step_name_2>\n"
+    # "  Required Fields:\n"
+    # "  - fieldA: <value or 'Not Provided'>\n"
+    # "  Allowed Next Steps: <comma-separated list>\n"
+    # "...\n"
+    # "Confirmation: Do you want to proceed with these actions?\n\n"
+    # "If no suitable step matches, respond with:\n"
+    # "States: None\n"
+    # "Required Fields: N/A\n"
+    # "Allowed Next Steps: N/A\n"
+    # "Confirmation: Unable to proceed due to insufficient information.\n\n"
+    # "Example:\n"
+    # "User Comment:\n"
+    # "\"Create defect with Title: Login Issue, Description: Cannot login, Raised by: Alice, then assign to SupportTeam\"\n\n"
+    # "Output:\n"
+    # "States:\n"
+    # "1.\n"
+    # "  Step Name: create_defect\n"
+    # "  Required Fields:\n"
+    # "  - title: Login Issue\n"
+    # "  - description: Cannot login\n"
+    # "  - created_by: Alice\n"
+    # "  Allowed Next Steps: review_defect\n"
+    # "2.\n"
+    # "  Step Name: assign_defect\n"
+    # "  Required Fields:\n"
+    # "  - assigned_to: SupportTeam\n"
+    # "  Allowed Next Steps: close_defect\n"
+    # "Confirmation: Do you want to proceed with these actions?\n\n"
+    # f"User Comment:\n{user_comment}\n\n"
+    # f"Workflow Steps Manifest:\n{candidate_text}"
+    # )
+    with span("prompt_build", mode=mode):
+        if mode == "tool_use":
+            combined_prompt = build_tool_step_selection_prompt(user_comment, candidate_text)
+        else:
+            combined_prompt = build_text_step_selection_prompt(user_comment, candidate_text)
 
-    return parse_llm_output_multiple_states(result["content"][0]["text"].strip())
 
 
-def dynamic_mode_switch(user_comment: str, redis_conn, token="manifest_embeddings_index", top_k=3, threshold=0.5):
-    config = INDEX_CONFIGS[token]
+    body = {
+        "anthropic_version": version,
+        "messages": [{"role": "user", "content": combined_prompt}],
+        "max_tokens": 1000
+    }
+    if mode == "tool_use":
+        body["tools"] = [build_step_selection_tool()]
+        body["tool_choice"] = {"type": "tool", "name": STEP_SELECTION_TOOL_NAME}
+
+    def _select():
+        with observe_stage("llm_step_selection", model_id=model_id):
+            if on_token:
+                result = query_bedrock_chat_stream(bedrock, body, model_id, on_delta=on_token)
+            else:
+                response = bedrock.invoke_model(
+                    modelId=model_id,
+                    contentType="application/json",
+                    accept="application/json",
+                    body=json.dumps(body)
+                )
+                result = json.loads(response["body"].read())
+        print(f"LLM response:\n {result}")
+
+        with observe_stage("parse_step_selection", model_id=model_id):
+            parsed_output = parse_step_selection_response(result)
+        if use_cache and is_cacheable_selection(parsed_output):
+            store_step_selection(cache_key, parsed_output)
+        return parsed_output
+
+    # Concurrent identical comments share one Claude call. Callers that join an
+    # in-flight call get its parsed result but none of its streamed tokens. A
+    # selection that would not be cached is not handed to other workers either
+    return coalesce("step_selection", cache_key, _select, publish=is_cacheable_selection)
+
+
+def dynamic_mode_switch(user_comment: str, redis_conn, token="manifest_embeddings_index", top_k=3, threshold=0.5, ef_runtime=None, use_cache=True, on_event=None):
+    config = get_index_settings(token)
     index_name = config["index_name"]
 
     user_comment_emb = f"USER COMMENT: {user_comment}\nCONTEXT: Decide if this is a create_defect, assign_defect, close_defect, review_defect, update_status, or add_comment."
-    query_embedding = get_embeddings(user_comment_emb)
+    with observe_stage("embedding"):
+        query_embedding = get_embeddings(user_comment_emb)
     vector_bytes = np.array(query_embedding, dtype=np.float32).tobytes()
 
-    query_str = f"*=>[KNN {top_k} @embedding $vec_param AS score]"
+    query_str = f"*=>[KNN {top_k} @embedding $vec_param{knn_ef_runtime_clause(config, ef_runtime)} AS score]"
     query = Query(query_str).sort_by("score").return_fields("manifest_id", "description", "score").paging(0, top_k).dialect(2)
     params_dict = {"vec_param": vector_bytes}
+    if ef_runtime and config["algorithm"] == "HNSW":
+        params_dict["ef_runtime"] = ef_runtime
 
     try:
-        results = redis_conn.ft(index_name).search(query, query_params=params_dict)
+        with observe_stage("manifest_search"):
+            results = redis_conn.ft(index_name).search(query, query_params=params_dict)
         if results.total == 0:
             print("No matching manifest found.")
             return None, None, None
@@ -344,7 +729,12 @@ def dynamic_mode_switch(user_comment: str, redis_conn, token="manifest_embedding
             description = str(doc.description)
             candidates.append({"manifest_id": manifest_id, "description": description})
 
-        parsed_output = call_claude_for_step_selection(user_comment, candidates)
+        on_token = None
+        if on_event:
+            on_event("candidates", {"candidates": [c["manifest_id"] for c in candidates]})
+            on_token = lambda text: on_event("token", {"text": text})
+
+        parsed_output = call_claude_for_step_selection(user_comment, candidates, use_cache=use_cache, on_token=on_token)
         
         #print(f"[PARSED OUTPUT] {parsed_output}")
         return parsed_output
@@ -364,9 +754,16 @@ def dynamic_mode_switch(user_comment: str, redis_conn, token="manifest_embedding
         print(f"Search error: {e}")
         return None, None, None
 
-def test_llm_manifest_mapping(user_comment: str):
+def map_comment_to_states(user_comment: str, use_cache: bool = True, on_event=None):
+    """
+    Return the parsed States for a comment as a dict, ready for process_llm_states.
+    ``on_event(kind, payload)`` receives "candidates" and "token" events while it runs.
+    """
     redis_conn = get_redis_client()
-    parsed_output = dynamic_mode_switch(user_comment, redis_conn)
+    return dynamic_mode_switch(user_comment, redis_conn, use_cache=use_cache, on_event=on_event)
+
+def test_llm_manifest_mapping(user_comment: str, use_cache: bool = True):
+    parsed_output = map_comment_to_states(user_comment, use_cache=use_cache)
     #print (f"User comment: {user_comment}   \nParsed output: {parsed_output}")
     json_output = json.dumps(parsed_output, indent=2)
     return json_output
@@ -379,15 +776,38 @@ if __name__ == "__main__":
     parser.add_argument(
         "--comment",
         type=str,
-        required=True,
         help="User comment text to test LLM mapping against manifest steps."
     )
+    parser.add_argument("--load-defects", action="store_true", help="Embed all Neo4j defects into the defect index.")
+    parser.add_argument("--workers", type=int, help="Concurrent Titan requests.")
+    parser.add_argument("--rate", type=float, help="Max Titan requests per second.")
+    parser.add_argument("--batch-size", type=int, help="Vectors per pipelined Redis write.")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and index from the beginning.")
+    parser.add_argument("--sync", action="store_true", help="Only re-embed new or changed defects and drop deleted ones.")
     args = parser.parse_args()
 
-    #rint("\n--- Running LLM Mapping Test ---")
-    json_output = test_llm_manifest_mapping(args.comment)
-    print("\n--- LLM Sophistacated Output ---")
-    print(json_output)
+    if args.sync:
+        sync_embeddings_to_redis_defect(
+            "defect_embeddings_index",
+            workers=args.workers,
+            rate_per_sec=args.rate,
+            batch_size=args.batch_size
+        )
+    elif args.load_defects:
+        load_embeddings_to_redis_defect(
+            "defect_embeddings_index",
+            workers=args.workers,
+            rate_per_sec=args.rate,
+            batch_size=args.batch_size,
+            resume=not args.restart
+        )
+    elif args.comment:
+        #rint("\n--- Running LLM Mapping Test ---")
+        json_output = test_llm_manifest_mapping(args.comment)
+        print("\n--- LLM Sophistacated Output ---")
+        print(json_output)
+    else:
+        parser.error("one of --comment, --load-defects or --sync is required")
 
 
 
@@ -396,4 +816,4 @@ if __name__ == "__main__":
     #     json_output = json.loads(json_output) 
     # responses=process_llm_states(json_output, "YES")
     # print("=== Test Output ===")
-    # print(str(responses))
+    # print(str(responses))
\ No newline at end of file
@@ -1,36 +1,100 @@
-import json
-from config.neo4j_conn import get_neo4j_driver
-from utils.neo4j_utils import insert_defect, delete_all_defects
+import time
+from config.settings import get_defaults
+from config.neo4j_conn import get_neo4j_driver, close_neo4j_driver
+from utils.json_utils import iter_json_array
+from utils.neo4j_utils import ensure_schema, insert_defects_batch, link_defects_batch, delete_defects_batch
 
-# --- Load defect data ---
-defects_file = "data/insurance_defects_detailed.json"
-with open(defects_file, "r", encoding="utf-8") as f:
-    defects = json.load(f)
+DEFECTS_FILE = "data/insurance_defects_detailed.json"
 
-def load_all_defects():
+def format_defect(defect: dict) -> dict:
+    return {
+        "defect_id": defect.get("id"),
+        "title": defect.get("summary"),
+        "description": defect.get("description"),
+        "status": defect.get("status"),
+        "created_date": defect.get("created_on"),
+        "updated_date": defect.get("updated_on"),
+        "created_by": defect.get("created_by", "unknown"),
+        "updated_by": defect.get("updated_by", "unknown"),
+        "tags": defect.get("tags", []),
+        "comments": defect.get("comments", []),
+        "linked_defects": defect.get("related_defects", []),
+    }
+
+def iter_batches(items, batch_size: int):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def iter_defects(defects_file: str, limit: int = None):
+    for i, defect in enumerate(iter_json_array(defects_file)):
+        if limit is not None and i >= limit:
+            return
+        yield format_defect(defect)
+
+def _report(label: str, count: int, started: float):
+    elapsed = time.monotonic() - started
+    rate = count / elapsed if elapsed else 0.0
+    print(f"📦 {label}: {count} records ({rate:.0f}/s)")
+
+def load_all_defects(defects_file: str = DEFECTS_FILE, batch_size: int = None, limit: int = None, delete_existing: bool = True):
+    """
+    Stream defects from the JSON file into Neo4j in UNWIND batches.
+    Links are written in a second streaming pass so every target defect exists.
+    """
+    batch_size = batch_size or get_defaults().get("neo4j_loader", {}).get("batch_size", 1000)
     driver = get_neo4j_driver()
+    ensure_schema(driver)
+
     with driver.session() as session:
-        # Delete all existing defects first
-        session.write_transaction(delete_all_defects)
-        print("🗑️ Deleted all existing defects from Neo4j.")
-
-        #Load only first 2 defects for testing
-        for defect in defects[:2]:
-            formatted_defect = {
-                "defect_id": defect.get("id"),
-                "title": defect.get("summary"),
-                "description": defect.get("description"),
-                "status": defect.get("status"),
-                "created_date": defect.get("created_on"),
-                "updated_date": defect.get("updated_on"),
-                "created_by": defect.get("created_by", "unknown"),
-                "updated_by": defect.get("updated_by", "unknown"),
-                "tags": defect.get("tags", []),
-                "comments": defect.get("comments", []),
-                "linked_defects": defect.get("related_defects", []),
-            }
-            session.write_transaction(insert_defect, formatted_defect)
-        print(f"✅ Loaded 2 defects into Neo4j for testing")
+        if delete_existing:
+            # Delete in chunks so large graphs do not need one huge transaction
+            deleted = 0
+            while True:
+                removed = session.execute_write(delete_defects_batch, 10000)
+                deleted += removed
+                if removed == 0:
+                    break
+            print(f"🗑️ Deleted {deleted} existing defects from Neo4j.")
+
+        started = time.monotonic()
+        loaded = 0
+        for batch in iter_batches(iter_defects(defects_file, limit), batch_size):
+            session.execute_write(insert_defects_batch, batch)
+            loaded += len(batch)
+            _report("Defects", loaded, started)
+
+        links_started = time.monotonic()
+        linked = 0
+        links = (
+            {"defect_id": defect["defect_id"], "linked_id": linked_id}
+            for defect in iter_defects(defects_file, limit)
+            for linked_id in defect["linked_defects"]
+        )
+        for batch in iter_batches(links, batch_size):
+            session.execute_write(link_defects_batch, batch)
+            linked += len(batch)
+        if linked:
+            _report("Links", linked, links_started)
+
+        elapsed = time.monotonic() - started
+        print(f"✅ Loaded {loaded} defects and {linked} links into Neo4j in {elapsed:.1f}s ({loaded / elapsed if elapsed else 0:.0f} defects/s)")
+        return loaded
 
 if __name__ == "__main__":
-    load_all_defects()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Bulk load defects from JSON into Neo4j.")
+    parser.add_argument("--file", default=DEFECTS_FILE, help="JSON array of defects.")
+    parser.add_argument("--batch-size", type=int, help="Defects per UNWIND transaction.")
+    parser.add_argument("--limit", type=int, help="Only load the first N defects.")
+    parser.add_argument("--keep-existing", action="store_true", help="Do not delete existing defects first.")
+    args = parser.parse_args()
+
+    load_all_defects(args.file, batch_size=args.batch_size, limit=args.limit, delete_existing=not args.keep_existing)
+    close_neo4j_driver()
@@ -0,0 +1,82 @@
+# Run from the repo root: python -m scripts.bench_neo4j_schema --limit 2000 --yes
+# Reloads the defect graph twice (without and with the schema constraints),
+# so only point it at a development database.
+import argparse
+import importlib.util
+import time
+
+from config.neo4j_conn import get_neo4j_driver, close_neo4j_driver
+from utils.neo4j_utils import SCHEMA_STATEMENTS, ensure_schema, insert_defects_batch, delete_defects_batch
+
+# The repo's neo4j/ folder is shadowed by the neo4j driver package, so load the loader by path
+_spec = importlib.util.spec_from_file_location("load_defects", "neo4j/load_defects.py")
+load_defects = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(load_defects)
+DEFECTS_FILE, iter_batches, iter_defects = load_defects.DEFECTS_FILE, load_defects.iter_batches, load_defects.iter_defects
+
+
+def drop_schema(driver):
+    with driver.session() as session:
+        for statement in SCHEMA_STATEMENTS:
+            name = statement.split()[2]
+            session.run(f"DROP CONSTRAINT {name} IF EXISTS").consume()
+
+
+def clear_graph(driver):
+    with driver.session() as session:
+        while session.execute_write(delete_defects_batch, 10000):
+            pass
+        session.run("MATCH (n) WHERE n:Tag OR n:Comment DETACH DELETE n").consume()
+
+
+def timed_load(driver, defects_file, batch_size, limit):
+    started = time.perf_counter()
+    loaded = 0
+    with driver.session() as session:
+        for batch in iter_batches(iter_defects(defects_file, limit), batch_size):
+            session.execute_write(insert_defects_batch, batch)
+            loaded += len(batch)
+    return loaded, time.perf_counter() - started
+
+
+def timed_lookups(driver, defects_file, limit, lookups):
+    ids = [d["defect_id"] for d in iter_defects(defects_file, limit)][:lookups]
+    started = time.perf_counter()
+    with driver.session() as session:
+        for defect_id in ids:
+            session.run("MATCH (d:Defect {defect_id: $id}) RETURN d.title", id=defect_id).consume()
+    elapsed = time.perf_counter() - started
+    return elapsed / len(ids) * 1000 if ids else 0.0
+
+
+def run(defects_file, batch_size, limit, lookups):
+    driver = get_neo4j_driver()
+    results = {}
+    for label, with_schema in (("no schema", False), ("schema", True)):
+        clear_graph(driver)
+        drop_schema(driver)
+        if with_schema:
+            ensure_schema(driver)
+        loaded, elapsed = timed_load(driver, defects_file, batch_size, limit)
+        lookup_ms = timed_lookups(driver, defects_file, limit, lookups)
+        results[label] = (loaded, elapsed, lookup_ms)
+        print(f"{label:>10}: loaded {loaded} defects in {elapsed:.2f}s ({loaded / elapsed:.0f}/s), "
+              f"lookup {lookup_ms:.2f} ms")
+
+    before, after = results["no schema"], results["schema"]
+    print(f"📈 Load speedup {before[1] / after[1]:.1f}x, lookup speedup {before[2] / after[2]:.1f}x")
+    close_neo4j_driver()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare defect loading with and without Neo4j constraints.")
+    parser.add_argument("--file", default=DEFECTS_FILE)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--limit", type=int, help="Only load the first N defects.")
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--yes", action="store_true", help="Confirm that the graph may be wiped.")
+    args = parser.parse_args()
+
+    if not args.yes:
+        parser.error("this benchmark deletes all defects, tags and comments; pass --yes to continue")
+    run(args.file, args.batch_size, args.limit, args.lookups)
@@ -0,0 +1,71 @@
+# Run from the repo root: python -m scripts.bench_similarity --defects 1000 10000
+import argparse
+import time
+
+import numpy as np
+
+from utils.similarity_engine import SimilarityIndex
+
+
+def legacy_cosine_similarity(vec1, vec2):
+    v1 = np.array(vec1)
+    v2 = np.array(vec2)
+    if np.linalg.norm(v1) == 0 or np.linalg.norm(v2) == 0:
+        return 0.0
+    return float(np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2)))
+
+
+def legacy_find_similar_defects(query_embedding, defect_embeddings, threshold=0.8):
+    # Per-pair loop that find_similar_defects used before SimilarityIndex
+    similar = []
+    for defect in defect_embeddings:
+        score = legacy_cosine_similarity(query_embedding, defect["embedding"])
+        if score >= threshold:
+            similar.append({"defect_id": defect["defect_id"], "score": score})
+    return sorted(similar, key=lambda x: x["score"], reverse=True)
+
+
+def timed(fn, repeats):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    return (time.perf_counter() - started) / repeats, result
+
+
+def run(defects: int, dim: int, queries: int, top_k: int, threshold: float):
+    rng = np.random.default_rng(42)
+    vectors = rng.normal(size=(defects, dim)).astype(np.float32)
+    records = [{"defect_id": f"INS-{i}", "embedding": vectors[i].tolist()} for i in range(defects)]
+    query_vectors = rng.normal(size=(queries, dim)).astype(np.float32)
+    query_lists = [q.tolist() for q in query_vectors]
+
+    build_sec, index = timed(lambda: SimilarityIndex.from_records(records), 1)
+
+    loop_sec, _ = timed(
+        lambda: [legacy_find_similar_defects(q, records, threshold)[:top_k] for q in query_lists], 1
+    )
+    single_sec, _ = timed(
+        lambda: [index.search(q, top_k=top_k, threshold=threshold) for q in query_vectors], 3
+    )
+    batch_sec, _ = timed(
+        lambda: index.search_batch(query_vectors, top_k=top_k, threshold=threshold), 3
+    )
+
+    print(f"📊 {defects} defects x {dim} dims, {queries} queries, top_k={top_k}")
+    print(f"   index build:          {build_sec * 1000:9.1f} ms")
+    print(f"   legacy python loop:   {loop_sec * 1000 / queries:9.3f} ms/query")
+    print(f"   SimilarityIndex:      {single_sec * 1000 / queries:9.3f} ms/query ({loop_sec / single_sec:.0f}x)")
+    print(f"   SimilarityIndex batch:{batch_sec * 1000 / queries:9.3f} ms/query ({loop_sec / batch_sec:.0f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark in-process similarity search against the legacy loop.")
+    parser.add_argument("--defects", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=0.0)
+    args = parser.parse_args()
+
+    for size in args.defects:
+        run(size, args.dim, args.queries, args.top_k, args.threshold)
@@ -0,0 +1,118 @@
+# Run from the repo root against a Redis Stack instance:
+#   python -m scripts.bench_vector_index --vectors 20000 --ef-runtime 10 50 200
+import argparse
+import time
+
+import numpy as np
+from redis.commands.search.indexDefinition import IndexDefinition, IndexType
+from redis.commands.search.query import Query
+
+from config.redis_conn import get_redis_client
+from utils.redis_index_util import build_vector_field, VECTOR_DIM
+
+BENCH_PREFIX = "bench_vec:"
+
+
+def load_vectors(redis_conn, count: int, dim: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(count, dim)).astype(np.float32)
+
+    pipe = redis_conn.pipeline(transaction=False)
+    for i, vector in enumerate(vectors):
+        pipe.hset(f"{BENCH_PREFIX}{i}", mapping={"doc_id": str(i), "embedding": vector.tobytes()})
+        if i % 1000 == 999:
+            pipe.execute()
+    pipe.execute()
+    return vectors
+
+
+def create_index(redis_conn, name: str, algorithm: str, params: dict, capacity: int, dim: int):
+    try:
+        redis_conn.ft(name).dropindex(delete_documents=False)
+    except Exception:
+        pass
+
+    redis_conn.ft(name).create_index(
+        fields=[build_vector_field(algorithm, params, capacity, dim=dim)],
+        definition=IndexDefinition(prefix=[BENCH_PREFIX], index_type=IndexType.HASH)
+    )
+
+    # Wait for the background indexer to catch up before timing queries
+    while True:
+        info = redis_conn.ft(name).info()
+        if int(info.get("indexing", 0)) == 0:
+            return
+        time.sleep(0.5)
+
+
+def knn(redis_conn, name: str, vector: np.ndarray, k: int, ef_runtime: int = None) -> list[str]:
+    ef_clause = " EF_RUNTIME $ef_runtime" if ef_runtime else ""
+    query = (
+        Query(f"*=>[KNN {k} @embedding $vec_param{ef_clause} AS score]")
+        .sort_by("score")
+        .return_fields("doc_id")
+        .paging(0, k)
+        .dialect(2)
+    )
+    params = {"vec_param": vector.tobytes()}
+    if ef_runtime:
+        params["ef_runtime"] = ef_runtime
+    return [doc.doc_id for doc in redis_conn.ft(name).search(query, query_params=params).docs]
+
+
+def measure(redis_conn, name, queries, k, ef_runtime=None):
+    latencies, results = [], []
+    for vector in queries:
+        started = time.perf_counter()
+        results.append(knn(redis_conn, name, vector, k, ef_runtime))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return np.array(latencies), results
+
+
+def recall(expected: list[list[str]], actual: list[list[str]]) -> float:
+    found = sum(len(set(e) & set(a)) for e, a in zip(expected, actual))
+    total = sum(len(e) for e in expected)
+    return found / total if total else 0.0
+
+
+def run(args):
+    redis_conn = get_redis_client()
+    print(f"📥 Writing {args.vectors} vectors of dim {args.dim} under '{BENCH_PREFIX}'")
+    load_vectors(redis_conn, args.vectors, args.dim)
+
+    hnsw_params = {"M": args.m, "EF_CONSTRUCTION": args.ef_construction, "EF_RUNTIME": 10}
+    create_index(redis_conn, "bench_flat", "FLAT", {}, args.vectors, args.dim)
+    create_index(redis_conn, "bench_hnsw", "HNSW", hnsw_params, args.vectors, args.dim)
+
+    queries = np.random.default_rng(11).normal(size=(args.queries, args.dim)).astype(np.float32)
+
+    flat_ms, truth = measure(redis_conn, "bench_flat", queries, args.k)
+    print(f"\n{'index':<22}{'recall@' + str(args.k):>10}{'p50 ms':>10}{'p95 ms':>10}")
+    print(f"{'FLAT':<22}{1.0:>10.3f}{np.percentile(flat_ms, 50):>10.2f}{np.percentile(flat_ms, 95):>10.2f}")
+
+    for ef in args.ef_runtime:
+        hnsw_ms, found = measure(redis_conn, "bench_hnsw", queries, args.k, ef)
+        label = f"HNSW ef_runtime={ef}"
+        print(f"{label:<22}{recall(truth, found):>10.3f}{np.percentile(hnsw_ms, 50):>10.2f}{np.percentile(hnsw_ms, 95):>10.2f}")
+
+    if not args.keep:
+        for name in ("bench_flat", "bench_hnsw"):
+            redis_conn.ft(name).dropindex(delete_documents=False)
+        deleted = 0
+        for key in redis_conn.scan_iter(f"{BENCH_PREFIX}*", count=1000):
+            redis_conn.delete(key)
+            deleted += 1
+        print(f"\n🗑️ Removed benchmark indexes and {deleted} vectors")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare HNSW recall/latency against FLAT on the same vectors.")
+    parser.add_argument("--vectors", type=int, default=10000)
+    parser.add_argument("--dim", type=int, default=VECTOR_DIM)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--ef-runtime", type=int, nargs="+", default=[10, 50, 100, 200])
+    parser.add_argument("--keep", action="store_true", help="Keep benchmark indexes and vectors afterwards.")
+    run(parser.parse_args())
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+
+from utils.async_utils import BoundedExecutor, ServerBusyError
+
+
+def test_rejects_when_workers_and_queue_are_full():
+    executor = BoundedExecutor(max_concurrency=1, max_queue=1, name="test")
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(release.wait, 5))
+        queued = asyncio.ensure_future(executor.run(lambda: "queued"))
+        await asyncio.sleep(0.05)
+
+        assert executor.stats()["in_flight"] == 1
+        assert executor.stats()["queued"] == 1
+        try:
+            await executor.run(lambda: "rejected")
+            assert False, "expected ServerBusyError"
+        except ServerBusyError:
+            pass
+
+        release.set()
+        return await running, await queued
+
+    assert asyncio.run(scenario()) == (True, "queued")
+    assert executor.stats()["rejected"] == 1
+    executor.shutdown()
+    print("✅ Executor stats:", executor.stats())
+
+
+def test_cancelled_caller_keeps_the_slot_until_the_work_finishes():
+    executor = BoundedExecutor(max_concurrency=1, max_queue=0, name="test")
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        running.cancel()
+        await asyncio.sleep(0.05)
+
+        # The thread is still busy, so there is still no room
+        assert executor.stats()["in_flight"] == 1
+        try:
+            await executor.run(lambda: "rejected")
+            assert False, "expected ServerBusyError"
+        except ServerBusyError:
+            pass
+
+        release.set()
+        await asyncio.sleep(0.05)
+        assert executor.stats()["in_flight"] == 0
+        return await executor.run(lambda: "admitted")
+
+    assert asyncio.run(scenario()) == "admitted"
+    executor.shutdown()
+
+
+def test_work_cancelled_before_it_starts_frees_its_slot():
+    executor = BoundedExecutor(max_concurrency=1, max_queue=1, name="test")
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(release.wait, 5))
+        queued = asyncio.ensure_future(executor.run(lambda: "never"))
+        await asyncio.sleep(0.05)
+        queued.cancel()
+        await asyncio.sleep(0.05)
+
+        assert executor.stats()["queued"] == 0
+        release.set()
+        return await running
+
+    assert asyncio.run(scenario()) is True
+    assert executor.stats()["in_flight"] == 0
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    test_rejects_when_workers_and_queue_are_full()
+    test_cancelled_caller_keeps_the_slot_until_the_work_finishes()
+    test_work_cancelled_before_it_starts_frees_its_slot()
@@ -1,3 +1,5 @@
+import pytest
+
 from config.bedrock_client import get_bedrock_client
 from utils.bedrock_utils import generate_defect_embedding
 from utils.bedrock_utils import query_bedrock_chat
@@ -8,6 +10,40 @@ def test_embedding():
     embedding = generate_defect_embedding(client, text, model_id="amazon.titan-embed-text-v2:0")
     print("✅ Embedding vector length:", len(embedding))
 
+def test_embedding_does_not_retry_on_top_of_the_client():
+    class AccessDenied(Exception):
+        pass
+
+    class DeniedClient:
+        calls = 0
+
+        def invoke_model(self, **kwargs):
+            self.calls += 1
+            raise AccessDenied("not authorised")
+
+    client = DeniedClient()
+    with pytest.raises(AccessDenied):
+        generate_defect_embedding(client, "Test defect: nothing cached under this text")
+    assert client.calls == 1
+
+def test_chat_does_not_retry_on_top_of_the_client():
+    class Throttled(Exception):
+        pass
+
+    class ThrottledClient:
+        exceptions = type("exceptions", (), {"ThrottlingException": Throttled})
+        calls = 0
+
+        def invoke_model(self, **kwargs):
+            self.calls += 1
+            raise Throttled("Rate exceeded")
+
+    client = ThrottledClient()
+    with pytest.raises(Throttled):
+        query_bedrock_chat(client, "hi")
+    # botocore's adaptive retries already ran inside this one call
+    assert client.calls == 1
+
 def test_chat():
     client = get_bedrock_client()  # region where chat model is hosted
     prompt = "Hello, say hi!"
@@ -20,4 +56,6 @@ def test_chat():
 
 if __name__ == "__main__":
     test_embedding()
+    test_embedding_does_not_retry_on_top_of_the_client()
+    test_chat_does_not_retry_on_top_of_the_client()
     test_chat()
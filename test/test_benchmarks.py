@@ -0,0 +1,48 @@
+from benchmarks.harness import OfflineEnvironment, quiet, run_concurrent, synthetic_defects
+from benchmarks.run_benchmarks import compare
+
+
+def test_pipeline_runs_end_to_end_against_fakes():
+    from mcp_llm_api import process_user_comment
+
+    with OfflineEnvironment(embed_latency_ms=0, llm_latency_ms=0, jira_latency_ms=0, neo4j_latency_ms=0) as env, quiet():
+        env.seed_manifests()
+        result = process_user_comment(
+            "Create defect with title: Premium mismatch; description: Renewal premium differs; created_by: alice"
+        )
+
+    assert result["status"] == "success"
+    assert env.jira.counter["issues"] == 1
+
+
+def test_search_finds_seeded_defect():
+    from utils.semantic_utils import search_similar_defects
+
+    defects = synthetic_defects(50)
+    with OfflineEnvironment(embed_latency_ms=0, llm_latency_ms=0, jira_latency_ms=0, neo4j_latency_ms=0) as env, quiet():
+        env.seed_defects(defects)
+        hits = search_similar_defects(defects[7]["title"], top_k=3, threshold=0.5)
+
+    assert hits[0]["defect_id"] == defects[7]["defect_id"]
+    assert hits[0]["title"] == defects[7]["title"]
+
+
+def test_run_concurrent_and_compare():
+    result = run_concurrent(lambda item: None, list(range(20)), concurrency=4)
+    assert result["requests"] == 20
+    assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+
+    baseline = {"x": {"p95_ms": 10.0, "throughput_per_sec": 100.0}}
+    assert compare({"x": {"p95_ms": 12.0, "throughput_per_sec": 90.0}}, baseline, 0.3) == []
+    assert len(compare({"x": {"p95_ms": 20.0, "throughput_per_sec": 50.0}}, baseline, 0.3)) == 2
+    # A couple of milliseconds of jitter on a fast scenario is not a regression
+    fast = {"x": {"p95_ms": 2.0, "throughput_per_sec": 100.0}}
+    assert compare({"x": {"p95_ms": 6.0, "throughput_per_sec": 100.0}}, fast, 0.3) == []
+    assert len(compare({"x": {"p95_ms": 8.0, "throughput_per_sec": 100.0}}, fast, 0.3)) == 1
+
+
+if __name__ == "__main__":
+    test_pipeline_runs_end_to_end_against_fakes()
+    test_search_finds_seeded_defect()
+    test_run_concurrent_and_compare()
+    print("✅ benchmark harness tests passed")
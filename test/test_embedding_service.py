@@ -0,0 +1,36 @@
+from utils.cache_utils import LRUCache
+from utils.embedding_service import embedding_cache_key, normalise_text
+
+
+def test_cache_key_ignores_whitespace_noise():
+    a = embedding_cache_key("amazon.titan-embed-text-v2:0", "Login  page\nfails ")
+    b = embedding_cache_key("amazon.titan-embed-text-v2:0", "Login page fails")
+    assert a == b
+    assert normalise_text("  Login \t page ") == "Login page"
+    print("✅ Cache key:", a)
+
+
+def test_cache_key_separates_model_and_dimension():
+    text = "Fund price is wrong"
+    base = embedding_cache_key("amazon.titan-embed-text-v2:0", text)
+    assert base != embedding_cache_key("amazon.titan-embed-text-v1", text)
+    assert base != embedding_cache_key("amazon.titan-embed-text-v2:0", text, dimension=256)
+
+
+def test_lru_evicts_least_recently_used():
+    lru = LRUCache(maxsize=2)
+    lru.set("a", [1.0])
+    lru.set("b", [2.0])
+    assert lru.get("a") == [1.0]
+    lru.set("c", [3.0])
+
+    assert lru.get("b") is None
+    assert lru.get("a") == [1.0]
+    assert lru.get("c") == [3.0]
+    assert lru.stats()["entries"] == 2
+
+
+if __name__ == "__main__":
+    test_cache_key_ignores_whitespace_noise()
+    test_cache_key_separates_model_and_dimension()
+    test_lru_evicts_least_recently_used()
@@ -0,0 +1,58 @@
+import mcp_workflow.load_defect_embeddings as loader
+from benchmarks.fakes import FakeNeo4jDriver, FakeRedis
+
+
+def _defect(defect_id, description, updated_date, status="Open"):
+    return {"defect_id": defect_id, "title": "Login", "description": description,
+            "status": status, "updated_date": updated_date}
+
+
+def _stored(redis, key) -> dict:
+    return {k.decode(): v.decode() for k, v in redis.hgetall(key).items()}
+
+
+def test_sync_skips_updates_and_deletes(monkeypatch):
+    redis = FakeRedis()
+    driver = FakeNeo4jDriver()
+    for defect in [
+        _defect("INS-1", "unchanged", "2024-01-01"),
+        _defect("INS-2", "edited text", "2024-02-01"),
+        _defect("INS-3", "same text, new date", "2024-03-01"),
+        _defect("INS-4", "brand new", "2024-01-01"),
+        _defect("INS-5", "only the status moved", "2024-03-01", status="Closed"),
+    ]:
+        driver.graph.defects[defect["defect_id"]] = defect
+    embedded = []
+
+    monkeypatch.setattr(loader, "get_redis_client", lambda: redis)
+    monkeypatch.setattr(loader, "get_neo4j_driver", lambda: driver)
+    monkeypatch.setattr(loader, "create_vector_index", lambda token, expected_size=None: None)
+    monkeypatch.setattr(loader, "get_embeddings", lambda text: embedded.append(text) or [0.1, 0.2])
+    monkeypatch.setattr(loader, "get_defaults", lambda: {"embedding_loader": {"rate_per_sec": 0}})
+
+    prefix = loader.INDEX_CONFIGS["defect_embeddings_index"]["prefix"]
+    previous = {
+        "INS-1": _defect("INS-1", "unchanged", "2024-01-01"),
+        "INS-2": _defect("INS-2", "old text", "2024-01-01"),
+        "INS-3": _defect("INS-3", "same text, new date", "2024-01-01"),
+        "INS-5": _defect("INS-5", "only the status moved", "2024-01-01", status="Open"),
+        "INS-9": _defect("INS-9", "removed from Neo4j", "2024-01-01"),
+    }
+    for defect_id, defect in previous.items():
+        redis.hset(f"{prefix}{defect_id}", mapping=loader.defect_embedding_metadata(defect))
+
+    counts = loader.sync_embeddings_to_redis_defect("defect_embeddings_index", workers=2)
+
+    assert counts == {"skipped": 3, "updated": 2, "deleted": 1, "failed": 0}
+    assert sorted(embedded) == ["Login - brand new", "Login - edited text"]
+    assert not redis.hgetall(f"{prefix}INS-9")
+    assert _stored(redis, f"{prefix}INS-3")["updated_date"] == "2024-03-01"
+    # Same text, so no new vector, but the stored fields follow Neo4j
+    assert _stored(redis, f"{prefix}INS-5")["status"] == "Closed"
+
+    # A second run finds nothing to do
+    embedded.clear()
+    counts = loader.sync_embeddings_to_redis_defect("defect_embeddings_index", workers=2)
+    assert counts == {"skipped": 5, "updated": 0, "deleted": 0, "failed": 0}
+    assert embedded == []
+
@@ -0,0 +1,82 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from config.jira_conn import _build_session
+
+
+def _serve(responses: list):
+    """Local server that answers each POST with the next (delay, status, headers)."""
+    seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            delay, status, headers = responses[min(len(seen), len(responses) - 1)]
+            seen.append(status)
+            time.sleep(delay)
+            body = b'{"key": "TEST-1"}'
+            try:
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except OSError:
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, seen
+
+
+def _post(server, timeout=(1, 2)):
+    session = _build_session({"auth": None, "headers": {"Content-Type": "application/json"}})
+    try:
+        return session.post(f"http://127.0.0.1:{server.server_port}/rest/api/3/issue", data="{}", timeout=timeout)
+    finally:
+        session.close()
+
+
+def test_post_read_timeout_is_not_resent():
+    server, seen = _serve([(0.5, 201, {})])
+    try:
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            _post(server, timeout=(1, 0.1))
+        time.sleep(0.6)
+        assert len(seen) == 1
+    finally:
+        server.shutdown()
+
+
+def test_post_gateway_error_is_not_resent():
+    server, seen = _serve([(0, 502, {}), (0, 201, {})])
+    try:
+        assert _post(server).status_code == 502
+        assert seen == [502]
+    finally:
+        server.shutdown()
+
+
+def test_post_is_retried_on_503_with_retry_after():
+    server, seen = _serve([(0, 503, {"Retry-After": "0"}), (0, 201, {})])
+    try:
+        assert _post(server).status_code == 201
+        assert seen == [503, 201]
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_post_read_timeout_is_not_resent()
+    test_post_gateway_error_is_not_resent()
+    test_post_is_retried_on_503_with_retry_after()
+    print("✅ Jira retry tests passed")
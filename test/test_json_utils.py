@@ -0,0 +1,33 @@
+import json
+import tempfile
+
+from utils.json_utils import iter_json_array
+
+
+def test_streams_items_across_small_chunks():
+    items = [{"id": f"INS-{i}", "text": "comma, bracket ] and brace }"} for i in range(50)]
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(items, f, indent=2)
+        path = f.name
+
+    assert list(iter_json_array(path, chunk_size=7)) == items
+
+
+def test_matches_full_load_of_dataset():
+    path = "data/insurance_defects_detailed.json"
+    with open(path, "r", encoding="utf-8") as f:
+        expected = json.load(f)
+    assert list(iter_json_array(path, chunk_size=512)) == expected
+
+
+def test_empty_array():
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        f.write(" [ ] ")
+        path = f.name
+    assert list(iter_json_array(path)) == []
+
+
+if __name__ == "__main__":
+    test_streams_items_across_small_chunks()
+    test_matches_full_load_of_dataset()
+    test_empty_array()
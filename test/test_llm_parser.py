@@ -0,0 +1,80 @@
+from mcp_registry import get_manifest_registry
+from mcp_workflow.load_defect_embeddings import (
+    build_step_selection_tool,
+    parse_llm_output_multiple_states,
+    parse_step_selection_response,
+    STEP_SELECTION_TOOL_NAME,
+)
+
+TEXT_OUTPUT = """States:
+1.
+  Step Name: create_defect
+  Required Fields:
+  - title: Login Issue
+  - description: Cannot login
+  - created_by: Alice
+  allowed_next_steps: review_defect
+2.
+  Step Name: assign_defect
+  Required Fields:
+  - defect_id: 12345
+  - engineer_name: SupportTeam
+  Allowed Next Steps: close_defect
+Confirmation: Do you want to proceed with these actions?
+"""
+
+
+def test_text_parser_accepts_both_next_step_labels():
+    parsed = parse_llm_output_multiple_states(TEXT_OUTPUT)
+    first, second = parsed["States"]
+
+    assert first["Step Name"] == "create_defect"
+    assert first["Required Fields"]["created_by"] == "Alice"
+    assert first["Allowed Next Steps"] == "review_defect"
+    assert second["Allowed Next Steps"] == "close_defect"
+    assert parsed["Confirmation"] == "Do you want to proceed with these actions?"
+
+
+def test_tool_schema_comes_from_manifests():
+    tool = build_step_selection_tool()
+    state_schema = tool["input_schema"]["properties"]["states"]["items"]["properties"]
+
+    assert tool["name"] == STEP_SELECTION_TOOL_NAME
+    assert state_schema["step_name"]["enum"] == sorted(get_manifest_registry().manifests)
+    assert "engineer_name" in state_schema["required_fields"]["properties"]
+
+
+def test_tool_use_response_is_consumed_without_text_parsing():
+    result = {
+        "content": [{
+            "type": "tool_use",
+            "name": STEP_SELECTION_TOOL_NAME,
+            "input": {
+                "states": [{
+                    "step_name": "add_comment",
+                    "required_fields": {"defect_id": "1234", "comment_text": "Attaching logs"},
+                    "allowed_next_steps": ["update_status", "close_defect"],
+                }],
+                "similar_defect_search": False,
+            },
+        }]
+    }
+    parsed = parse_step_selection_response(result)
+    state = parsed["States"][0]
+
+    assert state["Step Name"] == "add_comment"
+    assert state["Required Fields"]["commenter_name"] == "Not Provided"
+    assert state["Allowed Next Steps"] == "update_status, close_defect"
+    assert parsed["SimilarDefect"] == "No"
+
+
+def test_text_response_falls_back_to_parser():
+    parsed = parse_step_selection_response({"content": [{"type": "text", "text": TEXT_OUTPUT}]})
+    assert [s["Step Name"] for s in parsed["States"]] == ["create_defect", "assign_defect"]
+
+
+if __name__ == "__main__":
+    test_text_parser_accepts_both_next_step_labels()
+    test_tool_schema_comes_from_manifests()
+    test_tool_use_response_is_consumed_without_text_parsing()
+    test_text_response_falls_back_to_parser()
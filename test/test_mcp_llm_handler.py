@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+import mcp_llm_handler
+from mcp_llm_handler import plan_step_dependencies, process_llm_states, StepExecutionError, STEP_FUNCTIONS
+from mcp_registry import get_manifest_registry
+
+
+def state(step_name, **fields):
+    return {"Step Name": step_name, "Required Fields": fields, "Allowed Next Steps": None}
+
+
+def test_missing_defect_id_waits_for_create_defect():
+    states = [
+        state("create_defect", title="Login", description="Cannot login", created_by="Alice"),
+        state("assign_defect", defect_id="Not Provided", engineer_name="ITTeam"),
+        state("add_comment", defect_id="D-2", comment_text="Logs attached", commenter_name="rahul"),
+    ]
+    deps = plan_step_dependencies(states, get_manifest_registry().manifests)
+    assert deps == [set(), {0}, set()]
+
+
+def test_independent_steps_run_concurrently_in_order():
+    started = []
+    barrier = threading.Barrier(2, timeout=5)
+
+    def slow_comment(context):
+        started.append(context["defect_id"])
+        barrier.wait()
+        time.sleep(0.05 if context["defect_id"] == "D-1" else 0)
+        return {"status": "success", "comment_text": context["comment_text"]}
+
+    original = STEP_FUNCTIONS["add_comment"]
+    STEP_FUNCTIONS["add_comment"] = slow_comment
+    try:
+        result = process_llm_states({"States": [
+            state("add_comment", defect_id="D-1", comment_text="first", commenter_name="a"),
+            state("add_comment", defect_id="D-2", comment_text="second", commenter_name="b"),
+        ]}, "YES")
+    finally:
+        STEP_FUNCTIONS["add_comment"] = original
+
+    # Both handlers were inside the barrier together, yet messages keep LLM order
+    assert sorted(started) == ["D-1", "D-2"]
+    assert result.index("first") < result.index("second")
+    print("✅ Result:", result)
+
+
+def test_dependent_step_sees_produced_defect_id():
+    seen = {}
+
+    def fake_raise(context):
+        return {"status": "success", "defect_id": "JIRA-7"}
+
+    def fake_assign(context):
+        seen.update(context)
+        return {"status": "success", "engineer_name": context["engineer_name"]}
+
+    originals = dict(STEP_FUNCTIONS)
+    STEP_FUNCTIONS.update({"create_defect": fake_raise, "assign_defect": fake_assign})
+    try:
+        result = process_llm_states({"States": [
+            state("create_defect", title="t", description="d", created_by="c"),
+            state("assign_defect", defect_id="Not Provided", engineer_name="ITTeam"),
+        ]}, "YES")
+    finally:
+        STEP_FUNCTIONS.update(originals)
+
+    assert seen["defect_id"] == "JIRA-7"
+    assert "missing" not in result
+
+
+def test_failed_step_reports_siblings_that_ran():
+    assigned = []
+
+    def failing_raise(context):
+        raise RuntimeError("Jira unavailable")
+
+    def fake_comment(context):
+        return {"status": "success", "comment_text": context["comment_text"]}
+
+    def fake_assign(context):
+        assigned.append(context)
+        return {"status": "success", "engineer_name": context["engineer_name"]}
+
+    originals = dict(STEP_FUNCTIONS)
+    STEP_FUNCTIONS.update({"create_defect": failing_raise, "add_comment": fake_comment, "assign_defect": fake_assign})
+    try:
+        # create_defect and add_comment share a level; assign_defect waits for create_defect
+        with pytest.raises(StepExecutionError) as excinfo:
+            process_llm_states({"States": [
+                state("create_defect", title="t", description="d", created_by="c"),
+                state("assign_defect", defect_id="Not Provided", engineer_name="ITTeam"),
+                state("add_comment", defect_id="D-2", comment_text="Logs attached", commenter_name="rahul"),
+            ]}, "YES")
+    finally:
+        STEP_FUNCTIONS.update(originals)
+
+    message = str(excinfo.value)
+    assert "`create_defect` failed: Jira unavailable" in message
+    assert "Executed `add_comment`" in message
+    assert "Not run after the failure: assign_defect" in message
+    assert assigned == []
+
+
+def test_missing_fields_are_reported():
+    result = mcp_llm_handler.process_llm_states({"States": [
+        state("update_status", defect_id="D-1", new_status="Not Provided"),
+    ]}, "YES")
+    assert "update_status" in result and "new_status" in result
+
+
+if __name__ == "__main__":
+    test_missing_defect_id_waits_for_create_defect()
+    test_independent_steps_run_concurrently_in_order()
+    test_dependent_step_sees_produced_defect_id()
+    test_failed_step_reports_siblings_that_ran()
+    test_missing_fields_are_reported()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import time
+
+from mcp_engine import MCPWorkflow
+from mcp_registry import ManifestRegistry, get_manifest_registry
+
+MANIFEST = """step: {step}
+actor: engineer
+intent: "Test step"
+input_required:
+  - defect_id
+allowed_next_steps:
+  - none
+llm_prompt_template: |
+  {text} {{{{ context.defect_id }}}}
+"""
+
+
+def write_manifest(folder, step, text):
+    path = os.path.join(folder, f"{step}.mcp.yml")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(MANIFEST.format(step=step, text=text))
+    return path
+
+
+def test_workflows_share_one_registry():
+    first = MCPWorkflow()
+    second = MCPWorkflow()
+    assert first.registry is second.registry is get_manifest_registry("mcp_manifests")
+    assert "create_defect" in first.manifests
+
+    first.start("close_defect", initial_context={"defect_id": "D-1"})
+    assert "D-1" in first.generate_prompt()
+
+
+def test_reloads_only_changed_files():
+    with tempfile.TemporaryDirectory() as folder:
+        path = write_manifest(folder, "close_defect", "Closing")
+        registry = ManifestRegistry(folder, check_interval_sec=0)
+        template = registry.get_template("close_defect")
+        assert template.render(context={"defect_id": "D-9"}).strip() == "Closing D-9"
+
+        # Unchanged files keep their compiled template
+        assert registry.get_template("close_defect") is template
+
+        write_manifest(folder, "close_defect", "Resolving")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert registry.get_template("close_defect").render(context={"defect_id": "D-9"}).strip() == "Resolving D-9"
+
+
+def test_invalid_reload_keeps_previous_manifest():
+    with tempfile.TemporaryDirectory() as folder:
+        path = write_manifest(folder, "close_defect", "Closing")
+        registry = ManifestRegistry(folder, check_interval_sec=0)
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("step: close_defect\n")
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+
+        assert registry.get("close_defect")["input_required"] == ["defect_id"]
+
+
+if __name__ == "__main__":
+    test_workflows_share_one_registry()
+    test_reloads_only_changed_files()
+    test_invalid_reload_keeps_previous_manifest()
@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+from prometheus_client import REGISTRY
+
+from utils.metrics import observe_stage, _count_throttle, _count_retries, _remember_model_id
+
+MODEL_ID = "anthropic.claude-3-haiku-20240307-v1:0"
+
+
+def _value(name, labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_observe_stage_records_latency_and_errors():
+    labels = {"stage": "step", "step": "assign_defect", "model_id": ""}
+    before = _value("mcp_stage_latency_seconds_count", labels)
+
+    with observe_stage("step", step="assign_defect"):
+        pass
+    try:
+        with observe_stage("step", step="assign_defect"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+
+    assert _value("mcp_stage_latency_seconds_count", labels) == before + 2
+    assert _value("mcp_stage_errors_total", labels) >= 1
+    assert _value("mcp_stage_in_flight", labels) == 0
+
+
+def test_bedrock_hooks_count_throttles_and_retries():
+    context = {}
+    _remember_model_id(params={"modelId": MODEL_ID}, context=context)
+    operation = SimpleNamespace(name="InvokeModel")
+    labels = {"operation": "InvokeModel", "model_id": MODEL_ID}
+    throttles = _value("mcp_bedrock_throttles_total", labels)
+    retries = _value("mcp_bedrock_retries_total", labels)
+
+    throttled = (None, {"Error": {"Code": "ThrottlingException"}})
+    assert _count_throttle(request_dict={"context": context}, response=throttled, operation=operation) is None
+    _count_retries(parsed={"ResponseMetadata": {"RetryAttempts": 2}}, model=operation, context=context)
+
+    assert _value("mcp_bedrock_throttles_total", labels) == throttles + 1
+    assert _value("mcp_bedrock_retries_total", labels) == retries + 2
+
+
+if __name__ == "__main__":
+    test_observe_stage_records_latency_and_errors()
+    test_bedrock_hooks_count_throttles_and_retries()
+    print("✅ metrics tests passed")
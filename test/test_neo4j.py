@@ -1,4 +1,4 @@
-from config.neo4j_conn import get_neo4j_driver
+from config.neo4j_conn import get_neo4j_driver, close_neo4j_driver
 
 def test_neo4j_connection():
     driver = get_neo4j_driver()
@@ -7,7 +7,7 @@ def test_neo4j_connection():
         val = result.single()["test"]
         assert val == 1
         print("✅ Neo4j connection test passed!")
-    driver.close()
+    close_neo4j_driver()
 
 if __name__ == "__main__":
     test_neo4j_connection()
@@ -0,0 +1,92 @@
+import utils.semantic_utils as semantic_utils
+from benchmarks.fakes import FakeNeo4jDriver
+from utils.request_context import request_cache_report
+from utils.neo4j_utils import comment_id, count_defects, fetch_defect_versions_page, fetch_defects_page, iter_all_defects
+
+
+def _driver(ids) -> FakeNeo4jDriver:
+    driver = FakeNeo4jDriver()
+    for defect_id in ids:
+        driver.graph.defects[defect_id] = {"defect_id": defect_id}
+    return driver
+
+
+def test_iter_all_defects_pages_by_cursor():
+    ids = [f"INS-{i:04d}" for i in range(25)]
+    driver = _driver(ids)
+
+    streamed = [d["defect_id"] for d in iter_all_defects(driver, page_size=10)]
+    assert streamed == ids
+    # 10 + 10 + 5: the short page ends the export
+    assert driver.reads == 3
+
+
+def test_iter_all_defects_resumes_after_cursor():
+    ids = [f"INS-{i:04d}" for i in range(25)]
+    streamed = [d["defect_id"] for d in iter_all_defects(_driver(ids), page_size=10, after="INS-0019")]
+    assert streamed == ids[20:]
+
+
+class RecordingTx:
+    def __init__(self):
+        self.queries = []
+
+    def run(self, query, **params):
+        self.queries.append(query)
+        return FakeRecordResult()
+
+
+class FakeRecordResult(list):
+    def single(self):
+        return {"total": 0}
+
+
+def test_page_queries_keep_the_cursor_index_friendly():
+    tx = RecordingTx()
+    for fetch in (fetch_defects_page, fetch_defect_versions_page):
+        fetch(tx, None, 10)
+        fetch(tx, "INS-0009", 10)
+    count_defects(tx)
+    count_defects(tx, "INS-0009")
+
+    first_pages, later_pages = tx.queries[0::2], tx.queries[1::2]
+    # An "IS NULL OR" disjunction would defeat the defect_id range seek
+    assert all("IS NULL" not in q for q in tx.queries)
+    assert all("WHERE" not in q for q in first_pages)
+    assert all("WHERE d.defect_id > $after" in q for q in later_pages)
+
+
+def test_fetch_defect_records_batches_and_caches(monkeypatch):
+    driver = _driver(["INS-1", "INS-2", "INS-3"])
+    monkeypatch.setattr(semantic_utils, "get_neo4j_driver", lambda: driver)
+    monkeypatch.setattr(semantic_utils, "get_defaults", lambda: {"defect_record_cache_ttl_sec": 30})
+    semantic_utils._defect_records.invalidate()
+
+    records = semantic_utils.fetch_defect_records(["INS-3", "INS-9", "INS-1"])
+    assert list(records) == ["INS-3", "INS-1"]
+    assert driver.reads == 1
+
+    # Cached ids need no second round-trip
+    with request_cache_report() as report:
+        semantic_utils.fetch_defect_records(["INS-1", "INS-3"])
+    assert driver.reads == 1
+    assert report == {"defect_records": "hit"}
+
+    # No ids, no lookup: the cache is not credited with a hit
+    with request_cache_report() as report:
+        assert semantic_utils.fetch_defect_records([]) == {}
+    assert report == {}
+    assert driver.reads == 1
+
+
+def test_comment_id_is_stable():
+    assert comment_id("amy", "Looks fixed", "2024-01-01") == comment_id("amy", "Looks fixed", "2024-01-01")
+    assert comment_id("amy", "Looks fixed", "2024-01-01") != comment_id("amy", "Looks fixed", "2024-01-02")
+
+
+if __name__ == "__main__":
+    test_iter_all_defects_pages_by_cursor()
+    test_iter_all_defects_resumes_after_cursor()
+    test_page_queries_keep_the_cursor_index_friendly()
+    test_comment_id_is_stable()
+    print("✅ neo4j utils tests passed")
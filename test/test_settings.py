@@ -0,0 +1,69 @@
+from config.settings import load_app_config, get_settings_cache_stats, clear_settings_cache
+from utils.cache_utils import TTLCache
+
+
+def test_config_is_parsed_once():
+    clear_settings_cache()
+    first = load_app_config()
+    second = load_app_config()
+    stats = get_settings_cache_stats()
+
+    assert first is second
+    assert stats["hits"] >= 1
+    assert stats["entries"] == 1
+    print("✅ Config cache stats:", stats)
+
+
+def test_ttl_cache_does_not_store_failed_loads():
+    cache = TTLCache(ttl_sec=60)
+    calls = []
+
+    def failing_loader():
+        calls.append(1)
+        return None
+
+    assert cache.get_or_load("secret", failing_loader) is None
+    assert cache.get_or_load("secret", failing_loader) is None
+    assert len(calls) == 2
+
+    assert cache.get_or_load("secret", lambda: {"k": "v"}) == {"k": "v"}
+    assert cache.get_or_load("secret", failing_loader) == {"k": "v"}
+    print("✅ TTL cache stats:", cache.stats())
+
+
+def test_ttl_cache_expiry_and_refresh():
+    cache = TTLCache(ttl_sec=0)
+    counter = {"n": 0}
+
+    def loader():
+        counter["n"] += 1
+        return counter["n"]
+
+    assert cache.get_or_load("k", loader) == 1
+    assert cache.get_or_load("k", loader) == 2
+
+    cache.ttl_sec = 60
+    cache.refresh_all()
+    assert cache.get("k") == 3
+    assert cache.stats()["refreshes"] == 1
+
+
+def test_ttl_cache_drops_expired_entries_and_stays_bounded():
+    cache = TTLCache(ttl_sec=0)
+    for n in range(100):
+        cache.set(f"stale-{n}", n)
+    # Nothing read them back, yet expired entries do not pile up
+    assert cache.stats()["entries"] == 0
+
+    cache = TTLCache(ttl_sec=60, maxsize=3)
+    for n in range(5):
+        cache.set(n, n)
+    assert cache.stats()["entries"] == 3
+    assert cache.get(0) is None and cache.get(4) == 4
+
+
+if __name__ == "__main__":
+    test_config_is_parsed_once()
+    test_ttl_cache_does_not_store_failed_loads()
+    test_ttl_cache_expiry_and_refresh()
+    test_ttl_cache_drops_expired_entries_and_stays_bounded()
@@ -0,0 +1,47 @@
+import numpy as np
+
+from utils.similarity_engine import SimilarityIndex
+
+
+def brute_force(query, ids, vectors, threshold):
+    scored = []
+    for defect_id, vec in zip(ids, vectors):
+        norm = np.linalg.norm(query) * np.linalg.norm(vec)
+        score = float(np.dot(query, vec) / norm) if norm else 0.0
+        if score >= threshold:
+            scored.append((defect_id, score))
+    return sorted(scored, key=lambda x: x[1], reverse=True)
+
+
+def test_top_k_matches_brute_force():
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(500, 64))
+    ids = [f"INS-{i}" for i in range(500)]
+    index = SimilarityIndex(ids, vectors)
+
+    query = rng.normal(size=64)
+    expected = brute_force(query, ids, vectors, threshold=-1.0)[:10]
+    hits = index.search(query, top_k=10)
+
+    assert [h["defect_id"] for h in hits] == [e[0] for e in expected]
+    assert np.allclose([h["score"] for h in hits], [e[1] for e in expected], atol=1e-5)
+    print("✅ Top hit:", hits[0])
+
+
+def test_threshold_and_batch_queries():
+    ids = ["A", "B", "C"]
+    index = SimilarityIndex(ids, [[1, 0], [0.8, 0.6], [0, 0]])
+
+    exact, orthogonal = index.search_batch([[1, 0], [0, 1]], top_k=3, threshold=0.5)
+    assert [h["defect_id"] for h in exact] == ["A", "B"]
+    assert [h["defect_id"] for h in orthogonal] == ["B"]
+
+
+def test_empty_index():
+    assert SimilarityIndex().search([1.0, 0.0], top_k=3) == []
+
+
+if __name__ == "__main__":
+    test_top_k_matches_brute_force()
+    test_threshold_and_batch_queries()
+    test_empty_index()
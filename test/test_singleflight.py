@@ -0,0 +1,130 @@
+import json
+import threading
+import time
+
+from prometheus_client import REGISTRY
+
+import utils.singleflight as singleflight
+from benchmarks.fakes import FakeRedis
+from utils.singleflight import LOCK_PREFIX, RESULT_PREFIX, SingleFlight
+
+
+def _deduplicated(call: str, scope: str) -> float:
+    return REGISTRY.get_sample_value("mcp_singleflight_deduplicated_total", {"call": call, "scope": scope}) or 0.0
+
+
+def _wait_for_waiters(group: SingleFlight, key: str, count: int):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        call = group._calls.get(key)
+        if call is not None and call.waiters >= count:
+            return
+        time.sleep(0.005)
+    raise AssertionError("followers never joined the in-flight call")
+
+
+def test_concurrent_identical_calls_share_one_invocation():
+    group = SingleFlight("test_share")
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return [0.1, 0.2]
+
+    before = _deduplicated("test_share", "process")
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(group.do("k", fn))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    _wait_for_waiters(group, "k", 7)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [[0.1, 0.2]] * 8
+    assert _deduplicated("test_share", "process") - before == 7
+    # Once the call finished the next caller starts a new one
+    group.do("k", fn)
+    assert len(calls) == 2
+
+
+def test_followers_receive_the_leaders_error():
+    group = SingleFlight("test_error")
+    release = threading.Event()
+    errors = []
+
+    def fn():
+        release.wait(5)
+        raise RuntimeError("throttled")
+
+    def call():
+        try:
+            group.do("k", fn)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for t in threads:
+        t.start()
+    _wait_for_waiters(group, "k", 2)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert errors == ["throttled"] * 3
+
+
+def test_redis_mode_waits_for_another_workers_result():
+    redis = FakeRedis()
+    original = singleflight.get_redis_client
+    singleflight.get_redis_client = lambda: redis
+    try:
+        group = SingleFlight("test_redis")
+        # Another worker holds the lock and publishes its result shortly after
+        redis.set(f"{LOCK_PREFIX}test_redis:k", "other-worker", px=5000)
+        # A result left behind by an earlier leader must not be picked up
+        redis.set(f"{RESULT_PREFIX}test_redis:k:stale-worker", json.dumps({"states": ["stale"]}))
+        threading.Timer(0.1, lambda: redis.set(f"{RESULT_PREFIX}test_redis:k:other-worker", json.dumps({"states": []}))).start()
+
+        before = _deduplicated("test_redis", "redis")
+        result = group.do("k", lambda: {"states": ["called"]}, mode="redis")
+        assert result == {"states": []}
+        assert _deduplicated("test_redis", "redis") - before == 1
+
+        # As leader it publishes the result and releases its lock
+        assert group.do("k2", lambda: {"states": ["mine"]}, mode="redis") == {"states": ["mine"]}
+        published = [k for k in redis.strings if k.startswith(f"{RESULT_PREFIX}test_redis:k2:")]
+        assert len(published) == 1
+        assert json.loads(redis.get(published[0])) == {"states": ["mine"]}
+        assert redis.get(f"{LOCK_PREFIX}test_redis:k2") is None
+    finally:
+        singleflight.get_redis_client = original
+
+
+def test_redis_mode_does_not_share_unpublishable_results():
+    redis = FakeRedis()
+    original = singleflight.get_redis_client
+    singleflight.get_redis_client = lambda: redis
+    try:
+        group = SingleFlight("test_publish")
+        result = group.do("k", lambda: {"states": []}, mode="redis", publish=lambda r: bool(r["states"]))
+        assert result == {"states": []}
+        assert not [k for k in redis.strings if k.startswith(RESULT_PREFIX)]
+
+        # A follower whose leader published nothing makes its own call
+        redis.set(f"{LOCK_PREFIX}test_publish:k", "other-worker", px=5000)
+        threading.Timer(0.1, lambda: redis.delete(f"{LOCK_PREFIX}test_publish:k")).start()
+        assert group.do("k", lambda: {"states": ["own"]}, mode="redis") == {"states": ["own"]}
+    finally:
+        singleflight.get_redis_client = original
+
+
+if __name__ == "__main__":
+    test_concurrent_identical_calls_share_one_invocation()
+    test_followers_receive_the_leaders_error()
+    test_redis_mode_waits_for_another_workers_result()
+    test_redis_mode_does_not_share_unpublishable_results()
+    print("✅ single-flight tests passed")
@@ -0,0 +1,82 @@
+import copy
+
+from benchmarks.harness import OfflineEnvironment, quiet
+from mcp_registry import get_manifest_registry
+from mcp_workflow.load_defect_embeddings import (
+    STEP_SELECTION_CACHE_PREFIX,
+    call_claude_for_step_selection,
+    is_cacheable_selection,
+    step_selection_cache_key,
+)
+
+MODEL = "anthropic.claude-3-haiku-20240307-v1:0"
+CANDIDATES = [
+    {"manifest_id": "create_defect", "description": "Raise a new defect"},
+    {"manifest_id": "assign_defect", "description": "Assign a defect"},
+]
+COMMENT = "Create defect with title: Login fails; description: 500 on submit; created_by: alice"
+
+
+def _offline():
+    return OfflineEnvironment(embed_latency_ms=0, llm_latency_ms=0, jira_latency_ms=0, neo4j_latency_ms=0)
+
+
+def _cached_keys(env) -> list:
+    return [k for k in env.redis.strings if k.startswith(STEP_SELECTION_CACHE_PREFIX)]
+
+
+def test_cache_key_covers_comment_model_and_manifest_version():
+    manifests = copy.deepcopy(get_manifest_registry().manifests)
+    key = step_selection_cache_key(COMMENT, CANDIDATES, MODEL, "tool_use", manifests)
+
+    # Whitespace noise and candidate order do not matter
+    assert key == step_selection_cache_key(f"  {COMMENT.replace(' ', '  ')}\n", CANDIDATES[::-1], MODEL, "tool_use", manifests)
+    assert key != step_selection_cache_key(COMMENT, CANDIDATES, "anthropic.claude-3-sonnet", "tool_use", manifests)
+    assert key != step_selection_cache_key(COMMENT, CANDIDATES, MODEL, "text", manifests)
+
+    manifests["create_defect"]["input_required"] = manifests["create_defect"]["input_required"] + ["severity"]
+    assert key != step_selection_cache_key(COMMENT, CANDIDATES, MODEL, "tool_use", manifests)
+
+
+def test_hit_skips_bedrock():
+    with _offline() as env, quiet():
+        first = call_claude_for_step_selection(COMMENT, CANDIDATES)
+        second = call_claude_for_step_selection(COMMENT, CANDIDATES)
+
+    assert env.bedrock.calls["llm"] == 1
+    assert second == first
+    assert second["States"][0]["Step Name"] == "create_defect"
+
+
+def test_bypass_cache_calls_bedrock_and_does_not_store():
+    from mcp_llm_api import process_user_comment
+
+    with _offline() as env, quiet():
+        env.seed_manifests()
+        first = process_user_comment(COMMENT, bypass_cache=True)
+        second = process_user_comment(COMMENT, bypass_cache=True)
+        stored = _cached_keys(env)
+
+    assert env.bedrock.calls["llm"] == 2
+    assert first["cache"] == second["cache"] == {"step_selection": "bypass"}
+    assert stored == []
+
+
+def test_empty_selection_is_not_cached():
+    with _offline() as env, quiet():
+        # No step keyword, so the stub returns no states
+        call_claude_for_step_selection("hello there", CANDIDATES)
+        call_claude_for_step_selection("hello there", CANDIDATES)
+        stored = _cached_keys(env)
+
+    assert stored == []
+    assert env.bedrock.calls["llm"] == 2
+    assert not is_cacheable_selection({"States": [{"Step Name": None}]})
+
+
+if __name__ == "__main__":
+    test_cache_key_covers_comment_model_and_manifest_version()
+    test_hit_skips_bedrock()
+    test_bypass_cache_calls_bedrock_and_does_not_store()
+    test_empty_selection_is_not_cached()
+    print("✅ step selection cache tests passed")
@@ -0,0 +1,60 @@
+import json
+import queue
+
+import mcp_llm_api
+from utils.bedrock_utils import read_claude_stream
+
+
+def _chunk(event):
+    return {"chunk": {"bytes": json.dumps(event).encode("utf-8")}}
+
+
+def test_read_claude_stream_rebuilds_text_and_tool_use():
+    events = [
+        {"type": "message_start", "message": {"id": "msg_1", "role": "assistant", "content": []}},
+        {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+        {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": "Picking "}},
+        {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": "steps"}},
+        {"type": "content_block_stop", "index": 0},
+        {"type": "content_block_start", "index": 1,
+         "content_block": {"type": "tool_use", "id": "tu_1", "name": "select_workflow_steps", "input": {}}},
+        {"type": "content_block_delta", "index": 1, "delta": {"type": "input_json_delta", "partial_json": '{"states": ['}},
+        {"type": "content_block_delta", "index": 1, "delta": {"type": "input_json_delta", "partial_json": ']}'}},
+        {"type": "content_block_stop", "index": 1},
+        {"type": "message_delta", "delta": {"stop_reason": "tool_use"}},
+        {"type": "message_stop"},
+    ]
+    fragments = []
+    message = read_claude_stream({"body": [_chunk(e) for e in events]}, on_delta=fragments.append)
+
+    assert message["content"][0]["text"] == "Picking steps"
+    assert message["content"][1]["input"] == {"states": []}
+    assert message["stop_reason"] == "tool_use"
+    assert fragments == ["Picking ", "steps", '{"states": [', ']}']
+
+
+def test_stream_user_comment_emits_events_then_done(monkeypatch):
+    def fake_map(user_comment, use_cache=True, on_event=None):
+        on_event("candidates", {"candidates": ["create_defect"]})
+        on_event("token", {"text": "create"})
+        return {"States": []}
+
+    def fake_process(llm_output, confirmation, on_step_result=None):
+        on_step_result(0, "create_defect", {"defect_id": "INS-1"}, "✅ Executed")
+        return "done"
+
+    monkeypatch.setattr(mcp_llm_api, "map_comment_to_states", fake_map)
+    monkeypatch.setattr(mcp_llm_api, "process_llm_states", fake_process)
+
+    events = queue.Queue()
+    mcp_llm_api.stream_user_comment("Create a defect", "YES", events)
+    lines = [json.loads(line) for line in mcp_llm_api.iter_ndjson_events(events)]
+
+    assert [e["event"] for e in lines] == ["candidates", "token", "states", "step_result", "done"]
+    assert lines[3]["result"] == {"defect_id": "INS-1"}
+    assert lines[-1]["status"] == "success"
+    print("✅ Streamed events:", [e["event"] for e in lines])
+
+
+if __name__ == "__main__":
+    test_read_claude_stream_rebuilds_text_and_tool_use()
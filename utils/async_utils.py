@@ -0,0 +1,75 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ServerBusyError(Exception):
+    """Raised when a BoundedExecutor has no free worker and its queue is full."""
+
+
+class BoundedExecutor:
+    """
+    Runs blocking callables on a fixed thread pool from async code.
+
+    At most ``max_concurrency`` calls run at once and up to ``max_queue`` more
+    may wait for a worker; anything beyond that is rejected immediately with
+    ServerBusyError so the caller can answer 503 instead of piling up work.
+    Admission is counted on the event loop thread, so no lock is needed.
+    """
+
+    def __init__(self, max_concurrency: int = 8, max_queue: int = 32, name: str = "pipeline"):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=name)
+        self._pending = 0
+        self.rejected = 0
+
+    def submit(self, fn, *args, **kwargs) -> asyncio.Future:
+        """
+        Admit ``fn`` and schedule it without awaiting the result, e.g. when a
+        streaming response reads its output. Must be called on the event loop.
+        """
+        if self._pending >= self.max_concurrency + self.max_queue:
+            self.rejected += 1
+            raise ServerBusyError(f"{self._pending} requests already in flight or queued")
+
+        self._pending += 1
+        loop = asyncio.get_running_loop()
+
+        def work():
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                # Free the slot when the thread is done, not when the awaiting
+                # request goes away: a cancelled caller does not stop the work
+                self._release_soon(loop)
+
+        inner = self._executor.submit(work)
+        # Work cancelled before it started never reaches the finally above
+        inner.add_done_callback(lambda f: f.cancelled() and self._release_soon(loop))
+        return asyncio.wrap_future(inner, loop=loop)
+
+    def _release_soon(self, loop):
+        # Hop back to the loop thread so the counter stays single-threaded
+        try:
+            loop.call_soon_threadsafe(self._release_slot)
+        except RuntimeError:
+            # The loop has already closed during shutdown
+            pass
+
+    def _release_slot(self):
+        self._pending -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        return await self.submit(fn, *args, **kwargs)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": min(self._pending, self.max_concurrency),
+            "queued": max(self._pending - self.max_concurrency, 0),
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
@@ -1,72 +1,43 @@
 import json
-import time
-import boto3
 import logging
 
+from config.bedrock_client import get_bedrock_client as get_shared_bedrock_client
+from utils.embedding_service import get_embedding, invoke_titan_embedding
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def get_bedrock_client(region: str = "eu-west-1"):
-    # Create Bedrock client
-    client = boto3.client("bedrock-runtime", region_name=region)
-
-    # Log AWS caller identity for debugging credentials/permissions
-    try:
-        sts = boto3.client("sts", region_name=region)
-        identity = sts.get_caller_identity()
-        #logger.info(f"AWS Caller Identity: {identity}")
-    except Exception as e:
-        logger.warning(f"Could not get AWS caller identity: {e}")
-
-    return client
+    # Shared, cached client with pooled connections and adaptive retries
+    return get_shared_bedrock_client(region)
 
 def generate_defect_embedding(
     bedrock_client,
     text: str,
     model_id: str = "amazon.titan-embed-text-v2:0",
-    input_key: str = "inputText",
-    retries: int = 3,
-    sleep_seconds: float = 1.0
+    input_key: str = "inputText"
 ) -> list[float]:
     """
     Generate embedding vector from text using Bedrock embedding model.
+    Results are shared through the content-addressed embedding cache.
+    Throttling is retried by the client itself, so errors are raised as-is.
     """
-    payload = {input_key: text}
-
-    for attempt in range(retries):
-        try:
-            logger.info(f"Embedding attempt {attempt + 1} for model {model_id}")
-            response = bedrock_client.invoke_model(
-                modelId=model_id,
-                contentType="application/json",
-                accept="application/json",
-                body=json.dumps(payload)
-            )
-            raw = response['body'].read()
-            result = json.loads(raw)
-            embedding = result.get("embedding")
-            if embedding:
-                return embedding
-            else:
-                raise Exception("Embedding missing in response")
-        except Exception as e:
-            logger.error(f"Embed attempt {attempt + 1} failed: {e}")
-            time.sleep(sleep_seconds)
+    def compute(normalised_text: str) -> list[float]:
+        return invoke_titan_embedding(normalised_text, model_id, bedrock_client=bedrock_client, input_key=input_key)
 
-    raise Exception("Embedding generation failed after retries")
+    return get_embedding(text, model_id=model_id, compute=compute)
 
 def query_bedrock_chat(
     bedrock_client,
     prompt: str,
     model_id: str = "anthropic.claude-3-haiku-20240307-v1:0",
     max_tokens: int = 1000,
-    max_retries: int = 5,
-    anthropic_version: str = "bedrock-2023-05-31",
-    sleep_seconds: float = 1.0
+    anthropic_version: str = "bedrock-2023-05-31"
 ):
     """
     Query Bedrock chat model (Claude or similar).
+    Throttling is retried by the client's adaptive retry mode, not here.
     """
     logger.info(f"Querying Bedrock chat with model_id={model_id}, max_tokens={max_tokens}")
     body = {
@@ -75,24 +46,71 @@ def query_bedrock_chat(
         "anthropic_version": anthropic_version
     }
 
-    for attempt in range(max_retries):
-        try:
-            response = bedrock_client.invoke_model(
-                modelId=model_id,
-                contentType="application/json",
-                accept="application/json",
-                body=json.dumps(body)
-            )
-            return response
-        except bedrock_client.exceptions.ThrottlingException:
-            wait = 2 ** attempt
-            logger.warning(f"Throttled, retrying in {wait}s (attempt {attempt + 1})")
-            time.sleep(wait)
-        except Exception as e:
-            logger.error(f"Bedrock call failed: {e}", exc_info=True)
-            raise
-
-    raise Exception("Max Bedrock retries exceeded")
+    try:
+        return bedrock_client.invoke_model(
+            modelId=model_id,
+            contentType="application/json",
+            accept="application/json",
+            body=json.dumps(body)
+        )
+    except Exception as e:
+        logger.error(f"Bedrock call failed: {e}", exc_info=True)
+        raise
+
+def read_claude_stream(response, on_delta=None) -> dict:
+    """
+    Rebuild the invoke_model response body from invoke_model_with_response_stream
+    events. ``on_delta(text)`` receives each text or tool-input JSON fragment as it arrives.
+    """
+    message = {"content": []}
+    partial_json = {}
+
+    for event in response["body"]:
+        chunk = event.get("chunk")
+        if not chunk:
+            continue
+        data = json.loads(chunk["bytes"])
+        event_type = data.get("type")
+
+        if event_type == "message_start":
+            message.update({k: v for k, v in data.get("message", {}).items() if k != "content"})
+        elif event_type == "content_block_start":
+            message["content"].append(dict(data.get("content_block", {})))
+        elif event_type == "content_block_delta":
+            index = data.get("index", len(message["content"]) - 1)
+            block = message["content"][index]
+            delta = data.get("delta", {})
+            if delta.get("type") == "text_delta":
+                fragment = delta.get("text", "")
+                block["text"] = block.get("text", "") + fragment
+            elif delta.get("type") == "input_json_delta":
+                fragment = delta.get("partial_json", "")
+                partial_json[index] = partial_json.get(index, "") + fragment
+            else:
+                continue
+            if on_delta and fragment:
+                on_delta(fragment)
+        elif event_type == "content_block_stop":
+            index = data.get("index", len(message["content"]) - 1)
+            if index in partial_json:
+                message["content"][index]["input"] = json.loads(partial_json.pop(index) or "{}")
+        elif event_type == "message_delta":
+            message.update(data.get("delta", {}))
+
+    return message
+
+def query_bedrock_chat_stream(bedrock_client, body: dict, model_id: str, on_delta=None) -> dict:
+    """
+    Streaming counterpart of query_bedrock_chat; returns the assembled response body.
+    """
+    logger.info(f"Streaming Bedrock chat with model_id={model_id}")
+    response = bedrock_client.invoke_model_with_response_stream(
+        modelId=model_id,
+        contentType="application/json",
+        accept="application/json",
+        body=json.dumps(body)
+    )
+    return read_claude_stream(response, on_delta)
 
 def call_llm(
     prompt: str,
@@ -0,0 +1,166 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Thread-safe in-memory cache whose entries expire after ``ttl_sec``.
+
+    Each entry remembers the loader that produced it so ``refresh_all`` can
+    reload values in the background before they expire. Expired entries are
+    dropped as new ones are set, and ``maxsize`` (if given) caps the entry
+    count by evicting the oldest.
+    """
+
+    def __init__(self, ttl_sec: float = 300, maxsize: int = None):
+        self.ttl_sec = ttl_sec
+        self.maxsize = maxsize
+        # Insertion order, so the oldest (usually first to expire) entries come first
+        self._entries = OrderedDict()
+        self._loaders = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+            if entry:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, ttl_sec: float = None):
+        now = time.monotonic()
+        expires_at = now + (ttl_sec if ttl_sec is not None else self.ttl_sec)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, expires_at)
+            self._purge(now)
+
+    def _purge(self, now: float):
+        # Caller holds the lock. Entries are in insertion order, so expired ones
+        # cluster at the front and the scan stops at the first live entry
+        while self._entries:
+            key, (_, expires_at) = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            del self._entries[key]
+        if self.maxsize:
+            while len(self._entries) > self.maxsize:
+                key, _ = self._entries.popitem(last=False)
+                self._loaders.pop(key, None)
+
+    def get_or_load(self, key, loader):
+        """
+        Return the cached value for ``key`` or call ``loader()`` once to fill it.
+        ``None`` results are not cached so a failed load is retried next time.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._key_lock(key):
+            # Another thread may have loaded it while we waited for the lock
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and entry[1] > time.monotonic():
+                    return entry[0]
+                self._loaders[key] = loader
+
+            value = loader()
+            if value is not None:
+                self.set(key, value)
+            return value
+
+    def refresh_all(self):
+        """Reload every entry that has a known loader, keeping the old value on failure."""
+        with self._lock:
+            loaders = list(self._loaders.items())
+
+        for key, loader in loaders:
+            try:
+                value = loader()
+            except Exception as e:
+                print(f"⚠️ Cache refresh failed for {key}: {e}")
+                continue
+            if value is not None:
+                self.set(key, value)
+                with self._lock:
+                    self.refreshes += 1
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._loaders.clear()
+            else:
+                self._entries.pop(key, None)
+                self._loaders.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "entries": len(self._entries),
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+class LRUCache:
+    """
+    Thread-safe bounded in-memory cache that evicts the least recently used entry.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
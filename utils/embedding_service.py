@@ -0,0 +1,166 @@
+import base64
+import hashlib
+import json
+import re
+import threading
+
+import numpy as np
+
+from config.settings import get_defaults
+from config.bedrock_client import get_bedrock_client, get_bedrock_models
+from config.redis_conn import get_redis_client
+from utils.cache_utils import LRUCache
+from utils.metrics import observe_stage
+from utils.singleflight import coalesce
+
+EMBEDDING_CACHE_PREFIX = "embcache:"
+
+_lru = None
+_lru_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {"lru_hits": 0, "redis_hits": 0, "misses": 0, "redis_errors": 0}
+
+
+def _cache_config() -> dict:
+    return get_defaults().get("embedding_cache", {})
+
+
+def _get_lru() -> LRUCache:
+    global _lru
+    if _lru is None:
+        with _lru_lock:
+            if _lru is None:
+                _lru = LRUCache(maxsize=_cache_config().get("lru_size", 2048))
+    return _lru
+
+
+def _count(name: str):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def normalise_text(text: str) -> str:
+    # Collapse whitespace so trivially different copies of a comment share a vector
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def embedding_cache_key(model_id: str, text: str, dimension: int = None) -> str:
+    raw = f"{model_id}\x1f{dimension or 'default'}\x1f{normalise_text(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def decode_embedding(embedding) -> list[float]:
+    # Titan returns a JSON list; some models return base64 packed float32
+    if isinstance(embedding, list):
+        return embedding
+    vector_bytes = base64.b64decode(embedding)
+    return np.frombuffer(vector_bytes, dtype=np.float32).tolist()
+
+
+def invoke_titan_embedding(
+    text: str,
+    model_id: str,
+    dimension: int = None,
+    bedrock_client=None,
+    input_key: str = "inputText"
+) -> list[float]:
+    """
+    Call a Titan embedding model directly, bypassing the cache.
+    """
+    bedrock = bedrock_client or get_bedrock_client()
+    payload = {input_key: text}
+    if dimension:
+        payload["dimensions"] = dimension
+
+    response = bedrock.invoke_model(
+        body=json.dumps(payload),
+        modelId=model_id,
+        accept="application/json",
+        contentType="application/json"
+    )
+
+    result = json.loads(response['body'].read())
+    embedding = result.get("embedding")
+    if not embedding:
+        raise Exception("No embedding found in response")
+    return decode_embedding(embedding)
+
+
+def _redis_get(cache_key: str):
+    try:
+        raw = get_redis_client().get(f"{EMBEDDING_CACHE_PREFIX}{cache_key}")
+    except Exception as e:
+        _count("redis_errors")
+        print(f"⚠️ Embedding cache read failed: {e}")
+        return None
+    if raw is None:
+        return None
+    return np.frombuffer(raw, dtype=np.float32).tolist()
+
+
+def _redis_set(cache_key: str, embedding: list[float]):
+    try:
+        get_redis_client().set(
+            f"{EMBEDDING_CACHE_PREFIX}{cache_key}",
+            np.asarray(embedding, dtype=np.float32).tobytes(),
+            ex=_cache_config().get("redis_ttl_sec", 604800)
+        )
+    except Exception as e:
+        _count("redis_errors")
+        print(f"⚠️ Embedding cache write failed: {e}")
+
+
+def get_embedding(text: str, model_id: str = None, dimension: int = None, compute=None) -> list[float]:
+    """
+    Return the embedding for ``text``, checking the in-process LRU and then Redis
+    before calling Bedrock. ``compute(normalised_text)`` overrides the Titan call
+    on a miss, so callers can keep their own client and retry policy.
+    """
+    model_id = model_id or get_bedrock_models()["titan_v2"]
+    normalised = normalise_text(text)
+
+    if not _cache_config().get("enabled", True):
+        with observe_stage("bedrock_embedding", model_id=model_id):
+            return compute(normalised) if compute else invoke_titan_embedding(normalised, model_id, dimension)
+
+    cache_key = embedding_cache_key(model_id, normalised, dimension)
+
+    lru = _get_lru()
+    embedding = lru.get(cache_key)
+    if embedding is not None:
+        _count("lru_hits")
+        return embedding
+
+    embedding = _redis_get(cache_key)
+    if embedding is not None:
+        _count("redis_hits")
+        lru.set(cache_key, embedding)
+        return embedding
+
+    _count("misses")
+
+    def _embed():
+        with observe_stage("bedrock_embedding", model_id=model_id):
+            embedding = compute(normalised) if compute else invoke_titan_embedding(normalised, model_id, dimension)
+        lru.set(cache_key, embedding)
+        _redis_set(cache_key, embedding)
+        return embedding
+
+    # Identical texts requested concurrently share one Titan call
+    return coalesce("embedding", cache_key, _embed)
+
+
+def get_embedding_cache_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["lru_hits"] + stats["redis_hits"] + stats["misses"]
+    hits = stats["lru_hits"] + stats["redis_hits"]
+    stats["lookups"] = lookups
+    stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+    stats["lru"] = _get_lru().stats()
+    return stats
+
+
+def clear_embedding_lru():
+    _get_lru().clear()
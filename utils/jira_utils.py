@@ -1,13 +1,13 @@
-import requests
-from requests.auth import HTTPBasicAuth
 import json
-from config.jira_conn import connect_jira
+import requests
+from config.jira_conn import get_jira_session, get_jira_timeout
+from utils.metrics import observe_stage
 
 
 
 # --- Function to Create Jira Bug ---
 def create_jira_issue(summary: str, description: str):
-    jira = connect_jira()
+    session, jira = get_jira_session()
 
     url = f"{jira['base_url']}/rest/api/3/issue"
     payload = {
@@ -28,16 +28,21 @@ def create_jira_issue(summary: str, description: str):
         }
     }
 
-    response = requests.post(
-        url,
-        headers=jira["headers"],
-        auth=jira["auth"],
-        data=json.dumps(payload)
-    )
+    try:
+        with observe_stage("jira_create_issue"):
+            response = session.post(
+                url,
+                data=json.dumps(payload),
+                timeout=get_jira_timeout()
+            )
+    except requests.RequestException as e:
+        print("❌ Jira request failed after retries:", e)
+        return None
 
     if response.status_code == 201:
-        print("✅ Jira issue created:", response.json()["key"])
-        return response.json()["key"]
+        issue_key = response.json()["key"]
+        print("✅ Jira issue created:", issue_key)
+        return issue_key
     else:
         print("❌ Failed to create issue:", response.status_code)
         print(response.text)
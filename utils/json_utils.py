@@ -0,0 +1,55 @@
+import json
+
+
+def iter_json_array(path: str, chunk_size: int = 1 << 16):
+    """
+    Yield the items of a top-level JSON array one at a time, reading the file
+    in chunks so memory stays flat regardless of file size.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+
+    with open(path, "r", encoding="utf-8") as f:
+        eof = False
+        need_more = True
+        while True:
+            if need_more and not eof:
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+            need_more = False
+
+            buffer = buffer.lstrip()
+            if not started:
+                if not buffer:
+                    if eof:
+                        return
+                    need_more = True
+                    continue
+                if buffer[0] != "[":
+                    raise ValueError(f"❌ {path} does not contain a JSON array")
+                buffer = buffer[1:]
+                started = True
+                continue
+
+            if buffer.startswith(","):
+                buffer = buffer[1:].lstrip()
+            if buffer.startswith("]"):
+                return
+
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Item is split across chunks; read more before decoding
+                need_more = True
+                continue
+            if end == len(buffer) and not eof:
+                # A scalar may continue in the next chunk
+                need_more = True
+                continue
+
+            yield item
+            buffer = buffer[end:]
@@ -0,0 +1,146 @@
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import GaugeMetricFamily
+
+from utils.tracing import span
+
+STAGE_LATENCY = Histogram(
+    "mcp_stage_latency_seconds",
+    "Latency of each MCP pipeline stage.",
+    ["stage", "step", "model_id"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+STAGE_IN_FLIGHT = Gauge(
+    "mcp_stage_in_flight",
+    "Pipeline stages currently running.",
+    ["stage", "step", "model_id"]
+)
+STAGE_ERRORS = Counter(
+    "mcp_stage_errors_total",
+    "Pipeline stages that raised.",
+    ["stage", "step", "model_id"]
+)
+BEDROCK_RETRIES = Counter(
+    "mcp_bedrock_retries_total",
+    "Bedrock calls retried by botocore.",
+    ["operation", "model_id"]
+)
+BEDROCK_THROTTLES = Counter(
+    "mcp_bedrock_throttles_total",
+    "Bedrock attempts rejected with a throttling error.",
+    ["operation", "model_id"]
+)
+CACHE_REQUESTS = Counter(
+    "mcp_cache_requests_total",
+    "Per-request cache outcomes (hit, miss, bypass).",
+    ["cache", "outcome"]
+)
+DEDUPLICATED_CALLS = Counter(
+    "mcp_singleflight_deduplicated_total",
+    "Calls served by an identical call already in flight instead of reaching Bedrock.",
+    ["call", "scope"]
+)
+
+THROTTLE_CODES = {"ThrottlingException", "TooManyRequestsException", "Throttling", "ServiceQuotaExceededException"}
+
+
+@contextmanager
+def observe_stage(stage: str, step: str = "", model_id: str = ""):
+    """
+    Time the block into the stage histogram and track it as in flight. When the
+    request is traced the stage also becomes a span.
+    """
+    labels = (stage, step or "", model_id or "")
+    STAGE_IN_FLIGHT.labels(*labels).inc()
+    started = time.perf_counter()
+    try:
+        with span(stage, step=step, model_id=model_id):
+            yield
+    except Exception:
+        STAGE_ERRORS.labels(*labels).inc()
+        raise
+    finally:
+        STAGE_LATENCY.labels(*labels).observe(time.perf_counter() - started)
+        STAGE_IN_FLIGHT.labels(*labels).dec()
+
+
+def record_cache_request(cache_name: str, outcome: str):
+    CACHE_REQUESTS.labels(cache_name, outcome).inc()
+
+
+def record_deduplicated_call(call: str, scope: str):
+    DEDUPLICATED_CALLS.labels(call, scope).inc()
+
+
+def _remember_model_id(params, context, **kwargs):
+    # Handlers later in the call only see the request context, so stash the model id there
+    if isinstance(params, dict) and params.get("modelId"):
+        context["mcp_model_id"] = params["modelId"]
+
+
+def _count_throttle(request_dict=None, response=None, operation=None, **kwargs):
+    if response is None:
+        return None
+    code = (response[1] or {}).get("Error", {}).get("Code")
+    if code in THROTTLE_CODES:
+        context = (request_dict or {}).get("context", {})
+        BEDROCK_THROTTLES.labels(operation.name if operation else "", context.get("mcp_model_id", "")).inc()
+    # Returning None leaves the retry decision to botocore's own handler
+    return None
+
+
+def _count_retries(parsed=None, model=None, context=None, **kwargs):
+    attempts = (parsed or {}).get("ResponseMetadata", {}).get("RetryAttempts", 0)
+    if attempts:
+        BEDROCK_RETRIES.labels(model.name if model else "", (context or {}).get("mcp_model_id", "")).inc(attempts)
+
+
+def instrument_bedrock_client(client):
+    """Count throttles and retries for every call made through ``client``."""
+    events = client.meta.events
+    events.register("before-parameter-build.bedrock-runtime", _remember_model_id)
+    events.register_first("needs-retry.bedrock-runtime", _count_throttle)
+    events.register("after-call.bedrock-runtime", _count_retries)
+    return client
+
+
+class CacheStatsCollector:
+    """
+    Exposes hit ratios and sizes of the in-process caches at scrape time, read
+    from the stats functions the caches already provide.
+    """
+
+    def __init__(self):
+        self._sources = {}
+
+    def add_source(self, name: str, stats_fn):
+        self._sources[name] = stats_fn
+
+    def collect(self):
+        ratio = GaugeMetricFamily("mcp_cache_hit_ratio", "Cache hit ratio since start.", labels=["cache"])
+        entries = GaugeMetricFamily("mcp_cache_entries", "Entries currently cached.", labels=["cache"])
+        for name, stats_fn in self._sources.items():
+            try:
+                stats = stats_fn()
+            except Exception:
+                continue
+            if "hit_rate" in stats:
+                ratio.add_metric([name], stats["hit_rate"])
+            else:
+                hits = stats.get("hits", 0)
+                total = hits + stats.get("misses", 0)
+                ratio.add_metric([name], hits / total if total else 0.0)
+            if "entries" in stats:
+                entries.add_metric([name], stats["entries"])
+        yield ratio
+        yield entries
+
+
+cache_collector = CacheStatsCollector()
+REGISTRY.register(cache_collector)
+
+
+def metrics_response() -> tuple[bytes, str]:
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -1,3 +1,63 @@
+import hashlib
+
+# Idempotent schema: uniqueness constraints also create the backing indexes
+# used by MERGE/MATCH on these keys
+SCHEMA_STATEMENTS = [
+    "CREATE CONSTRAINT defect_id_unique IF NOT EXISTS FOR (d:Defect) REQUIRE d.defect_id IS UNIQUE",
+    "CREATE CONSTRAINT tag_name_unique IF NOT EXISTS FOR (t:Tag) REQUIRE t.name IS UNIQUE",
+    "CREATE CONSTRAINT comment_id_unique IF NOT EXISTS FOR (c:Comment) REQUIRE c.comment_id IS UNIQUE",
+]
+
+def comment_id(author, text, commented_on) -> str:
+    """
+    Synthetic comment key. Comments were previously merged on (author, text,
+    date), so the id hashes exactly those values.
+    """
+    raw = "\x1f".join(str(value) if value is not None else "" for value in (author, text, commented_on))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+def backfill_comment_ids(tx, limit: int = 5000) -> int:
+    """Give up to ``limit`` legacy Comment nodes a comment_id; returns how many were updated."""
+    records = tx.run(
+        """
+        MATCH (c:Comment) WHERE c.comment_id IS NULL
+        RETURN elementId(c) AS node_id, c.commenter AS author, c.comment_text AS text, c.comment_date AS commented_on
+        LIMIT $limit
+        """,
+        limit=limit
+    ).data()
+    if not records:
+        return 0
+
+    tx.run(
+        """
+        UNWIND $rows AS row
+        MATCH (c:Comment) WHERE elementId(c) = row.node_id
+        SET c.comment_id = row.comment_id
+        """,
+        rows=[
+            {"node_id": r["node_id"], "comment_id": comment_id(r["author"], r["text"], r["commented_on"])}
+            for r in records
+        ]
+    )
+    return len(records)
+
+def ensure_schema(driver):
+    """
+    Create the constraints and indexes the loaders and lookups rely on.
+    Safe to run on every startup.
+    """
+    with driver.session() as session:
+        while session.execute_write(backfill_comment_ids) > 0:
+            pass
+
+        for statement in SCHEMA_STATEMENTS:
+            try:
+                session.run(statement).consume()
+            except Exception as e:
+                print(f"⚠️ Schema statement failed ({statement}): {e}")
+    print("✅ Neo4j schema constraints ensured")
+
 def insert_defect(tx, defect_data: dict):
     """
     Insert or update a defect node with attributes, tags, comments, and linked defects.
@@ -44,16 +104,16 @@ def insert_defect(tx, defect_data: dict):
     for comment in defect_data.get("comments", []):
         tx.run(
             """
-            MERGE (c:Comment {
-                commenter: $author,
-                comment_text: $text,
-                comment_date: $commented_on
-            })
+            MERGE (c:Comment {comment_id: $comment_id})
+            ON CREATE SET c.commenter = $author,
+                          c.comment_text = $text,
+                          c.comment_date = $commented_on
             WITH c
             MATCH (d:Defect {defect_id: $defect_id})
             MERGE (d)-[:HAS_COMMENT]->(c)
             """,
             **comment,
+            comment_id=comment_id(comment.get("author"), comment.get("text"), comment.get("commented_on")),
             defect_id=defect_data["defect_id"]
         )
 
@@ -68,17 +128,91 @@ def insert_defect(tx, defect_data: dict):
             linked_id=linked_id
         )
 
-def fetch_all_defects(tx):
+def insert_defects_batch(tx, defects: list[dict]):
     """
-    Fetch all defect nodes with their tags, comments, and linked defects.
-    Returns a list of dicts with defect details.
+    Insert or update many defects with their tags and comments in four UNWIND
+    queries, whatever the batch size. Links are written separately with
+    link_defects_batch once every defect they point to exists.
     """
-    query = """
-    MATCH (d:Defect)
-    OPTIONAL MATCH (d)-[:HAS_TAG]->(t:Tag)
-    OPTIONAL MATCH (d)-[:HAS_COMMENT]->(c:Comment)
-    OPTIONAL MATCH (d)-[:LINKED_TO]->(ld:Defect)
-    RETURN
+    tx.run(
+        """
+        UNWIND $defects AS defect
+        MERGE (d:Defect {defect_id: defect.defect_id})
+        SET d.title = defect.title,
+            d.description = defect.description,
+            d.status = defect.status,
+            d.created_date = defect.created_date,
+            d.updated_date = defect.updated_date,
+            d.created_by = defect.created_by,
+            d.updated_by = defect.updated_by
+        """,
+        defects=[
+            {key: defect.get(key) for key in (
+                "defect_id", "title", "description", "status",
+                "created_date", "updated_date", "created_by", "updated_by"
+            )}
+            for defect in defects
+        ]
+    )
+
+    tag_rows = [
+        {"defect_id": defect["defect_id"], "tag": tag}
+        for defect in defects
+        for tag in defect.get("tags", [])
+    ]
+    if tag_rows:
+        tx.run(
+            """
+            UNWIND $rows AS row
+            MERGE (t:Tag {name: row.tag})
+            WITH t, row
+            MATCH (d:Defect {defect_id: row.defect_id})
+            MERGE (d)-[:HAS_TAG]->(t)
+            """,
+            rows=tag_rows
+        )
+
+    comment_rows = [
+        {
+            "defect_id": defect["defect_id"],
+            "comment_id": comment_id(comment.get("author"), comment.get("text"), comment.get("commented_on")),
+            "author": comment.get("author"),
+            "text": comment.get("text"),
+            "commented_on": comment.get("commented_on"),
+        }
+        for defect in defects
+        for comment in defect.get("comments", [])
+    ]
+    if comment_rows:
+        tx.run(
+            """
+            UNWIND $rows AS row
+            MERGE (c:Comment {comment_id: row.comment_id})
+            ON CREATE SET c.commenter = row.author,
+                          c.comment_text = row.text,
+                          c.comment_date = row.commented_on
+            WITH c, row
+            MATCH (d:Defect {defect_id: row.defect_id})
+            MERGE (d)-[:HAS_COMMENT]->(c)
+            """,
+            rows=comment_rows
+        )
+
+def link_defects_batch(tx, links: list[dict]):
+    """Create LINKED_TO relationships for rows of {defect_id, linked_id}."""
+    tx.run(
+        """
+        UNWIND $links AS link
+        MATCH (d1:Defect {defect_id: link.defect_id})
+        MATCH (d2:Defect {defect_id: link.linked_id})
+        MERGE (d1)-[:LINKED_TO]->(d2)
+        """,
+        links=links
+    )
+
+# Each relationship is aggregated in its own pattern comprehension, so a
+# defect row never multiplies tags x comments x links before de-duplication
+DEFECT_PROJECTION = """
       d.defect_id AS defect_id,
       d.title AS title,
       d.description AS description,
@@ -87,33 +221,120 @@ def fetch_all_defects(tx):
       d.updated_date AS updated_date,
       d.created_by AS created_by,
       d.updated_by AS updated_by,
-      collect(DISTINCT t.name) AS tags,
-      collect(DISTINCT {commenter: c.commenter, comment_text: c.comment_text, comment_date: c.comment_date}) AS comments,
-      collect(DISTINCT ld.defect_id) AS linked_defects
+      [(d)-[:HAS_TAG]->(t:Tag) | t.name] AS tags,
+      [(d)-[:HAS_COMMENT]->(c:Comment) | {commenter: c.commenter, comment_text: c.comment_text, comment_date: c.comment_date}] AS comments,
+      [(d)-[:LINKED_TO]->(ld:Defect) | ld.defect_id] AS linked_defects
+"""
+
+def fetch_all_defects(tx):
+    """
+    Fetch all defect nodes with their tags, comments, and linked defects.
+    Returns a list of dicts with defect details; prefer ``iter_all_defects`` for large graphs.
+    """
+    query = f"""
+    MATCH (d:Defect)
+    RETURN {DEFECT_PROJECTION}
+    ORDER BY d.defect_id
     """
     result = tx.run(query)
     return [record.data() for record in result]
 
+def _after_clause(after) -> str:
+    # Separate query texts for the first and later pages: "$after IS NULL OR ..."
+    # stops the planner using the defect_id index for the seek and the ordering
+    return "" if after is None else "WHERE d.defect_id > $after"
+
+def fetch_defects_page(tx, after=None, limit: int = 1000) -> list[dict]:
+    """Fetch up to ``limit`` defects ordered by defect_id, starting after the ``after`` cursor."""
+    query = f"""
+    MATCH (d:Defect)
+    {_after_clause(after)}
+    RETURN {DEFECT_PROJECTION}
+    ORDER BY d.defect_id
+    LIMIT $limit
+    """
+    result = tx.run(query, after=after, limit=limit)
+    return [record.data() for record in result]
+
+def fetch_defect_versions_page(tx, after=None, limit: int = 1000) -> list[dict]:
+    """Lightweight page of (defect_id, updated_date) used to detect changed defects."""
+    result = tx.run(
+        f"""
+        MATCH (d:Defect)
+        {_after_clause(after)}
+        RETURN d.defect_id AS defect_id, d.updated_date AS updated_date
+        ORDER BY d.defect_id
+        LIMIT $limit
+        """,
+        after=after,
+        limit=limit
+    )
+    return [record.data() for record in result]
+
+def count_defects(tx, after=None) -> int:
+    result = tx.run(
+        f"MATCH (d:Defect) {_after_clause(after)} RETURN count(d) AS total",
+        after=after
+    )
+    return result.single()["total"]
+
+def iter_all_defects(driver, page_size: int = 1000, after=None, fetch_page=fetch_defects_page):
+    """
+    Yield every defect in defect_id order, one page per read transaction.
+    Memory stays bounded by ``page_size``; pass a previous defect_id as
+    ``after`` to resume an interrupted export. ``fetch_page`` selects the
+    projection, e.g. ``fetch_defect_versions_page``.
+    """
+    with driver.session() as session:
+        while True:
+            page = session.execute_read(fetch_page, after, page_size)
+            yield from page
+            if len(page) < page_size:
+                return
+            after = page[-1]["defect_id"]
+
 def delete_all_defects(tx):
     """Delete all Defect nodes and their relationships."""
     tx.run("MATCH (d:Defect) DETACH DELETE d")
 
-def fetch_defect_by_id(tx, defect_id):
+def delete_defects_batch(tx, limit: int = 10000) -> int:
+    """Delete up to ``limit`` Defect nodes; returns how many were removed."""
+    result = tx.run(
+        "MATCH (d:Defect) WITH d LIMIT $limit DETACH DELETE d RETURN count(*) AS deleted",
+        limit=limit
+    )
+    return result.single()["deleted"]
+
+def fetch_defects_by_ids(tx, defect_ids: list[str]) -> list[dict]:
+    """
+    Fetch defects with their tags and comments in one round-trip.
+    Results follow the order of ``defect_ids``; unknown ids are skipped.
+    """
+    if not defect_ids:
+        return []
+
     query = """
-    MATCH (d:Defect {id: $defect_id})
-    RETURN d.id AS defect_id, d.title AS title, d.description AS description,
-           d.status AS status, d.tags AS tags, d.comments AS comments
-    """
-    result = tx.run(query, defect_id=defect_id)
-    record = result.single()
-    if record:
-        return {
-            "defect_id": record["defect_id"],
-            "title": record["title"],
-            "description": record["description"],
-            "status": record["status"],
-            "tags": record.get("tags", []),
-            "comments": record.get("comments", []),
-        }
-    return None
+    UNWIND range(0, size($ids) - 1) AS idx
+    WITH idx, $ids[idx] AS defect_id
+    MATCH (d:Defect {defect_id: defect_id})
+    RETURN idx,
+           d.defect_id AS defect_id,
+           d.title AS title,
+           d.description AS description,
+           d.status AS status,
+           d.updated_date AS updated_date,
+           [(d)-[:HAS_TAG]->(t:Tag) | t.name] AS tags,
+           [(d)-[:HAS_COMMENT]->(c:Comment) | {commenter: c.commenter, comment_text: c.comment_text, comment_date: c.comment_date}] AS comments
+    ORDER BY idx
+    """
+    result = tx.run(query, ids=list(defect_ids))
+    records = []
+    for record in result:
+        data = record.data()
+        data.pop("idx", None)
+        records.append(data)
+    return records
 
+def fetch_defect_by_id(tx, defect_id):
+    records = fetch_defects_by_ids(tx, [defect_id])
+    return records[0] if records else None
@@ -0,0 +1,32 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket. ``acquire()`` blocks until a call is allowed so
+    that at most ``rate_per_sec`` calls start per second (with a small burst).
+    A rate of ``None`` or ``0`` disables limiting.
+    """
+
+    def __init__(self, rate_per_sec: float = None, burst: int = None):
+        self.rate_per_sec = rate_per_sec
+        self.capacity = burst or max(1, int(rate_per_sec or 1))
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate_per_sec:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate_per_sec)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate_per_sec
+            time.sleep(wait)
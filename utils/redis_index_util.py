@@ -1,49 +1,90 @@
 from config.redis_conn import get_redis_client
+from config.settings import get_defaults
 from redis.commands.search.field import TextField, VectorField
 from redis.commands.search.indexDefinition import IndexDefinition, IndexType
 
 VECTOR_DIM = 1024  # Titan embedding size
+MIN_INDEX_CAPACITY = 100
 
+# Defaults per index; the 'vector_indexes' block in config.yml overrides
+# 'algorithm' and 'algorithm_params' per token
 INDEX_CONFIGS = {
     "defect_embeddings_index": {
         "index_name": "defect_index",
         "prefix": "defect:",
-        "fields": [
-            TextField("defect_id"),
-            TextField("description"),
-            VectorField("embedding", "FLAT", {
-                "TYPE": "FLOAT32",
-                "DIM": VECTOR_DIM,
-                "DISTANCE_METRIC": "COSINE",
-                "INITIAL_CAP": 100,
-                "BLOCK_SIZE": 100,
-            }),
-        ],
+        "text_fields": ["defect_id", "description"],
+        "algorithm": "HNSW",
+        "algorithm_params": {"M": 16, "EF_CONSTRUCTION": 200, "EF_RUNTIME": 10},
     },
     "manifest_embeddings_index": {
         "index_name": "manifest_index",
         "prefix": "manifest:",
-        "fields": [
-            TextField("manifest_id"),
-            TextField("description"),
-            VectorField("embedding", "FLAT", {
-                "TYPE": "FLOAT32",
-                "DIM": VECTOR_DIM,
-                "DISTANCE_METRIC": "COSINE",
-                "INITIAL_CAP": 100,
-                "BLOCK_SIZE": 100,
-            }),
-        ],
+        "text_fields": ["manifest_id", "description"],
+        "algorithm": "FLAT",
+        "algorithm_params": {"BLOCK_SIZE": 100},
     }
 }
 
-def create_vector_index(token: str):
+def get_index_settings(token: str) -> dict:
     config = INDEX_CONFIGS.get(token)
     if not config:
         raise ValueError(f"❌ Unknown embedding index token: '{token}'")
 
+    overrides = get_defaults().get("vector_indexes", {}).get(token, {})
+    settings = dict(config)
+    settings["algorithm"] = overrides.get("algorithm", config["algorithm"]).upper()
+    if "algorithm" in overrides and settings["algorithm"] != config["algorithm"]:
+        settings["algorithm_params"] = dict(overrides.get("algorithm_params", {}))
+    else:
+        settings["algorithm_params"] = {**config["algorithm_params"], **overrides.get("algorithm_params", {})}
+    return settings
+
+def build_vector_field(
+    algorithm: str,
+    algorithm_params: dict,
+    capacity: int = MIN_INDEX_CAPACITY,
+    field_name: str = "embedding",
+    dim: int = VECTOR_DIM
+) -> VectorField:
+    """
+    Build the VectorField for FLAT or HNSW, pre-sizing it for ``capacity`` vectors.
+    """
+    attributes = {
+        "TYPE": "FLOAT32",
+        "DIM": dim,
+        "DISTANCE_METRIC": "COSINE",
+        "INITIAL_CAP": max(int(capacity), MIN_INDEX_CAPACITY),
+    }
+
+    algorithm = algorithm.upper()
+    if algorithm == "FLAT":
+        attributes["BLOCK_SIZE"] = algorithm_params.get("BLOCK_SIZE", 1024)
+    elif algorithm == "HNSW":
+        for name in ("M", "EF_CONSTRUCTION", "EF_RUNTIME", "EPSILON"):
+            if name in algorithm_params:
+                attributes[name] = algorithm_params[name]
+    else:
+        raise ValueError(f"❌ Unsupported vector algorithm: '{algorithm}'")
+
+    return VectorField(field_name, algorithm, attributes)
+
+def knn_ef_runtime_clause(settings: dict, ef_runtime: int = None) -> str:
+    """
+    KNN query fragment overriding EF_RUNTIME for one query. FLAT indexes reject
+    the attribute, so it is only emitted for HNSW.
+    """
+    if ef_runtime and settings["algorithm"] == "HNSW":
+        return " EF_RUNTIME $ef_runtime"
+    return ""
+
+def count_prefixed_keys(redis_conn, prefix: str) -> int:
+    return sum(1 for _ in redis_conn.scan_iter(f"{prefix}*", count=1000))
+
+def create_vector_index(token: str, expected_size: int = None):
+    settings = get_index_settings(token)
+
     redis_conn = get_redis_client()
-    index_name = config["index_name"]
+    index_name = settings["index_name"]
 
     try:
         redis_conn.ft(index_name).info()
@@ -52,14 +93,22 @@ def create_vector_index(token: str):
     except Exception:
         print(f"🆕 Creating Redis index '{index_name}'...")
 
+    if expected_size is None:
+        expected_size = count_prefixed_keys(redis_conn, settings["prefix"])
+    # Leave headroom so the index does not have to grow right after a load
+    capacity = int(expected_size * 1.2)
+
+    fields = [TextField(name) for name in settings["text_fields"]]
+    fields.append(build_vector_field(settings["algorithm"], settings["algorithm_params"], capacity))
+
     redis_conn.ft(index_name).create_index(
-        fields=config["fields"],
+        fields=fields,
         definition=IndexDefinition(
-            prefix=[config["prefix"]],
+            prefix=[settings["prefix"]],
             index_type=IndexType.HASH
         )
     )
-    print(f"✅ Redis index '{index_name}' created successfully.")
+    print(f"✅ Redis index '{index_name}' created successfully ({settings['algorithm']}, capacity {max(capacity, MIN_INDEX_CAPACITY)}).")
 
 
 def drop_index(token: str, delete_documents: bool = False):
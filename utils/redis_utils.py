@@ -13,7 +13,9 @@ def create_vector_index(
     embedding_field_name: str = "embedding",
     distance_metric: str = "COSINE",
     vector_algo: str = "FLAT",
-    vector_type: str = "FLOAT32"
+    vector_type: str = "FLOAT32",
+    algorithm_params: dict = None,
+    capacity: int = 100
 ):
     try:
         redis_conn.ft(index_name).info()
@@ -24,19 +26,16 @@ def create_vector_index(
 
     try:
         fields = [TextField(field) for field in text_fields]
-        fields.append(
-            VectorField(
-                embedding_field_name,
-                vector_algo,
-                {
-                    "TYPE": vector_type,
-                    "DIM": vector_dim,
-                    "DISTANCE_METRIC": distance_metric,
-                    "INITIAL_CAP": 100,
-                    "BLOCK_SIZE": 100
-                }
-            )
-        )
+        attributes = {
+            "TYPE": vector_type,
+            "DIM": vector_dim,
+            "DISTANCE_METRIC": distance_metric,
+            "INITIAL_CAP": max(capacity, 100),
+        }
+        if vector_algo.upper() == "FLAT":
+            attributes["BLOCK_SIZE"] = 100
+        attributes.update(algorithm_params or {})
+        fields.append(VectorField(embedding_field_name, vector_algo, attributes))
 
         redis_conn.ft(index_name).create_index(
             fields=fields,
@@ -47,6 +46,17 @@ def create_vector_index(
         print(f"⚠️ Redis index creation issue for '{index_name}': {e}")
 
 
+def _embedding_hash_fields(embedding: list[float], metadata: dict, embedding_field_name: str) -> dict:
+    fields = {embedding_field_name: np.array(embedding, dtype=np.float32).tobytes()}
+    for field_name, value in metadata.items():
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value)
+        else:
+            value = str(value)
+        fields[field_name] = value
+    return fields
+
+
 def upsert_embedding(
     redis_conn,
     key_id: str,
@@ -56,14 +66,10 @@ def upsert_embedding(
     embedding_field_name: str = "embedding"
 ):
     key = f"{key_prefix}{key_id}"
-    vector_bytes = np.array(embedding, dtype=np.float32).tobytes()
+    fields = _embedding_hash_fields(embedding, metadata, embedding_field_name)
 
-    hset_args = [embedding_field_name, vector_bytes]
-    for field_name, value in metadata.items():
-        if isinstance(value, (dict, list)):
-            value = json.dumps(value)
-        else:
-            value = str(value)
+    hset_args = []
+    for field_name, value in fields.items():
         hset_args.extend([field_name, value])
 
     try:
@@ -73,6 +79,68 @@ def upsert_embedding(
         print(f"❌ Failed to upsert embedding for {key}: {e}")
 
 
+def upsert_embeddings_batch(
+    redis_conn,
+    items: list[tuple],
+    key_prefix: str,
+    embedding_field_name: str = "embedding"
+) -> int:
+    """
+    Write many (key_id, embedding, metadata) tuples in one pipelined round-trip.
+    Returns the number of hashes written; raises if the pipeline fails.
+    """
+    if not items:
+        return 0
+
+    pipe = redis_conn.pipeline(transaction=False)
+    for key_id, embedding, metadata in items:
+        pipe.hset(
+            f"{key_prefix}{key_id}",
+            mapping=_embedding_hash_fields(embedding, metadata, embedding_field_name)
+        )
+    pipe.execute()
+    return len(items)
+
+
+def scan_hash_fields(redis_conn, key_prefix: str, fields: list[str], batch_size: int = 500) -> dict:
+    """
+    Return {key_id: {field: value}} for every hash under ``key_prefix``, reading
+    only ``fields`` with SCAN and pipelined HMGET. Values are decoded to str.
+    """
+    found = {}
+
+    def flush(keys):
+        pipe = redis_conn.pipeline(transaction=False)
+        for key in keys:
+            pipe.hmget(key, *fields)
+        for key, values in zip(keys, pipe.execute()):
+            key = key.decode("utf-8") if isinstance(key, bytes) else key
+            found[key[len(key_prefix):]] = {
+                field: value.decode("utf-8") if isinstance(value, bytes) else value
+                for field, value in zip(fields, values)
+            }
+
+    batch = []
+    for key in redis_conn.scan_iter(f"{key_prefix}*", count=batch_size):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    return found
+
+
+def delete_keys_batch(redis_conn, key_ids: list[str], key_prefix: str) -> int:
+    """Delete ``key_prefix + key_id`` for every id in one pipelined round-trip."""
+    if not key_ids:
+        return 0
+    pipe = redis_conn.pipeline(transaction=False)
+    for key_id in key_ids:
+        pipe.delete(f"{key_prefix}{key_id}")
+    return sum(pipe.execute())
+
+
 def clear_cache_from_redis(redis_conn, key_prefix: str):
     """
     Delete all keys in Redis matching the given prefix (e.g., 'manifest:', 'defect:')
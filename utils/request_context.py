@@ -0,0 +1,28 @@
+import contextvars
+from contextlib import contextmanager
+
+from utils.metrics import record_cache_request
+
+# Per-request report of cache outcomes, e.g. {"step_selection": "hit"}
+_cache_report = contextvars.ContextVar("cache_report", default=None)
+
+
+@contextmanager
+def request_cache_report():
+    """
+    Collect cache outcomes recorded while the block runs. The variable is reset
+    afterwards because pool threads are reused across requests.
+    """
+    report = {}
+    token = _cache_report.set(report)
+    try:
+        yield report
+    finally:
+        _cache_report.reset(token)
+
+
+def record_cache_event(cache_name: str, outcome: str):
+    record_cache_request(cache_name, outcome)
+    report = _cache_report.get()
+    if report is not None:
+        report[cache_name] = outcome
@@ -1,94 +1,157 @@
 import numpy as np
-import json
-import base64
 
-from config.bedrock_client import get_bedrock_client, get_bedrock_models
+from config.bedrock_client import get_bedrock_models
 from config.redis_conn import get_redis_client
 from config.neo4j_conn import get_neo4j_driver
-from utils.neo4j_utils import fetch_defect_by_id
-from utils.neo4j_utils import fetch_defect_by_id
+from utils.neo4j_utils import fetch_defects_by_ids
+from utils.embedding_service import get_embedding
+from utils.redis_index_util import get_index_settings, knn_ef_runtime_clause
+from redis.commands.search.query import Query
+from config.settings import get_defaults
+from utils.cache_utils import TTLCache
+from utils.similarity_engine import SimilarityIndex, load_index_from_redis
+from utils.request_context import record_cache_event
+from utils.metrics import observe_stage
+
+_fallback_indexes = TTLCache(ttl_sec=300)
+_defect_records = TTLCache(ttl_sec=30, maxsize=2048)
 
 
 def cosine_similarity(vec1: list[float], vec2: list[float]) -> float:
-    v1 = np.array(vec1)
-    v2 = np.array(vec2)
-    if np.linalg.norm(v1) == 0 or np.linalg.norm(v2) == 0:
+    v1 = np.asarray(vec1)
+    v2 = np.asarray(vec2)
+    norm = np.linalg.norm(v1) * np.linalg.norm(v2)
+    if norm == 0:
         return 0.0
-    return float(np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2)))
+    return float(np.dot(v1, v2) / norm)
 
 def find_similar_defects(
     query_embedding: list[float],
     defect_embeddings: list[dict],
     threshold: float = 0.8
 ) -> list[dict]:
-    similar = []
-    for defect in defect_embeddings:
-        score = cosine_similarity(query_embedding, defect['embedding'])
-        if score >= threshold:
-            similar.append({"defect_id": defect["defect_id"], "score": score})
-    return sorted(similar, key=lambda x: x["score"], reverse=True)
+    if not defect_embeddings:
+        return []
+    index = SimilarityIndex.from_records(defect_embeddings)
+    return index.search(query_embedding, threshold=threshold)
+
+def _get_fallback_index(redis_conn, key_prefix: str) -> SimilarityIndex:
+    """
+    In-process index used when Redis Search is unavailable, rebuilt after
+    ``similarity_fallback_ttl_sec``.
+    """
+    _fallback_indexes.ttl_sec = get_defaults().get("similarity_fallback_ttl_sec", 300)
+    return _fallback_indexes.get_or_load(
+        key_prefix,
+        lambda: load_index_from_redis(redis_conn, key_prefix)
+    )
+
+def fetch_defect_records(defect_ids: list[str]) -> dict:
+    """
+    Return {defect_id: record} for the given ids. Recently fetched records are
+    served from a short-lived, bounded cache (``defect_record_cache_ttl_sec``,
+    0 disables it; ``defect_record_cache_size`` entries at most)
+    and all misses are fetched from Neo4j in a single query.
+    """
+    ttl = get_defaults().get("defect_record_cache_ttl_sec", 30)
+    use_cache = ttl > 0
+    _defect_records.ttl_sec = ttl
+    _defect_records.maxsize = get_defaults().get("defect_record_cache_size", 2048)
+
+    records = {}
+    missing = []
+    for defect_id in defect_ids:
+        record = _defect_records.get(defect_id) if use_cache else None
+        if record is not None:
+            records[defect_id] = record
+        else:
+            missing.append(defect_id)
+
+    # A search with no hits has nothing to look up, so it is neither a hit nor a miss
+    if use_cache and defect_ids:
+        record_cache_event("defect_records", "hit" if not missing else "miss")
+
+    if missing:
+        with observe_stage("neo4j_enrichment"), get_neo4j_driver().session() as session:
+            for record in session.execute_read(fetch_defects_by_ids, missing):
+                records[record["defect_id"]] = record
+                if use_cache:
+                    _defect_records.set(record["defect_id"], record)
+    return records
+
+def get_defect_record_cache_stats() -> dict:
+    return _defect_records.stats()
 
 def polish_answer(text: str) -> str:
     return text.strip()
 
 def vectorize_text(text: str) -> list[float]:
     """
-    Uses Bedrock to get embedding for the given text
+    Uses Bedrock to get embedding for the given text (served from the embedding cache when possible)
     """
-    bedrock = get_bedrock_client()
     models = get_bedrock_models()
     model_id = models["titan_v2"]
 
-    payload = { "inputText": polish_answer(text) }
+    return get_embedding(polish_answer(text), model_id=model_id)
 
-    response = bedrock.invoke_model(
-        body=json.dumps(payload),
-        modelId=model_id,
-        accept="application/json",
-        contentType="application/json"
-    )
-
-    result = json.loads(response['body'].read())
-    embedding = result.get("embedding")
-    if not embedding:
-        raise Exception("No embedding found in response")
-
-    # embedding may be a list (already decoded) or base64 string, handle both
-    if isinstance(embedding, list):
-        return embedding
-    else:
-        vector_bytes = base64.b64decode(embedding)
-        return np.frombuffer(vector_bytes, dtype=np.float32).tolist()
 
-
-def search_similar_defects(query_text: str, top_k: int = 3, threshold: float = 0.75) -> list[dict]:
+def search_similar_defects(query_text: str, top_k: int = 3, threshold: float = 0.75, ef_runtime: int = None) -> list[dict]:
     """
-    Search Redis for top-k similar defects using vectorized input
+    Search Redis for top-k similar defects using vectorized input.
+    ``ef_runtime`` overrides the HNSW search breadth for this query only.
     """
+    config = get_index_settings("defect_embeddings_index")
     redis_conn = get_redis_client()
     query_vector = vectorize_text(query_text)
-
-    # Pull all embeddings from Redis (for small-scale use)
-    keys = redis_conn.keys("defect:*")
-    all_embeddings = []
-    for key in keys:
-        data = redis_conn.json().get(key)
-        all_embeddings.append({
-            "defect_id": data["defect_id"],
-            "embedding": data["embedding"]
-        })
-
-    # Use cosine similarity for filtering
-    similar = find_similar_defects(query_vector, all_embeddings, threshold=threshold)
-
-    # Add Neo4j metadata
-    neo4j = get_neo4j_driver()
+    vector_bytes = np.array(query_vector, dtype=np.float32).tobytes()
+    radius = 1.0 - threshold
+
+    if ef_runtime and config["algorithm"] == "HNSW":
+        # Range queries take no EF_RUNTIME, so run an HNSW KNN with the override
+        # and drop the (at most top_k) hits outside the radius
+        query = (
+            Query(f"*=>[KNN $top_k @embedding $vec_param{knn_ef_runtime_clause(config, ef_runtime)} AS score]")
+            .sort_by("score")
+            .return_fields("defect_id", "score")
+            .paging(0, top_k)
+            .dialect(2)
+        )
+        params_dict = {"top_k": top_k, "vec_param": vector_bytes, "ef_runtime": ef_runtime}
+    else:
+        # COSINE distance is 1 - similarity, so the threshold becomes a range radius
+        # and Redis only returns the closest top_k defects inside it
+        query = (
+            Query("@embedding:[VECTOR_RANGE $radius $vec_param]=>{$YIELD_DISTANCE_AS: score}")
+            .sort_by("score")
+            .return_fields("defect_id", "score")
+            .paging(0, top_k)
+            .dialect(2)
+        )
+        params_dict = {"radius": radius, "vec_param": vector_bytes}
+
+    try:
+        with observe_stage("defect_search"):
+            results = redis_conn.ft(config["index_name"]).search(query, query_params=params_dict)
+        similar = [
+            {"defect_id": doc.defect_id, "score": 1.0 - float(doc.score)}
+            for doc in results.docs
+            if float(doc.score) <= radius
+        ]
+    except Exception as e:
+        print(f"Search error: {e}. Falling back to in-process similarity.")
+        try:
+            index = _get_fallback_index(redis_conn, config["prefix"])
+            similar = index.search(query_vector, top_k=top_k, threshold=threshold)
+        except Exception as fallback_error:
+            print(f"Fallback search error: {fallback_error}")
+            return []
+
+    # Add Neo4j metadata with one batched lookup, keeping the score order
+    records = fetch_defect_records([match["defect_id"] for match in similar])
     enriched = []
-    with neo4j.session() as session:
-        for match in similar[:top_k]:
-            record = fetch_defect_by_id(session, match["defect_id"])
-            if record:
-                record["score"] = match["score"]
-                enriched.append(record)
+    for match in similar:
+        record = records.get(match["defect_id"])
+        if record:
+            enriched.append({**record, "score": match["score"]})
 
     return enriched
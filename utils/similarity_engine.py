@@ -0,0 +1,108 @@
+import numpy as np
+
+
+class SimilarityIndex:
+    """
+    In-process cosine similarity index.
+
+    All vectors live in one contiguous, L2-normalised float32 matrix, so a query
+    (or a batch of queries) is scored with a single matrix product and the
+    top-k rows are picked with ``argpartition`` instead of a full sort.
+    """
+
+    def __init__(self, ids: list[str] = None, vectors=None):
+        self.ids = []
+        self.matrix = np.empty((0, 0), dtype=np.float32)
+        if ids is not None and vectors is not None:
+            self.build(ids, vectors)
+
+    @classmethod
+    def from_records(cls, records: list[dict], id_field: str = "defect_id", embedding_field: str = "embedding"):
+        return cls(
+            [r[id_field] for r in records],
+            [r[embedding_field] for r in records]
+        )
+
+    @staticmethod
+    def _normalise(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        # Zero vectors stay zero and score 0 against everything
+        norms[norms == 0] = 1.0
+        return np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
+    def build(self, ids: list[str], vectors):
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or len(ids) != matrix.shape[0]:
+            raise ValueError("❌ ids and vectors must describe the same number of rows")
+        self.ids = list(ids)
+        self.matrix = self._normalise(matrix)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search_batch(self, queries, top_k: int = None, threshold: float = None) -> list[list[dict]]:
+        """
+        Score every query against the index in one matrix product.
+        Returns one list per query of {"defect_id", "score"} sorted by score.
+        """
+        if not self.ids:
+            return [[] for _ in range(len(queries))]
+
+        query_matrix = self._normalise(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        scores = query_matrix @ self.matrix.T
+
+        n = scores.shape[1]
+        k = n if top_k is None else min(top_k, n)
+
+        if k < n:
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(n), scores.shape)
+
+        results = []
+        for row, cols in enumerate(candidates):
+            row_scores = scores[row, cols]
+            order = np.argsort(-row_scores, kind="stable")
+            hits = []
+            for col, score in zip(cols[order], row_scores[order]):
+                if threshold is not None and score < threshold:
+                    break
+                hits.append({"defect_id": self.ids[col], "score": float(score)})
+            results.append(hits)
+        return results
+
+    def search(self, query, top_k: int = None, threshold: float = None) -> list[dict]:
+        return self.search_batch([query], top_k=top_k, threshold=threshold)[0]
+
+
+def load_index_from_redis(redis_conn, key_prefix: str = "defect:", batch_size: int = 500) -> SimilarityIndex:
+    """
+    Build a SimilarityIndex from the vectors stored under ``key_prefix`` in Redis,
+    scanning keys with SCAN and fetching them in pipelined batches.
+    """
+    ids, vectors = [], []
+
+    def flush(keys):
+        pipe = redis_conn.pipeline(transaction=False)
+        for key in keys:
+            pipe.hmget(key, "defect_id", "embedding")
+        for key, (defect_id, embedding) in zip(keys, pipe.execute()):
+            if not embedding:
+                continue
+            if defect_id is None:
+                defect_id = key[len(key_prefix):] if isinstance(key, str) else key.decode("utf-8")[len(key_prefix):]
+            ids.append(defect_id.decode("utf-8") if isinstance(defect_id, bytes) else defect_id)
+            vectors.append(np.frombuffer(embedding, dtype=np.float32))
+
+    batch = []
+    for key in redis_conn.scan_iter(f"{key_prefix}*", count=batch_size):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    if not vectors:
+        return SimilarityIndex()
+    return SimilarityIndex(ids, np.vstack(vectors))
@@ -0,0 +1,159 @@
+import json
+import threading
+import time
+import uuid
+
+from config.redis_conn import get_redis_client
+from config.settings import get_defaults
+from utils.metrics import record_deduplicated_call
+from utils.tracing import span
+
+LOCK_PREFIX = "singleflight:lock:"
+RESULT_PREFIX = "singleflight:result:"
+
+
+def _config() -> dict:
+    return get_defaults().get("singleflight", {})
+
+
+def _decode_token(raw):
+    return raw.decode() if isinstance(raw, bytes) else raw
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time. Callers arriving while a call for
+    the same key is in flight wait for it and receive its result (or its
+    exception) instead of making their own.
+
+    In "redis" mode the leader also takes a short Redis lock so workers in other
+    processes wait for its result rather than repeating the call.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn, mode: str = "process", encode=json.dumps, decode=json.loads, publish=None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            with span("singleflight_wait", call=self.name):
+                call.done.wait()
+            record_deduplicated_call(self.name, "process")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            if mode == "redis":
+                call.result = self._do_cross_worker(key, fn, encode, decode, publish)
+            else:
+                call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def _do_cross_worker(self, key: str, fn, encode, decode, publish=None):
+        config = _config()
+        lock_ttl_ms = config.get("lock_ttl_ms", 30000)
+        lock_key = f"{LOCK_PREFIX}{self.name}:{key}"
+        token = uuid.uuid4().hex
+
+        try:
+            redis = get_redis_client()
+            acquired = redis.set(lock_key, token, nx=True, px=lock_ttl_ms)
+        except Exception as e:
+            print(f"⚠️ Single-flight lock unavailable, calling directly: {e}")
+            return fn()
+
+        if acquired:
+            try:
+                result = fn()
+                # Results the caller would not cache (e.g. a failed completion) are not shared either;
+                # waiting workers see the lock go away and make their own call
+                if publish is None or publish(result):
+                    redis.set(self._result_key(key, token), encode(result), ex=config.get("result_ttl_sec", 30))
+                return result
+            finally:
+                self._release(redis, lock_key, token)
+
+        # Another worker is making the call; wait for the result published under its lock token,
+        # so a stale result from an earlier leader is never picked up
+        poll_sec = config.get("poll_interval_ms", 50) / 1000
+        deadline = time.monotonic() + lock_ttl_ms / 1000
+        owner = None
+        try:
+            with span("singleflight_wait", call=self.name, scope="redis"):
+                while time.monotonic() < deadline:
+                    # Read the lock before the result: the leader publishes before releasing,
+                    # so a missing lock followed by a missing result means nothing is coming
+                    current = _decode_token(redis.get(lock_key))
+                    owner = current or owner
+                    raw = redis.get(self._result_key(key, owner)) if owner else None
+                    if raw is None and current is None:
+                        break
+                    if raw is not None:
+                        record_deduplicated_call(self.name, "redis")
+                        return decode(raw)
+                    time.sleep(poll_sec)
+        except Exception as e:
+            print(f"⚠️ Single-flight wait failed, calling directly: {e}")
+        return fn()
+
+    def _result_key(self, key: str, token: str) -> str:
+        return f"{RESULT_PREFIX}{self.name}:{key}:{token}"
+
+    def _release(self, redis, lock_key: str, token: str):
+        try:
+            if _decode_token(redis.get(lock_key)) == token:
+                redis.delete(lock_key)
+        except Exception as e:
+            print(f"⚠️ Single-flight lock release failed: {e}")
+
+
+_groups = {}
+_groups_lock = threading.Lock()
+
+
+def get_singleflight(name: str) -> SingleFlight:
+    with _groups_lock:
+        if name not in _groups:
+            _groups[name] = SingleFlight(name)
+        return _groups[name]
+
+
+def coalesce(name: str, key: str, fn, publish=None):
+    """
+    Call ``fn()`` unless an identical call (same ``name`` and ``key``) is
+    already in flight, in which case wait for and return its result. The
+    mode comes from ``singleflight.mode``: "process", "redis" or "off".
+    In "redis" mode a result is handed to other workers only if
+    ``publish(result)`` is true (default: always).
+    """
+    mode = _config().get("mode", "process")
+    if mode == "off":
+        return fn()
+    return get_singleflight(name).do(key, fn, mode=mode, publish=publish)
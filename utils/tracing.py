@@ -0,0 +1,123 @@
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Set only while a traced request runs; everywhere else span() is a no-op
+_active_trace = contextvars.ContextVar("active_trace", default=None)
+_parent_span = contextvars.ContextVar("parent_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "attrs", "start", "duration", "thread_id", "children")
+
+    def __init__(self, name: str, attrs: dict, start: float, thread_id: int):
+        self.name = name
+        self.attrs = attrs
+        self.start = start
+        self.duration = None
+        self.thread_id = thread_id
+        self.children = []
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "start_ms": round(self.start * 1000, 3),
+            "duration_ms": round((self.duration or 0.0) * 1000, 3),
+            "attrs": self.attrs,
+            "children": [child.to_dict() for child in self.children],
+        }
+
+
+class Trace:
+    """
+    Span tree for one request. Offsets are seconds since the trace started;
+    spans may be added from several threads.
+    """
+
+    def __init__(self, name: str = "request"):
+        self.name = name
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self.roots = []
+        self.duration = None
+
+    def now(self) -> float:
+        return time.perf_counter() - self._origin
+
+    def add(self, parent, span: Span):
+        with self._lock:
+            (parent.children if parent is not None else self.roots).append(span)
+
+    def _walk(self):
+        stack = list(self.roots)
+        while stack:
+            span = stack.pop()
+            yield span
+            stack.extend(span.children)
+
+    def to_chrome_events(self) -> list[dict]:
+        """Complete ("X") events in the Chrome trace-event format, timestamps in microseconds."""
+        pid = os.getpid()
+        events = [
+            {
+                "name": span.name,
+                "ph": "X",
+                "ts": round(span.start * 1e6, 1),
+                "dur": round((span.duration or 0.0) * 1e6, 1),
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": span.attrs,
+            }
+            for span in self._walk()
+        ]
+        return sorted(events, key=lambda event: event["ts"])
+
+    def to_dict(self) -> dict:
+        """
+        Span tree plus ``traceEvents``, so the object can be saved as JSON and
+        opened directly in Perfetto or chrome://tracing.
+        """
+        return {
+            "name": self.name,
+            "duration_ms": round((self.duration if self.duration is not None else self.now()) * 1000, 3),
+            "spans": [span.to_dict() for span in self.roots],
+            "traceEvents": self.to_chrome_events(),
+            "displayTimeUnit": "ms",
+        }
+
+
+@contextmanager
+def start_trace(name: str = "request"):
+    """Record spans opened while the block runs (including in copied contexts)."""
+    trace = Trace(name)
+    trace_token = _active_trace.set(trace)
+    parent_token = _parent_span.set(None)
+    try:
+        yield trace
+    finally:
+        trace.duration = trace.now()
+        _parent_span.reset(parent_token)
+        _active_trace.reset(trace_token)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    trace = _active_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    current = Span(name, {k: v for k, v in attrs.items() if v}, trace.now(), threading.get_ident())
+    trace.add(_parent_span.get(), current)
+    token = _parent_span.set(current)
+    try:
+        yield current
+    finally:
+        current.duration = trace.now() - current.start
+        _parent_span.reset(token)
+
+
+def tracing_enabled() -> bool:
+    return _active_trace.get() is not None